@@ -1,39 +1,298 @@
+import time
+from datetime import timedelta
 import streamlit as st
+import numpy as np
 import pandas as pd
-from chatbot.chatbot import build_chatbot
-from config.constants import COLOR_BULL, COLOR_BEAR
-from data.cleaner import load_tesla_data_from_csv
-from utils.metrics import calculate_metrics
-from charts.charts import create_lightweight_chart, create_additional_charts
+from backtest.backtest import run_backtest
+from backtest.sweep import parameter_grid, run_sweep
+from chatbot.answer_cache import get_answer_cache, stream_and_store
+from chatbot.query_engine import QueryEngine
+from config.constants import COLOR_BULL, COLOR_BEAR, CHART_COMPACT_PAYLOAD, MAX_CHART_BARS, BACKTEST_FEE_BPS, BACKTEST_SLIPPAGE_BPS, PROFILING_ENABLED, LIVE_REFRESH_SECONDS, LIVE_SOURCES
+from data.cleaner import load_symbol_store, load_ohlcv_pyramid
+from data.live import get_live_session
+from data.quality import assess_quality, quality_issues
+from data.registry import get_dataset_registry
+from data.resample import select_pyramid_level, window_bounds
+from utils.helpers import bar_timestamps
+from utils.indicators import INDICATORS, get_indicator_cache
+from utils.profiling import begin_run, end_run, prometheus_text, records_as_dicts, run_jsonl, stage
+from utils.level_index import LevelIndex
+from utils.range_index import RangeIndex, date_to_unix_seconds
+from charts.charts import create_lightweight_chart, create_additional_charts, create_equity_chart
+from charts.live_chart import render_live_chart
 from ui.style import set_custom_style
 
 # Set up Streamlit page
 st.set_page_config(page_title="Tesla Trading Dashboard", page_icon="📈", layout="wide")
 set_custom_style()
 
+def dataset_artifact(df, name, build):
+    """Build `name` from `df` once per process and share it read-only with every session"""
+    return get_dataset_registry().get_or_build(df.attrs.get('dataset_key'), name, build)
+
+def hold_dataset(uploads_key):
+    """Pin this session's uploads in the registry; the lease is dropped when the uploads change or the session ends"""
+    lease = st.session_state.get("dataset_lease")
+    if lease is not None and lease.key == uploads_key:
+        return
+    if lease is not None:
+        lease.release()
+    st.session_state["dataset_lease"] = get_dataset_registry().acquire(uploads_key)
+
+def get_chatbot(df):
+    """Build the QA chain once per dataset instead of on every question"""
+    def build():
+        # LangChain, FAISS and the Gemini client load on first use of the Chatbot section only
+        from chatbot.chatbot import build_chatbot
+        progress_bar = st.progress(0.0, text="Embedding documents...")
+
+        def report_progress(done, total, docs_per_sec):
+            progress_bar.progress(done / total, text=f"Embedded {done:,}/{total:,} documents ({docs_per_sec:,.1f} docs/sec)")
+
+        chatbot = build_chatbot(df, df.attrs.get('dataset_name', 'dataset'), progress=report_progress)
+        progress_bar.empty()
+        return chatbot
+    return dataset_artifact(df, 'chatbot', build)
+
+def get_level_index(df):
+    """Sorted support/resistance levels shared by the chart and the chatbot, built once per dataset"""
+    return dataset_artifact(df, 'level_index', lambda: LevelIndex(df))
+
+def get_query_engine(df):
+    """Precompute the analytic indexes once per dataset"""
+    return dataset_artifact(df, 'query_engine', lambda: QueryEngine(df, get_level_index(df)))
+
+def get_range_index(df):
+    """Prefix sums and sparse tables for date-window metrics, built once per dataset"""
+    direction_col = next((col for col in ['direction', 'Direction', 'signal', 'Signal'] if col in df.columns), None)
+    return dataset_artifact(df, 'range_index', lambda: RangeIndex(df, direction_col))
+
+def get_quality_report(df):
+    """The cleaning-time quality report cached with the file, or one assessed once for split and merged symbols"""
+    return dataset_artifact(df, 'quality', lambda: df.attrs.get('quality') or assess_quality(df))
+
+def show_metrics(metrics):
+    col1, col2, col3, col4, col5 = st.columns(5)
+    col1.metric("Last Price", f"${metrics['current_price']:.2f}", f"{metrics['price_change']:.2f}%")
+    col2.metric("Highest / Lowest", f"${metrics['highest_price']:.2f}", f"low ${metrics['lowest_price']:.2f}", delta_color="off")
+    col3.metric("Avg Volume", f"{metrics['avg_volume']:.2f}M")
+    col4.metric("Signals", f"{metrics['total_trades']:,}", f"{metrics['long_trades']:,} LONG / {metrics['short_trades']:,} SHORT", delta_color="off")
+    col5.metric("VWAP", f"${metrics['vwap']:.2f}")
+
+def get_backtest(df, hold_bars, stop_pct, fee_bps, slippage_bps):
+    """Backtest once per dataset and parameter set"""
+    return dataset_artifact(df, ('backtest', hold_bars, stop_pct, fee_bps, slippage_bps),
+                            lambda: run_backtest(df, hold_bars=hold_bars, stop_pct=stop_pct, fee_bps=fee_bps, slippage_bps=slippage_bps))
+
+def parse_grid_values(text, cast):
+    """Comma-separated sweep values; 0 or 'none' means the rule is off"""
+    values = []
+    for item in text.split(','):
+        item = item.strip().lower()
+        if item:
+            values.append(None if item in ('0', 'none') else cast(item))
+    return values or [None]
+
+def show_backtest(df):
+    st.subheader("🧪 Signal Backtest")
+    if 'direction' not in df.columns:
+        st.warning("⚠️ No direction column to backtest")
+        return
+
+    col1, col2, col3, col4 = st.columns(4)
+    hold_bars = col1.number_input("Hold bars (0 = until opposite signal)", min_value=0, value=0)
+    stop_pct = col2.number_input("Stop distance %", min_value=0.0, value=0.0, step=0.5)
+    fee_bps = col3.number_input("Fee (bps)", min_value=0.0, value=BACKTEST_FEE_BPS)
+    slippage_bps = col4.number_input("Slippage (bps)", min_value=0.0, value=BACKTEST_SLIPPAGE_BPS)
+
+    result = get_backtest(df, hold_bars or None, stop_pct / 100 or None, fee_bps, slippage_bps)
+    stats = result.stats
+    col1, col2, col3, col4, col5 = st.columns(5)
+    col1.metric("Total Return", f"{stats['total_return_pct']:.2f}%")
+    col2.metric("Max Drawdown", f"{stats['max_drawdown_pct']:.2f}%")
+    col3.metric("Sharpe", f"{stats['sharpe']:.2f}")
+    col4.metric("Win Rate", f"{stats['win_rate_pct']:.1f}%", f"{stats['trades']:,.0f} trades", delta_color="off")
+    col5.metric("Costs", f"{stats['costs_pct']:.2f}%", f"{stats['stops']:,.0f} stops", delta_color="off")
+    create_equity_chart(df['time'].to_numpy(), result.equity, result.drawdown)
+
+    st.markdown("### Parameter Sweep")
+    col1, col2 = st.columns(2)
+    hold_values = col1.text_input("Hold bars to try", "0, 5, 10, 20, 50")
+    stop_values = col2.text_input("Stop distances % to try", "0, 1, 2, 5")
+    if st.button("▶️ Run sweep"):
+        grid = parameter_grid(
+            hold_bars=parse_grid_values(hold_values, int),
+            stop_pct=[value / 100 if value else None for value in parse_grid_values(stop_values, float)],
+            fee_bps=[fee_bps],
+            slippage_bps=[slippage_bps],
+        )
+        with st.spinner(f"Backtesting {len(grid)} parameter combinations..."):
+            results = run_sweep(df, grid)
+        st.dataframe(results)
+        st.caption(f"{len(grid)} combinations on {results.attrs['workers']} worker processes in {results.attrs['seconds']:.1f}s")
+
+def show_load_timings(timings):
+    with st.sidebar.expander("⏱️ Load timings"):
+        st.dataframe(timings)
+        busy = timings['seconds'].sum()
+        wall = timings.attrs['wall_seconds']
+        st.caption(f"{len(timings)} files on {timings.attrs['workers']} workers in {wall:.2f}s "
+                   f"({busy / wall if wall else 0:.1f}x parallel speedup)")
+
+def show_quality_report(report):
+    issues = quality_issues(report)
+    with st.sidebar.expander("🩺 Data quality" + (f" ({len(issues)} issues)" if issues else " ✅")):
+        for issue in issues:
+            st.warning(issue)
+        st.write(report)
+        st.caption(f"{report['rows']:,} bars at a {timedelta(seconds=report['interval_seconds'])} interval, "
+                   f"assessed in {report['seconds']:.2f}s")
+
+def comparison_overlays(store, symbol, peers, frame):
+    """Peer closes aligned to the chart bars and rebased to the selected symbol's first close"""
+    times = frame['time'].to_numpy()
+    base = frame['close'].iloc[0] if len(frame) else np.nan
+    overlays = []
+    for peer in peers:
+        values = store.align_to(times, peer)
+        valid = np.flatnonzero(~np.isnan(values))
+        if len(valid):
+            overlays.append((peer, 'overlay', {f"{peer} (rebased)": values * (base / values[valid[0]])}))
+    return overlays
+
+def show_performance_panel(run):
+    with st.sidebar.expander("⚡ Performance", expanded=True):
+        table = pd.DataFrame(records_as_dicts(run.records))
+        if table.empty:
+            st.write("No instrumented stages ran")
+            return
+        # Indent nested stages under the call that ran them
+        table['stage'] = table['depth'].map(lambda depth: '· ' * depth) + table['stage']
+        st.dataframe(table.drop(columns='depth').round({'wall_ms': 1, 'cpu_ms': 1}))
+        top_level = table[table['depth'] == 0]
+        st.caption(f"Instrumented stages: {top_level['wall_ms'].sum():,.0f} ms wall, {top_level['cpu_ms'].sum():,.0f} ms CPU")
+        st.download_button("⬇️ JSON lines", run_jsonl(run), file_name=f"stages-{run.id}.jsonl")
+        st.download_button("⬇️ Prometheus", prometheus_text(), file_name="tsla_stages.prom")
+
+def select_indicators():
+    """Sidebar indicator picker; returns {name: params}"""
+    selected = st.sidebar.multiselect("📐 Indicators", list(INDICATORS))
+    choices = {}
+    if selected:
+        with st.sidebar.expander("Indicator settings"):
+            for name in selected:
+                _, defaults, _ = INDICATORS[name]
+                choices[name] = {
+                    param: st.number_input(f"{name} {param}", value=default, min_value=type(default)(1), key=f"{name}-{param}")
+                    for param, default in defaults.items()
+                }
+    return choices
+
+def show_live():
+    """Follow a configured live feed: metrics and chart deltas refresh together over the Streamlit connection"""
+    if not LIVE_SOURCES:
+        st.info("📡 No live sources configured; set TSLA_LIVE_SOURCES")
+        return
+    kind, target = st.sidebar.selectbox("📡 Live source", LIVE_SOURCES, format_func=lambda source: f"{source[0]}: {source[1]}")
+
+    @st.fragment(run_every=LIVE_REFRESH_SECONDS)
+    def live_view():
+        try:
+            # Fetching the session each run also keeps it from being stopped as idle
+            session = get_live_session(kind, target)
+        except ValueError as e:
+            st.error(f"❌ {e}")
+            return
+        stats = session.stats()
+        if stats['error']:
+            st.error(f"❌ Live feed stopped: {stats['error']}")
+        with session.lock:
+            metrics = session.metrics.snapshot()
+        if metrics is None:
+            st.info("⏳ Waiting for the first bar...")
+        else:
+            show_metrics(metrics)
+            st.caption(f"{stats['bars']:,} bars ({stats['replaced']:,} revised, {stats['late']:,} late, {stats['rejected']:,} rejected) · "
+                       f"{stats['bars_per_sec']:,.0f} bars/s · update latency p50 {stats['latency_p50_ms']} ms, p99 {stats['latency_p99_ms']} ms")
+        render_live_chart(session, list(session.placement.items()))
+
+    live_view()
+
 def main():
     st.markdown('<h1 class="main-header">📊 Tesla Trading Dashboard</h1>', unsafe_allow_html=True)
 
-    menu = st.sidebar.radio("📌 Select Section", ["📈 Dashboard", "🤖 Chatbot"])
+    menu = st.sidebar.radio("📌 Select Section", ["📈 Dashboard", "🧪 Backtest", "🤖 Chatbot", "📡 Live"])
 
-    uploaded_file = st.sidebar.file_uploader("Upload Tesla CSV", type=['csv'])
+    uploaded_files = st.sidebar.file_uploader("Upload Tesla CSV", type=['csv'], accept_multiple_files=True)
     show_volume = st.sidebar.checkbox("Show Volume", value=True)
     show_signals = st.sidebar.checkbox("Show Trading Signals", value=True)
     show_support_resistance = st.sidebar.checkbox("Show Support/Resistance", value=True)
+    compact_charts = st.sidebar.checkbox("Compact chart payload", value=CHART_COMPACT_PAYLOAD,
+                                         help="Send chart series as typed arrays instead of per-bar JSON objects")
+
+    if menu == "📡 Live":
+        show_live()
+        return
 
-    if uploaded_file is None:
+    if not uploaded_files:
         st.warning("📂 Please upload a Tesla CSV file to begin analysis")
         return
 
-    df = load_tesla_data_from_csv(uploaded_file)
-    if df is None:
+    uploads_key, store, timings = load_symbol_store(uploaded_files)
+    if store is None:
         st.error("❌ Failed to load or clean the data.")
         return
+    hold_dataset(uploads_key)
+    if timings is not None:
+        show_load_timings(timings)
+    symbol = st.sidebar.selectbox("🏷️ Symbol", store.symbols) if len(store) > 1 else store.symbols[0]
+    df = store[symbol]
+    show_quality_report(get_quality_report(df))
 
     if menu == "📈 Dashboard":
-        metrics = calculate_metrics(df)
-        create_lightweight_chart(df, show_volume, show_signals, show_support_resistance)
-        create_additional_charts(df)
+        timestamps = bar_timestamps(df)
+        first_day, last_day = timestamps.iloc[0].date(), timestamps.iloc[-1].date()
+        date_range = st.sidebar.date_input("📅 Date range", value=(first_day, last_day), min_value=first_day, max_value=last_day)
+        # While a range is being picked the widget returns only the start date
+        start_day, end_day = (date_range[0], date_range[-1]) if date_range else (first_day, last_day)
+        start, end = date_to_unix_seconds(start_day), date_to_unix_seconds(end_day + timedelta(days=1))
+
+        range_index = get_range_index(df)
+        lo, hi = window_bounds(df, start, end)
+        metrics = range_index.window_metrics(lo, hi)
+        if metrics is None:
+            st.warning("📅 No bars in the selected date range")
+            return
+
+        pyramid = load_ohlcv_pyramid(df)
+        timeframe = st.sidebar.selectbox("⏱️ Timeframe", ["Auto"] + list(pyramid))
+        if timeframe == "Auto":
+            timeframe = select_pyramid_level(pyramid, MAX_CHART_BARS, start, end)
+        chart_frame = pyramid[timeframe]
+        chart_lo, chart_hi = window_bounds(chart_frame, start, end)
+        st.sidebar.caption(f"Chart timeframe: {timeframe} ({chart_hi - chart_lo:,} bars)")
+
+        # Indicators run over the whole level (so warm-up bars are real) and are cached
+        # per (dataset, timeframe, parameters); changing the date range only re-slices them
+        indicator_cache = get_indicator_cache()
+        dataset_key = df.attrs.get('dataset_key')
+        indicators = []
+        for name, params in select_indicators().items():
+            lines = indicator_cache.compute(chart_frame, (dataset_key, timeframe), name, **params)
+            indicators.append((name, INDICATORS[name][2], {label: values[chart_lo:chart_hi] for label, values in lines.items()}))
+        peers = st.sidebar.multiselect("🔀 Compare with", [peer for peer in store.symbols if peer != symbol]) if len(store) > 1 else []
+        indicators += comparison_overlays(store, symbol, peers, chart_frame.iloc[chart_lo:chart_hi])
+        volume_ma, = indicator_cache.compute(df, (dataset_key, 'native'), 'Volume MA', window=20).values()
+
+        show_metrics(metrics)
+        # iloc row slices are views, so windowing copies no data
+        levels = get_level_index(df) if show_support_resistance else None
+        create_lightweight_chart(chart_frame.iloc[chart_lo:chart_hi], show_volume, show_signals, show_support_resistance, indicators, levels,
+                                 compact_charts, (dataset_key, timeframe, chart_lo, chart_hi))
+        create_additional_charts(df.iloc[lo:hi], volume_ma[lo:hi])
+
+    elif menu == "🧪 Backtest":
+        show_backtest(df)
 
     elif menu == "🤖 Chatbot":
         st.subheader("🤖 Ask Questions About Tesla Stock Data")
@@ -44,15 +303,49 @@ def main():
             st.write("- How many LONG signal days in 2023?")
             st.write("- What was the average volume in January?")
             st.write("- What is the highest resistance level?")
+            st.write("- What is the nearest support below the current price?")
 
         with col2:
             question = st.text_input("🔍 Ask a question:", "What is the highest resistance level?")
             if question:
+                started = time.perf_counter()
+                cached = None
                 with st.spinner("Thinking..."):
-                    chatbot = build_chatbot(df)
-                    response = chatbot.invoke({"query": question})
-                    st.success("Answer:")
-                    st.write(response["result"])
+                    with stage('query_engine'):
+                        answer = get_query_engine(df).answer(question)
+                    if answer is None:
+                        dataset_key = df.attrs.get('dataset_key')
+                        answer_cache = get_answer_cache()
+                        with stage('answer_cache') as timed:
+                            cached = answer_cache.lookup(dataset_key, question)
+                            timed.cache = 'hit' if cached is not None else 'miss'
+                        chatbot = get_chatbot(df) if cached is None else None
+                st.success("Answer:")
+                if answer is not None:
+                    st.write(answer.text)
+                    path = "analytic query engine"
+                elif cached is not None:
+                    st.write(cached.text)
+                    path = "answer cache" if cached.similarity >= 1 else f"answer cache ({cached.similarity:.0%} match to \"{cached.question}\")"
+                else:
+                    # Tokens are shown as Gemini produces them; the full answer is cached once the stream ends
+                    with stage('llm_call') as timed:
+                        result = st.write_stream(stream_and_store(answer_cache, dataset_key, question, chatbot.stream(question)))
+                        timed.bytes = len(result.encode())
+                    path = "LLM retrieval"
+                st.caption(f"Served by {path} in {(time.perf_counter() - started) * 1000:.0f} ms")
+                if answer is None:
+                    stats = answer_cache.stats()
+                    st.caption(f"Answer cache: {stats['hit_rate']:.0%} hit rate over {stats['hits'] + stats['misses']:,} questions · "
+                               f"time to first token p50 {stats['first_token_p50_ms']} ms, p95 {stats['first_token_p95_ms']} ms")
 
 if __name__ == "__main__":
-    main()
+    # The checkbox is drawn after main() so it sits at the bottom of the sidebar; its state drives this rerun
+    begin_run(st.session_state.get("show_performance", PROFILING_ENABLED))
+    try:
+        main()
+    finally:
+        run = end_run()
+    st.sidebar.checkbox("⚡ Performance panel", value=PROFILING_ENABLED, key="show_performance")
+    if run is not None:
+        show_performance_panel(run)
@@ -0,0 +1,122 @@
+from dataclasses import dataclass, field
+
+import numpy as np
+from config.constants import BACKTEST_FEE_BPS, BACKTEST_SLIPPAGE_BPS
+
+SECONDS_PER_YEAR = 365.25 * 86400
+
+@dataclass
+class BacktestResult:
+    equity: np.ndarray
+    drawdown: np.ndarray
+    holdings: np.ndarray
+    stats: dict
+    params: dict = field(default_factory=dict)
+
+def signal_array(direction):
+    """+1 for LONG, -1 for SHORT and 0 for anything else, as int8"""
+    upper = direction.astype(str).str.upper().to_numpy()
+    return np.select([upper == 'LONG', upper == 'SHORT'], [1, -1], 0).astype(np.int8)
+
+def last_signal_index(signal):
+    """Index of the most recent LONG/SHORT bar at or before each bar, -1 before the first"""
+    return np.maximum.accumulate(np.where(signal != 0, np.arange(len(signal)), -1))
+
+def periods_per_year(times):
+    """Bars per year observed in the data, for annualising the Sharpe ratio"""
+    span = (times[-1] - times[0]) / SECONDS_PER_YEAR if len(times) > 1 else 0
+    return len(times) / span if span > 0 else 252.0
+
+def backtest_arrays(open_, high, low, close, signal, last_index, hold_bars=None, stop_pct=None,
+                    fee_bps=BACKTEST_FEE_BPS, slippage_bps=BACKTEST_SLIPPAGE_BPS, bars_per_year=252.0):
+    """Backtest direction signals with array operations only.
+
+    A signal on bar i takes a position at that bar's close. It is held until
+    the opposite signal, or for `hold_bars` bars when set, and closed early
+    when an intrabar move reaches `stop_pct` against the entry close; gaps
+    through the stop fill at the open. Fees and slippage are charged in
+    basis points per unit of position traded.
+    """
+    n = len(close)
+    bars = np.arange(n)
+    entry = np.maximum(last_index, 0)
+    position = np.where(last_index >= 0, signal[entry], 0).astype(np.int8)
+    if hold_bars:
+        position[bars - last_index >= hold_bars] = 0
+
+    previous_close = np.concatenate(([np.nan], close[:-1]))
+    previous_position = np.concatenate(([0], position[:-1]))
+    exit_price = close.copy()
+    stopped = first_hit = np.zeros(n, dtype=bool)
+    if stop_pct:
+        # Stop level of the trade held into each bar, from that trade's entry close
+        trade = np.concatenate(([-1], last_index[:-1]))
+        level = close[np.maximum(trade, 0)] * (1 - previous_position * stop_pct)
+        hit = ((previous_position > 0) & (low <= level)) | ((previous_position < 0) & (high >= level))
+        # Only the first hit of each trade counts: count hits since the trade started
+        hits = np.cumsum(hit)
+        starts = np.flatnonzero(np.diff(trade, prepend=-2))
+        before = np.repeat(hits[starts] - hit[starts], np.diff(np.append(starts, n)))
+        stopped_through = hits - before > 0
+        first_hit = hit & (hits - before == 1)
+        fill = np.where(previous_position > 0, np.minimum(level, open_), np.maximum(level, open_))
+        exit_price = np.where(first_hit, fill, close)
+        # Stay flat after the stop until the next signal starts a new trade
+        stopped = stopped_through & (last_index == trade)
+        position[stopped] = 0
+        previous_position = np.concatenate(([0], position[:-1]))
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        net = np.where(previous_position != 0, previous_position * (exit_price / previous_close - 1), 0.0)
+    cost = np.abs(np.diff(position, prepend=0)).astype(np.float64)
+    cost *= (fee_bps + slippage_bps) / 10_000
+    net -= cost
+    equity = np.cumprod(net + 1)
+    drawdown = np.maximum.accumulate(equity)
+    np.divide(equity, drawdown, out=drawdown)
+    drawdown -= 1
+
+    # Attribute each bar's return to the trade that was open into it, else the one opened on it.
+    # Trade ids never decrease, so each change starts the next trade
+    trade_id = np.where(previous_position != 0, np.concatenate(([-1], last_index[:-1])),
+                        np.where(position != 0, last_index, -1))
+    in_trade = trade_id >= 0
+    trade_id = trade_id[in_trade]
+    trade_codes = np.cumsum(np.diff(trade_id, prepend=-1) != 0) - 1
+    trade_returns = np.expm1(np.bincount(trade_codes, weights=np.log1p(net[in_trade])))
+
+    volatility = net.std()
+    stats = {
+        'total_return_pct': (equity[-1] - 1) * 100 if n else 0.0,
+        'max_drawdown_pct': drawdown.min() * 100 if n else 0.0,
+        'sharpe': net.mean() / volatility * np.sqrt(bars_per_year) if volatility > 0 else 0.0,
+        'trades': len(trade_returns),
+        'win_rate_pct': (trade_returns > 0).mean() * 100 if len(trade_returns) else 0.0,
+        'exposure_pct': (position != 0).mean() * 100 if n else 0.0,
+        'costs_pct': cost.sum() * 100,
+        'stops': first_hit.sum(),
+    }
+    return equity, drawdown, position, {key: float(value) for key, value in stats.items()}
+
+def run_backtest(df, direction_col='direction', hold_bars=None, stop_pct=None,
+                 fee_bps=BACKTEST_FEE_BPS, slippage_bps=BACKTEST_SLIPPAGE_BPS):
+    """Backtest the direction column of a cleaned frame"""
+    arrays = backtest_inputs(df, direction_col)
+    bars_per_year = periods_per_year(df['time'].to_numpy())
+    equity, drawdown, holdings, stats = backtest_arrays(
+        **arrays, hold_bars=hold_bars, stop_pct=stop_pct, fee_bps=fee_bps, slippage_bps=slippage_bps, bars_per_year=bars_per_year
+    )
+    params = {'hold_bars': hold_bars, 'stop_pct': stop_pct, 'fee_bps': fee_bps, 'slippage_bps': slippage_bps}
+    return BacktestResult(equity, drawdown, holdings, stats, params)
+
+def backtest_inputs(df, direction_col='direction'):
+    """Price and signal arrays backtest_arrays needs, computed once per frame"""
+    signal = signal_array(df[direction_col]) if direction_col in df.columns else np.zeros(len(df), dtype=np.int8)
+    return {
+        'open_': df['open'].to_numpy(dtype=np.float64),
+        'high': df['high'].to_numpy(dtype=np.float64),
+        'low': df['low'].to_numpy(dtype=np.float64),
+        'close': df['close'].to_numpy(dtype=np.float64),
+        'signal': signal,
+        'last_index': last_signal_index(signal),
+    }
@@ -0,0 +1,81 @@
+import itertools
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+from backtest.backtest import backtest_arrays, backtest_inputs, periods_per_year
+from config.constants import BACKTEST_MAX_WORKERS
+
+ALIGNMENT = 64
+
+# Set in each worker by _attach; views over the parent's shared memory block
+_shared = {}
+
+def share_arrays(arrays):
+    """Copy arrays into one shared memory block; returns (block, layout) for attach_arrays"""
+    layout, offset = {}, 0
+    for name, values in arrays.items():
+        layout[name] = (offset, values.shape, values.dtype.str)
+        offset += -(-values.nbytes // ALIGNMENT) * ALIGNMENT
+    block = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    try:
+        for name, values in arrays.items():
+            attach_arrays(block, {name: layout[name]})[name][...] = values
+    except BaseException:
+        block.close()
+        block.unlink()
+        raise
+    return block, layout
+
+def attach_arrays(block, layout):
+    """Read-only NumPy views over a shared memory block, without copying"""
+    arrays = {}
+    for name, (offset, shape, dtype) in layout.items():
+        arrays[name] = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf, offset=offset)
+    return arrays
+
+def _attach(name, layout):
+    block = shared_memory.SharedMemory(name=name)
+    _shared['block'] = block
+    _shared['arrays'] = attach_arrays(block, layout)
+    for values in _shared['arrays'].values():
+        values.flags.writeable = False
+
+def _run(params):
+    _, _, _, stats = backtest_arrays(**_shared['arrays'], **params)
+    return {**params, **stats}
+
+def parameter_grid(**values):
+    """Every combination of the given parameter lists, as dicts"""
+    names = list(values)
+    return [dict(zip(names, combination)) for combination in itertools.product(*values.values())]
+
+def run_sweep(df, grid, direction_col='direction', max_workers=BACKTEST_MAX_WORKERS):
+    """Backtest every parameter dict in `grid` across a process pool.
+
+    Price and signal arrays are written once to shared memory and mapped by
+    each worker, so only the small parameter dicts and result rows cross
+    process boundaries. Returns a DataFrame with one row per combination.
+    """
+    bars_per_year = periods_per_year(df['time'].to_numpy())
+    grid = [{**params, 'bars_per_year': bars_per_year} for params in grid]
+    inputs = backtest_inputs(df, direction_col)
+    started = time.perf_counter()
+    workers = min(max_workers or os.cpu_count() or 1, len(grid)) or 1
+    block, layout = share_arrays(inputs)
+    try:
+        # Spawned workers start clean instead of forking a parent that may hold threads and locks (Streamlit's)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_attach, initargs=(block.name, layout)) as executor:
+            rows = list(executor.map(_run, grid, chunksize=max(1, len(grid) // (workers * 4))))
+    finally:
+        block.close()
+        block.unlink()
+    results = pd.DataFrame(rows).drop(columns='bars_per_year')
+    results.attrs['seconds'] = time.perf_counter() - started
+    results.attrs['workers'] = workers
+    return results.sort_values('sharpe', ascending=False, ignore_index=True)
@@ -0,0 +1,199 @@
+import argparse
+import gc
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from benchmarks.synthetic import dataset_path, write_synthetic_csv
+from charts.payload import build_chart_payload, build_compact_payload, build_signal_markers, build_time_axis
+from config.constants import DATA_CACHE_DIR, MAX_CHART_BARS, STREAMING_CHUNK_ROWS, STREAMING_THRESHOLD_BYTES
+from data.cache import DatasetCache
+from data.cleaning import CLEANER_VERSION, clean_ohlcv_frame
+from data.ingest import stream_clean_csv
+from data.quality import assess_quality
+from data.resample import build_ohlcv_pyramid, select_pyramid_level
+from utils.level_index import LevelIndex
+from utils.metrics import calculate_metrics
+
+DEFAULT_DATA_DIR = os.path.join(DATA_CACHE_DIR, 'benchmarks')
+
+def load_cold(ctx):
+    """The uncached path of load_tesla_data_from_csv: clean (streamed above the threshold) and store"""
+    data = ctx['data']
+    if len(data) > STREAMING_THRESHOLD_BYTES:
+        cleaned, _ = stream_clean_csv(io.BytesIO(data), chunksize=STREAMING_CHUNK_ROWS)
+    else:
+        cleaned = clean_ohlcv_frame(pd.read_csv(io.BytesIO(data)))
+    ctx['cache'].put(ctx['cache'].key(data, CLEANER_VERSION), cleaned)
+    return cleaned
+
+def load_warm(ctx):
+    """The cached path of load_tesla_data_from_csv: hash the upload and map the cleaned columns"""
+    cache = ctx['cache']
+    return cache.get(cache.key(ctx['data'], CLEANER_VERSION))
+
+def build_documents(ctx):
+    from chatbot.documents import build_window_documents
+    return build_window_documents(ctx['cleaned'])
+
+def end_to_end(ctx):
+    """Upload bytes to everything the dashboard and chatbot need on first load"""
+    from chatbot.documents import build_window_documents
+    cleaned = clean_ohlcv_frame(pd.read_csv(io.BytesIO(ctx['data'])))
+    pyramid = build_ohlcv_pyramid(cleaned)
+    level = pyramid[select_pyramid_level(pyramid, MAX_CHART_BARS)]
+    build_chart_payload(level)
+    build_signal_markers(level, 'direction')
+    calculate_metrics(cleaned)
+    return build_window_documents(cleaned)
+
+# Stage name -> function of the shared context; inputs are prepared before timing starts
+STAGES = {
+    'read_csv': lambda ctx: pd.read_csv(io.BytesIO(ctx['data'])),
+    'clean': lambda ctx: clean_ohlcv_frame(ctx['raw']),
+    'stream_clean': lambda ctx: stream_clean_csv(io.BytesIO(ctx['data']), chunksize=STREAMING_CHUNK_ROWS),
+    'load_cold': load_cold,
+    'load_warm': load_warm,
+    'pyramid': lambda ctx: build_ohlcv_pyramid(ctx['cleaned']),
+    'chart_payload': lambda ctx: build_chart_payload(ctx['cleaned']),
+    'chart_json': lambda ctx: json.dumps(build_chart_payload(ctx['cleaned'])),
+    'chart_compact_json': lambda ctx: json.dumps({'axis': build_time_axis(ctx['cleaned']), **build_compact_payload(ctx['cleaned'])}),
+    'signal_markers': lambda ctx: build_signal_markers(ctx['cleaned'], 'direction'),
+    'metrics': lambda ctx: calculate_metrics(ctx['cleaned']),
+    'level_index': lambda ctx: LevelIndex(ctx['cleaned']),
+    'quality': lambda ctx: assess_quality(ctx['cleaned']),
+    'documents': build_documents,
+    'end_to_end': end_to_end,
+}
+
+def measure(stage, ctx, repeat=3, memory=True):
+    """Best wall time over `repeat` runs, plus peak traced allocations from one extra run"""
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        STAGES[stage](ctx)
+        timings.append(time.perf_counter() - started)
+    result = {'seconds': round(min(timings), 6)}
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        STAGES[stage](ctx)
+        result['peak_mb'] = round(tracemalloc.get_traced_memory()[1] / 1024 ** 2, 3)
+        tracemalloc.stop()
+    return result
+
+def run_suite(sizes, stages=STAGES, data_dir=DEFAULT_DATA_DIR, repeat=3, memory=True, seed=0, log=print):
+    """Benchmark every stage at every size; returns {'meta': ..., 'results': {rows: {stage: measurement}}}"""
+    results = {}
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for rows in sizes:
+            path = write_synthetic_csv(dataset_path(data_dir, rows, seed), rows, seed)
+            data = path.read_bytes()
+            raw = pd.read_csv(io.BytesIO(data))
+            ctx = {'data': data, 'raw': raw, 'cleaned': clean_ohlcv_frame(raw),
+                   'cache': DatasetCache(Path(cache_dir) / str(rows), max_bytes=2 ** 62)}
+            load_cold(ctx)
+            results[str(rows)] = {}
+            for stage in stages:
+                results[str(rows)][stage] = measurement = measure(stage, ctx, repeat, memory)
+                log(f"{rows:>12,} {stage:<16} {measurement['seconds']:>10.4f}s"
+                    + (f" {measurement['peak_mb']:>10.1f} MB" if memory else ''))
+    meta = {
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'repeat': repeat,
+        'seed': seed,
+    }
+    return {'meta': meta, 'results': results}
+
+def compare(current, baseline, time_threshold=0.25, memory_threshold=0.25, stage_thresholds=None, min_seconds=0.01):
+    """List stage/size pairs slower or hungrier than baseline by more than the allowed fraction.
+
+    Timings below `min_seconds` in both runs are ignored as noise.
+    """
+    stage_thresholds = stage_thresholds or {}
+    regressions = []
+    for rows, stages in current['results'].items():
+        for stage, measurement in stages.items():
+            reference = baseline.get('results', {}).get(rows, {}).get(stage)
+            if not reference:
+                continue
+            allowed_time = stage_thresholds.get(stage, time_threshold)
+            checks = [('seconds', allowed_time)]
+            if 'peak_mb' in measurement and 'peak_mb' in reference:
+                checks.append(('peak_mb', memory_threshold))
+            for metric, allowed in checks:
+                before, after = reference[metric], measurement[metric]
+                if metric == 'seconds' and max(before, after) < min_seconds:
+                    continue
+                change = after / before - 1 if before else 0.0
+                if change > allowed:
+                    regressions.append({'rows': rows, 'stage': stage, 'metric': metric, 'baseline': before,
+                                        'current': after, 'change_pct': round(change * 100, 1)})
+    return regressions
+
+def parse_stage_thresholds(items):
+    """['clean=0.5', ...] -> {'clean': 0.5}"""
+    thresholds = {}
+    for item in items or []:
+        stage, _, value = item.partition('=')
+        if stage not in STAGES or not value:
+            raise argparse.ArgumentTypeError(f'expected STAGE=FRACTION with a known stage, got {item!r}')
+        thresholds[stage] = float(value)
+    return thresholds
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark each pipeline stage on synthetic TSLA data.')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 1_000_000],
+                        help='dataset sizes, e.g. 10000 1000000 10000000')
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES), default=list(STAGES))
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR, help='where generated CSVs are kept between runs')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--no-memory', action='store_true', help='skip the traced peak-memory run')
+    parser.add_argument('--output', help='write results JSON here instead of stdout')
+    parser.add_argument('--baseline', help='results JSON to compare against')
+    parser.add_argument('--save-baseline', help='also write the results as a new baseline')
+    parser.add_argument('--time-threshold', type=float, default=0.25, help='allowed slowdown as a fraction (0.25 = 25%%)')
+    parser.add_argument('--memory-threshold', type=float, default=0.25, help='allowed peak-memory growth as a fraction')
+    parser.add_argument('--stage-threshold', action='append', metavar='STAGE=FRACTION',
+                        help='per-stage time threshold, repeatable')
+    parser.add_argument('--min-seconds', type=float, default=0.01, help='ignore timings faster than this')
+    args = parser.parse_args(argv)
+    stage_thresholds = parse_stage_thresholds(args.stage_threshold)
+
+    report = run_suite(args.rows, args.stages, args.data_dir, args.repeat, not args.no_memory,
+                       log=lambda line: print(line, file=sys.stderr))
+    regressions = []
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        regressions = compare(report, baseline, args.time_threshold, args.memory_threshold, stage_thresholds, args.min_seconds)
+        report['regressions'] = regressions
+        for regression in regressions:
+            print(f"REGRESSION {regression['stage']} @ {regression['rows']} rows: {regression['metric']} "
+                  f"{regression['baseline']} -> {regression['current']} (+{regression['change_pct']}%)", file=sys.stderr)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text)
+    else:
+        print(text)
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(text)
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
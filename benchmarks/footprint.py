@@ -0,0 +1,61 @@
+import argparse
+import json
+import sys
+
+from benchmarks.synthetic import generate_ohlcv
+from data.cleaning import clean_rows
+
+def column_bytes(df):
+    """Resident bytes and dtype of each column, counting the Python objects inside object columns"""
+    usage = df.memory_usage(index=False, deep=True)
+    return {col: (int(usage[col]), str(df[col].dtype)) for col in df.columns}
+
+def footprint(rows, price_dtype='float64', chunk_rows=1_000_000, seed=0):
+    """Per-column bytes of the full and compact cleaned schemas for `rows` synthetic bars.
+
+    Rows are generated and cleaned `chunk_rows` at a time (each chunk with
+    its own seed) and the column sizes summed, so neither the raw rows nor
+    the full-schema frame ever have to fit in memory at once.
+    """
+    totals = {}
+    for number, start in enumerate(range(0, rows, chunk_rows)):
+        chunk = generate_ohlcv(min(chunk_rows, rows - start), seed + number, duplicate_rate=0.0)
+        for schema, compact in (('before', False), ('after', True)):
+            cleaned, _ = clean_rows(chunk.copy(), 'timestamp', '%Y-%m-%d %H:%M:%S', compact=compact, price_dtype=price_dtype)
+            for col, (size, dtype) in column_bytes(cleaned).items():
+                entry = totals.setdefault(col, {'before_bytes': 0, 'after_bytes': 0, 'before_dtype': None, 'after_dtype': None})
+                entry[f'{schema}_bytes'] += size
+                entry[f'{schema}_dtype'] = dtype
+    before = sum(entry['before_bytes'] for entry in totals.values())
+    after = sum(entry['after_bytes'] for entry in totals.values())
+    return {
+        'rows': rows,
+        'price_dtype': price_dtype,
+        'columns': totals,
+        'before_bytes': before,
+        'after_bytes': after,
+        'before_bytes_per_row': round(before / rows, 1),
+        'after_bytes_per_row': round(after / rows, 1),
+        'saved_pct': round((1 - after / before) * 100, 1) if before else 0.0,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Report per-column memory of the cleaned frame before and after the compact schema.')
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    parser.add_argument('--price-dtype', choices=['float64', 'float32'], default='float64')
+    parser.add_argument('--chunk-rows', type=int, default=1_000_000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    report = footprint(args.rows, args.price_dtype, args.chunk_rows, args.seed)
+    print(f"{'column':<18} {'before':>12} {'after':>12}  dtype", file=sys.stderr)
+    for col, entry in report['columns'].items():
+        print(f"{col:<18} {entry['before_bytes'] / 1024 ** 2:>9.1f} MB {entry['after_bytes'] / 1024 ** 2:>9.1f} MB  "
+              f"{entry['before_dtype']} -> {entry['after_dtype'] or 'dropped'}", file=sys.stderr)
+    print(f"{'total':<18} {report['before_bytes'] / 1024 ** 2:>9.1f} MB {report['after_bytes'] / 1024 ** 2:>9.1f} MB  "
+          f"({report['saved_pct']}% smaller)", file=sys.stderr)
+    print(json.dumps(report, indent=2))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
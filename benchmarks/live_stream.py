@@ -0,0 +1,95 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.synthetic import dataset_path, write_synthetic_csv
+from charts.live_feed import build_live_delta
+from config.constants import DATA_CACHE_DIR
+from data.live import CsvTailSource, LiveSession, SocketSource
+from data.replay_server import start_replay_server
+
+DEFAULT_DATA_DIR = os.path.join(DATA_CACHE_DIR, 'benchmarks')
+
+def append_rows(path, source_path, rate, batch_rows):
+    """Copy `source_path` into `path` `batch_rows` lines at a time, paced at `rate` rows per second (0 for no pacing)"""
+    with open(source_path, 'rb') as handle:
+        header, *rows = handle.readlines()
+    started = time.perf_counter()
+    with open(path, 'ab') as out:
+        out.write(header)
+        for start in range(0, len(rows), batch_rows):
+            if rate:
+                delay = started + start / rate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            out.write(b''.join(rows[start:start + batch_rows]))
+            out.flush()
+    return len(rows)
+
+def delta_ms(session, repeat=20):
+    """Best time to build the chart delta for the newest bar only"""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        build_live_delta(session, session.seq - 1)
+        times.append(time.perf_counter() - started)
+    return round(min(times) * 1000, 3)
+
+def run(kind, path, rate, batch_rows, poll_seconds, timeout):
+    with open(path, 'rb') as handle:
+        rows = sum(1 for _ in handle) - 1
+    if kind == 'socket':
+        server, address = start_replay_server(path, rate=rate, batch_rows=batch_rows)
+        host, _, port = address.rpartition(':')
+        session = LiveSession(SocketSource(host, int(port)), poll_seconds=poll_seconds).start()
+        # The session ends by itself once the replay closes the connection
+        session.join(timeout)
+        server.shutdown()
+    else:
+        directory = tempfile.mkdtemp()
+        tail_path = os.path.join(directory, 'live.csv')
+        open(tail_path, 'wb').close()
+        source = CsvTailSource(tail_path)
+        session = LiveSession(source, poll_seconds=poll_seconds).start()
+        writer = threading.Thread(target=append_rows, args=(tail_path, path, rate, batch_rows), daemon=True)
+        writer.start()
+        writer.join(timeout)
+        deadline = time.perf_counter() + timeout
+        while source.pending_bytes() and time.perf_counter() < deadline:
+            time.sleep(0.05)
+        # Let the last read batch finish applying
+        time.sleep(max(0.1, 2 * poll_seconds))
+        session.stop()
+        session.join(timeout)
+    return {'source': kind, 'rows': rows, 'rate': rate, 'batch_rows': batch_rows, **session.stats(),
+            'delta_ms': delta_ms(session)}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure sustained live-stream throughput and update latency per source.')
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--sources', nargs='+', choices=['socket', 'csv'], default=['socket', 'csv'])
+    parser.add_argument('--rate', type=float, default=0, help='rows per second offered by the feed; 0 is unthrottled')
+    parser.add_argument('--batch-rows', type=int, default=1, help='rows the feed writes at a time')
+    parser.add_argument('--poll-seconds', type=float, default=0.01)
+    parser.add_argument('--timeout', type=float, default=300)
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    path = write_synthetic_csv(dataset_path(args.data_dir, args.rows, args.seed), args.rows, args.seed)
+    reports = []
+    for kind in args.sources:
+        report = run(kind, path, args.rate, args.batch_rows, args.poll_seconds, args.timeout)
+        reports.append(report)
+        print(f"{kind:<7} {report['bars']:>10,} bars  {report['bars_per_sec']:>10,.0f} bars/s  "
+              f"p50 {report['latency_p50_ms']} ms  p99 {report['latency_p99_ms']} ms  delta {report['delta_ms']} ms",
+              file=sys.stderr)
+    print(json.dumps(reports, indent=2))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
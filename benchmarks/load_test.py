@@ -0,0 +1,146 @@
+import argparse
+import json
+import os
+import pickle
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from benchmarks.synthetic import dataset_path, write_synthetic_csv
+from chatbot.query_engine import QueryEngine
+from charts.payload import build_chart_payload
+from config.constants import DATA_CACHE_DIR, MAX_CHART_BARS
+from data.cache import DatasetCache
+from data.ingest import load_csv_bytes
+from data.multi_loader import build_symbol_store, uploads_key
+from data.registry import DATASET, DatasetRegistry, freeze_frame
+from data.resample import build_ohlcv_pyramid, select_pyramid_level, window_bounds
+from utils.level_index import LevelIndex
+from utils.range_index import RangeIndex
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_DATA_DIR = os.path.join(DATA_CACHE_DIR, 'benchmarks')
+QUESTIONS = ['What was the average volume in 2016?', 'What is the nearest support below the current price?']
+
+def current_rss_mb():
+    """Resident set size now (Linux), falling back to the peak elsewhere"""
+    try:
+        with open('/proc/self/statm') as handle:
+            return int(handle.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+    except OSError:
+        return peak_rss_mb()
+
+def peak_rss_mb():
+    scale = 1024 ** 2 if sys.platform == 'darwin' else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+def session_artifacts(df, memo):
+    """What one dashboard session derives from its frame; `memo(name, build)` decides whether it is shared"""
+    pyramid = memo('pyramid', lambda: {label: freeze_frame(frame) for label, frame in build_ohlcv_pyramid(df).items()})
+    timeframe = select_pyramid_level(pyramid, MAX_CHART_BARS)
+    lo, hi = window_bounds(pyramid[timeframe])
+    levels = memo('level_index', lambda: LevelIndex(df))
+    engine = memo('query_engine', lambda: QueryEngine(df, levels))
+    for question in QUESTIONS:
+        engine.answer(question)
+    return {
+        'pyramid': pyramid,
+        'range_index': memo('range_index', lambda: RangeIndex(df, 'direction')),
+        'query_engine': engine,
+        'chart_payload': memo(('chart_payload', timeframe, lo, hi), lambda: build_chart_payload(pyramid[timeframe].iloc[lo:hi])),
+    }
+
+def shared_session(registry, files, cache):
+    """A session on the registry: every session holds the same read-only frame and artifacts"""
+    key = uploads_key(files)
+
+    def load():
+        (name, data), = files
+        cleaned, info = load_csv_bytes(data, cache)
+        cleaned.attrs.update(dataset_key=info['key'], dataset_name=name)
+        return build_symbol_store([(name, info['key'], cleaned)]), None
+
+    store, _ = registry.get_or_build(key, DATASET, load)
+    lease = registry.acquire(key)
+    df = store[store.symbols[0]]
+    dataset_key = df.attrs['dataset_key']
+    artifacts = session_artifacts(df, lambda name, build: registry.get_or_build(dataset_key, name, build))
+    return {'lease': lease, 'df': df, **artifacts}
+
+def copied_session(shared_df):
+    """A session holding its own unpickled copy, as st.cache_data hands out, with its own artifacts"""
+    df = pickle.loads(pickle.dumps(shared_df))
+    return {'df': df, **session_artifacts(df, lambda name, build: build())}
+
+def run(mode, sessions, rows, data_dir, seed):
+    path = write_synthetic_csv(dataset_path(data_dir, rows, seed), rows, seed)
+    files = [(path.name, path.read_bytes())]
+    registry = DatasetRegistry(max_bytes=2 ** 62)
+    held = [None] * sessions
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = DatasetCache(cache_dir, max_bytes=2 ** 62)
+        if mode == 'copies':
+            cleaned, _ = load_csv_bytes(files[0][1], cache)
+            shared_df = freeze_frame(cleaned)
+        baseline_mb = current_rss_mb()
+        started = time.perf_counter()
+
+        def session(index):
+            held[index] = shared_session(registry, files, cache) if mode == 'shared' else copied_session(shared_df)
+
+        threads = [threading.Thread(target=session, args=(index,)) for index in range(sessions)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - started
+        # Every session is still alive here, so this is the steady-state footprint
+        report = {
+            'mode': mode,
+            'sessions': sessions,
+            'rows': rows,
+            'wall_seconds': round(wall, 3),
+            'baseline_rss_mb': round(baseline_mb, 1),
+            'rss_mb': round(current_rss_mb(), 1),
+            'peak_rss_mb': round(peak_rss_mb(), 1),
+        }
+        report['per_session_mb'] = round((report['rss_mb'] - baseline_mb) / sessions, 2)
+        if mode == 'shared':
+            report['registry'] = registry.stats()
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Simulate concurrent dashboard sessions on one dataset and report resident memory.')
+    parser.add_argument('--sessions', type=int, default=20)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--mode', choices=['shared', 'copies', 'both'], default='both',
+                        help="'shared' uses the dataset registry, 'copies' gives each session its own frame")
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.mode != 'both':
+        print(json.dumps(run(args.mode, args.sessions, args.rows, args.data_dir, args.seed)))
+        return 0
+
+    # Each mode runs in a fresh interpreter so resident memory is not inherited from the other
+    reports = []
+    for mode in ['copies', 'shared']:
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.load_test', '--mode', mode, '--sessions', str(args.sessions),
+             '--rows', str(args.rows), '--data-dir', args.data_dir, '--seed', str(args.seed)],
+            cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+        ).stdout
+        reports.append(json.loads(output.strip().splitlines()[-1]))
+    for report in reports:
+        print(f"{report['mode']:<7} {report['sessions']:>4} sessions  {report['rss_mb']:>9.1f} MB resident  "
+              f"{report['per_session_mb']:>8.2f} MB/session  {report['wall_seconds']:>7.2f}s", file=sys.stderr)
+    print(json.dumps(reports, indent=2))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,62 @@
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+from benchmarks.synthetic import generate_ohlcv
+from charts.payload import (build_chart_payload, build_compact_indicator_series, build_compact_payload,
+                            build_compact_signal_markers, build_indicator_series, build_signal_markers, build_time_axis)
+from data.cleaning import clean_ohlcv_frame
+from utils.indicators import sma
+
+def dict_payload(df, lines):
+    """The series renderLightweightCharts receives: candles with markers, volume and indicator lines"""
+    chart_data = build_chart_payload(df)
+    return [
+        {'type': 'Candlestick', 'data': chart_data['candles'], 'markers': build_signal_markers(df, 'direction')},
+        {'type': 'Histogram', 'data': chart_data['volume']},
+    ] + [{'type': 'Line', 'data': points} for points in build_indicator_series(df, lines).values()]
+
+def compact_payload(df, lines):
+    """The same series encoded for charts.compact_renderer"""
+    chart_data = build_compact_payload(df)
+    series = [
+        {'type': 'Candlestick', 'data': chart_data['candles'], 'markers': build_compact_signal_markers(df, 'direction')},
+        {'type': 'Histogram', 'data': chart_data['volume']},
+    ] + [{'type': 'Line', 'data': points} for points in build_compact_indicator_series(lines).values()]
+    return {'axis': build_time_axis(df), 'charts': [{'series': series}]}
+
+FORMATS = {'dicts': (dict_payload, {}), 'compact': (compact_payload, {'separators': (',', ':')})}
+
+def measure(build, dump_options, df, lines, repeat):
+    """Best build and json.dumps times over `repeat` runs, and the serialized size"""
+    build_s, serialize_s = [], []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        payload = build(df, lines)
+        built = time.perf_counter()
+        text = json.dumps(payload, **dump_options)
+        build_s.append(built - started)
+        serialize_s.append(time.perf_counter() - built)
+    return {'bytes': len(text), 'build_ms': round(min(build_s) * 1000, 2), 'serialize_ms': round(min(serialize_s) * 1000, 2)}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare chart payload size and serialize time of the dict and compact formats.')
+    parser.add_argument('--rows', type=int, nargs='+', default=[5_000, 100_000, 1_000_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    report = {}
+    for rows in args.rows:
+        df = clean_ohlcv_frame(generate_ohlcv(rows))
+        lines = {'SMA 20': sma(df['close'].to_numpy(dtype=np.float64), 20)}
+        report[rows] = {name: measure(build, options, df, lines, args.repeat) for name, (build, options) in FORMATS.items()}
+        dicts, compact = report[rows]['dicts'], report[rows]['compact']
+        print(f"{rows:>12,} rows  {dicts['bytes'] / 1024 ** 2:>8.2f} MB -> {compact['bytes'] / 1024 ** 2:>8.2f} MB  "
+              f"serialize {dicts['serialize_ms']:>9.1f} ms -> {compact['serialize_ms']:>7.1f} ms", file=sys.stderr)
+    print(json.dumps(report, indent=2))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,78 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Streamlit-free modules that workers and batch jobs import
+CORE_MODULES = [
+    'data.cleaning', 'data.ingest', 'data.cache', 'data.resample', 'data.multi_loader', 'data.live', 'data.replay_server',
+    'charts.payload', 'charts.live_feed', 'utils.helpers', 'utils.metrics', 'utils.indicators', 'utils.range_index', 'utils.level_index',
+    'utils.profiling', 'backtest.backtest', 'backtest.sweep', 'chatbot.query_engine', 'chatbot.answer_cache', 'data.quality',
+]
+# Matched as module-name prefixes; the bare 'google' namespace package is imported by protobuf users and is cheap
+HEAVY_PACKAGES = ['streamlit', 'langchain', 'langchain_core', 'langchain_community', 'langchain_google_genai',
+                  'langchain_classic', 'faiss', 'google.generativeai', 'google.genai', 'dotenv']
+TARGETS = {
+    'core': CORE_MODULES,
+    'app': ['app'],
+    'chatbot': ['chatbot.chatbot'],
+}
+
+PROBE = '''
+import json, resource, sys, time
+start_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+started = time.perf_counter()
+for module in {modules!r}:
+    __import__(module)
+seconds = time.perf_counter() - started
+scale = 1024 ** 2 if sys.platform == 'darwin' else 1024
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+heavy = sorted({{package for package in {heavy!r} for name in sys.modules if name == package or name.startswith(package + '.')}})
+print(json.dumps({{'seconds': seconds, 'rss_mb': rss / scale, 'import_rss_mb': (rss - start_rss) / scale, 'heavy': heavy}}))
+'''
+
+def probe(modules, repeat=5):
+    """Import `modules` in fresh interpreters; median time and peak RSS plus the heavy packages loaded"""
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, '-c', PROBE.format(modules=modules, heavy=HEAVY_PACKAGES)],
+            cwd=REPO_ROOT, capture_output=True, text=True, check=True, env={**os.environ, 'PYTHONDONTWRITEBYTECODE': '1'},
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    return {
+        'seconds': round(statistics.median(run['seconds'] for run in runs), 3),
+        'rss_mb': round(statistics.median(run['rss_mb'] for run in runs), 1),
+        'import_rss_mb': round(statistics.median(run['import_rss_mb'] for run in runs), 1),
+        'heavy': runs[-1]['heavy'],
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure cold import time and memory of the app and its core modules.')
+    parser.add_argument('--targets', nargs='+', choices=list(TARGETS), default=list(TARGETS))
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--check', action='store_true',
+                        help='exit 1 if the core pulls in Streamlit/LangChain or the app pulls in LangChain/FAISS')
+    args = parser.parse_args(argv)
+
+    report = {target: probe(TARGETS[target], args.repeat) for target in args.targets}
+    print(json.dumps(report, indent=2))
+
+    problems = []
+    if 'core' in report and report['core']['heavy']:
+        problems.append(f"core imports {report['core']['heavy']}")
+    if 'app' in report:
+        eager = [name for name in report['app']['heavy'] if name != 'streamlit']
+        if eager:
+            problems.append(f"app imports {eager} at startup")
+    for problem in problems:
+        print(f'FAIL {problem}', file=sys.stderr)
+    return 1 if args.check and problems else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,102 @@
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+SESSION_MINUTES = 390  # 09:30-16:00 regular trading hours
+START_DATE = '2015-01-02'
+
+def trading_minutes(rows, start=START_DATE):
+    """First `rows` regular-session minute timestamps on business days from `start`"""
+    days = pd.bdate_range(start, periods=-(-rows // SESSION_MINUTES))
+    minute = np.arange(rows) % SESSION_MINUTES
+    day = days.to_numpy()[np.arange(rows) // SESSION_MINUTES]
+    return pd.DatetimeIndex(day + np.timedelta64(9 * 60 + 30, 'm') + minute.astype('timedelta64[m]'))
+
+def _level_strings(rng, anchor, sign, rows):
+    """Support/resistance cells in the formats seen in real exports: '[a, b]', 'a, b', '[]' and blank"""
+    first = (anchor + sign * rng.uniform(1, 6, rows)).round(2).astype(str)
+    second = (anchor + sign * rng.uniform(6, 15, rows)).round(2).astype(str)
+    bracketed = '[' + first + ', ' + second + ']'
+    style = rng.integers(0, 10, rows)
+    return np.where(style < 6, bracketed, np.where(style < 8, first + ', ' + second, np.where(style < 9, '[]', '')))
+
+def generate_ohlcv(rows, seed=0, duplicate_rate=0.001, malformed_rate=0.0005):
+    """Deterministic TSLA-like one-minute bars as raw CSV columns.
+
+    Prices follow a geometric random walk from about $250 with intraday
+    U-shaped volume. A `duplicate_rate` share of rows are repeated verbatim
+    and a `malformed_rate` share get swapped high/low, negative volume or
+    unparseable level cells, so every cleaning branch does real work.
+    """
+    rng = np.random.default_rng(seed)
+    timestamps = trading_minutes(rows)
+    close = 250 * np.exp(np.cumsum(rng.normal(0, 0.0012, rows)))
+    open_ = np.concatenate(([250.0], close[:-1])) * np.exp(rng.normal(0, 0.0004, rows))
+    spread = np.abs(rng.normal(0, 0.0015, rows)) * close
+    high = np.maximum(open_, close) + spread * rng.random(rows)
+    low = np.minimum(open_, close) - spread * rng.random(rows)
+    minute = np.arange(rows) % SESSION_MINUTES
+    intraday = 1 + 2 * ((minute - SESSION_MINUTES / 2) / (SESSION_MINUTES / 2)) ** 2
+    volume = (rng.lognormal(10, 0.6, rows) * intraday).astype(np.int64)
+    direction = rng.choice(np.array(['NEUTRAL', 'LONG', 'SHORT', ''], dtype=object), rows, p=[0.9, 0.045, 0.045, 0.01])
+
+    df = pd.DataFrame({
+        'timestamp': timestamps.astype(str),
+        'open': open_.round(2),
+        'high': high.round(2),
+        'low': low.round(2),
+        'close': close.round(2),
+        'volume': volume,
+        'direction': direction,
+        'Support': _level_strings(rng, close, -1, rows),
+        'Resistance': _level_strings(rng, close, 1, rows),
+    })
+
+    malformed = np.flatnonzero(rng.random(rows) < malformed_rate)
+    kinds = rng.integers(0, 4, len(malformed))
+    swap = malformed[kinds == 0]
+    df.loc[swap, ['high', 'low']] = df.loc[swap, ['low', 'high']].to_numpy()
+    df.loc[malformed[kinds == 1], 'volume'] *= -1
+    df.loc[malformed[kinds == 2], 'Support'] = '[1, bad]'
+    df.loc[malformed[kinds == 3], 'Resistance'] = 'resistance?'
+
+    duplicates = np.flatnonzero(rng.random(rows) < duplicate_rate)
+    if len(duplicates):
+        # Repeat rows right after the original, as double-exported bars usually appear
+        order = np.argsort(np.concatenate((np.arange(rows), duplicates)), kind='stable')
+        df = pd.concat([df, df.iloc[duplicates]], ignore_index=True).iloc[order].reset_index(drop=True)
+    return df
+
+def write_synthetic_csv(path, rows, seed=0, chunk_rows=1_000_000, **kwargs):
+    """Write a synthetic CSV, reusing an existing file for the same rows and seed"""
+    path = Path(path)
+    if path.exists():
+        return path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    staging = path.with_suffix('.tmp')
+    with open(staging, 'w', newline='') as handle:
+        df = generate_ohlcv(rows, seed, **kwargs)
+        for start in range(0, len(df), chunk_rows):
+            df.iloc[start:start + chunk_rows].to_csv(handle, index=False, header=start == 0)
+    staging.replace(path)
+    return path
+
+def dataset_path(directory, rows, seed=0):
+    return Path(directory) / f'tsla_synthetic_{rows}_{seed}.csv'
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Write deterministic TSLA-like OHLCV CSVs for benchmarking.')
+    parser.add_argument('directory')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 1_000_000])
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    for rows in args.rows:
+        path = write_synthetic_csv(dataset_path(args.directory, rows, args.seed), rows, args.seed)
+        print(f'{path} ({path.stat().st_size / 1024 ** 2:,.1f} MB)')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,119 +1,97 @@
+import json
 import streamlit as st
 from streamlit_lightweight_charts import renderLightweightCharts
-from utils.helpers import parse_level_array
+from charts.compact_renderer import render_compact_charts
+from charts.payload import (build_chart_payload, build_compact_indicator_series, build_compact_payload,
+                            build_compact_signal_markers, build_indicator_series, build_level_price_lines,
+                            build_signal_markers, build_time_axis)
+from data.registry import get_dataset_registry
+from utils.helpers import bar_timestamps
+from utils.indicators import sma
+from utils.profiling import instrument, mark_cache, stage
 
+import numpy as np
 import pandas as pd
-from config.constants import COLOR_BULL, COLOR_BEAR, COLOR_SUPPORT, COLOR_RESISTANCE
-@st.cache_data
+from config.constants import (COLOR_BULL, COLOR_BEAR, COLOR_SUPPORT, COLOR_RESISTANCE, CHART_COMPACT_PAYLOAD, INDICATOR_COLORS,
+                              MAX_CHART_BARS)
+@instrument('chart_payload', cached=True)
+def prepare_chart_data(df, cache_key=None, compact=False):
+    """Prepare data for lightweight charts.
 
-def prepare_chart_data(df):
-    """Prepare data for lightweight charts"""
-    # Candlestick data
-    candles_data = []
-    volume_data = []
-    support_min_data = []
-    support_max_data = []
-    resistance_min_data = []
-    resistance_max_data = []
-    
-    for _, row in df.iterrows():
-        try:
-            # Candlestick data
-            candles_data.append({
-                'time': row['time'],
-                'open': float(row['open']),
-                'high': float(row['high']),
-                'low': float(row['low']),
-                'close': float(row['close'])
-            })
-            
-            # Volume data
-            volume_data.append({
-                'time': row['time'],
-                'value': float(row['volume']),
-                'color': row['color']
-            })
-            
-            # Support levels
-            if pd.notna(row['support_min']):
-                support_min_data.append({
-                    'time': row['time'],
-                    'value': float(row['support_min'])
-                })
-            
-            if pd.notna(row['support_max']):
-                support_max_data.append({
-                    'time': row['time'],
-                    'value': float(row['support_max'])
-                })
-            
-            # Resistance levels
-            if pd.notna(row['resistance_min']):
-                resistance_min_data.append({
-                    'time': row['time'],
-                    'value': float(row['resistance_min'])
-                })
-            
-            if pd.notna(row['resistance_max']):
-                resistance_max_data.append({
-                    'time': row['time'],
-                    'value': float(row['resistance_max'])
-                })
-                
-        except (ValueError, TypeError) as e:
-            st.warning(f"Skipping invalid data row: {e}")
-            continue
-    
-    st.write("✅ Number of candlesticks:", len(candles_data))
-    if candles_data:
-        st.write("✅ Sample candlestick:")
-        st.json(candles_data[:2])
+    With `cache_key` = (dataset key, *view) the payload is built once and
+    shared by every session through the dataset registry. `compact` gives
+    typed-array columns on a shared time axis for the compact renderer.
+    """
+    def build():
+        mark_cache('miss')
+        return {'axis': build_time_axis(df), **build_compact_payload(df)} if compact else build_chart_payload(df)
+
+    if cache_key is None:
+        return build()
+    dataset_key, *view = cache_key
+    return get_dataset_registry().get_or_build(dataset_key, ('compact_payload' if compact else 'chart_payload', *view), build)
 
+@instrument('signal_markers')
+def create_trading_signals_markers(df, direction_col, compact=False):
+    """Create markers for trading signals"""
+    return build_compact_signal_markers(df, direction_col) if compact else build_signal_markers(df, direction_col)
+
+def create_indicator_pane(title, series):
+    """Chart options and series for an indicator drawn below the price chart"""
     return {
-        'candles': candles_data,
-        'volume': volume_data,
-        'support_min': support_min_data,
-        'support_max': support_max_data,
-        'resistance_min': resistance_min_data,
-        'resistance_max': resistance_max_data
+        "chart": {
+            "width": 800,
+            "height": 150,
+            "layout": {
+                "background": {
+                    "type": 'solid',
+                    "color": 'transparent'
+                },
+                "textColor": 'black',
+            },
+            "grid": {
+                "vertLines": {
+                    "color": 'rgba(42, 46, 57, 0)',
+                },
+                "horzLines": {
+                    "color": 'rgba(42, 46, 57, 0.6)',
+                }
+            },
+            "timeScale": {
+                "visible": False,
+            },
+            "watermark": {
+                "visible": True,
+                "fontSize": 18,
+                "horzAlign": 'left',
+                "vertAlign": 'top',
+                "color": 'rgba(171, 71, 188, 0.7)',
+                "text": title,
+            }
+        },
+        "series": series
     }
 
-def create_trading_signals_markers(df, direction_col):
-    """Create markers for trading signals"""
-    markers = []
-    
-    if direction_col:
-        for idx, row in df.iterrows():
-            if pd.notna(row[direction_col]) and row[direction_col] != 'NEUTRAL':
-                direction = str(row[direction_col]).upper()
-                
-                if direction == 'LONG':
-                    markers.append({
-                        'time': row['time'],
-                        'position': 'belowBar',
-                        'color': '#4CAF50',
-                        'shape': 'arrowUp',
-                        'text': 'LONG'
-                    })
-                elif direction == 'SHORT':
-                    markers.append({
-                        'time': row['time'],
-                        'position': 'aboveBar',
-                        'color': '#F44336',
-                        'shape': 'arrowDown',
-                        'text': 'SHORT'
-                    })
-    
-    return markers
+@instrument('render_chart')
+def create_lightweight_chart(df, show_volume=True, show_signals=True, show_support_resistance=True, indicators=None, levels=None,
+                             compact=CHART_COMPACT_PAYLOAD, cache_key=None):
+    """Create professional candlestick chart with lightweight-charts.
 
-def create_lightweight_chart(df, show_volume=True, show_signals=True, show_support_resistance=True):
-    """Create professional candlestick chart with lightweight-charts"""
+    `indicators` is a list of (name, placement, {line label: values}) with
+    values aligned to the rows of `df`; 'overlay' lines are drawn on the
+    price chart and 'pane' indicators get their own chart below it.
+    `levels` is the dataset's LevelIndex; its strongest levels within the
+    visible bars are drawn as price lines. With `compact` the series go to
+    the client as typed arrays on one shared time axis instead of per-bar
+    dicts. `cache_key` shares the payload across sessions, see
+    prepare_chart_data.
+    """
     try:
         st.markdown('<div class="chart-container">', unsafe_allow_html=True)
         st.subheader("📈 Tesla TSLA - Professional Candlestick Chart")
         
         # Prepare chart data
-        chart_data = prepare_chart_data(df)
+        chart_data = prepare_chart_data(df, cache_key, compact)
         
         if not chart_data['candles']:
             st.error("No valid chart data available")
@@ -150,7 +128,8 @@ def create_lightweight_chart(df, show_volume=True, show_signals=True, show_suppo
             },
             "timeScale": {
                 "borderColor": "rgba(197, 203, 206, 0.8)",
-                "barSpacing": 15
+                "barSpacing": 15,
+                "timeVisible": bool((df['time'] % 86400 != 0).any())
             },
             "watermark": {
                 "visible": True,
@@ -176,51 +155,12 @@ def create_lightweight_chart(df, show_volume=True, show_signals=True, show_suppo
             }
         }]
         
-        # Add support and resistance lines
-        if show_support_resistance:
-            if chart_data['support_min']:
-                main_series.append({
-                    "type": 'Line',
-                    "data": chart_data['support_min'],
-                    "options": {
-                        "color": COLOR_SUPPORT,
-                        "lineWidth": 2,
-                        "title": "Support Min"
-                    }
-                })
-            
-            if chart_data['support_max']:
-                main_series.append({
-                    "type": 'Line',
-                    "data": chart_data['support_max'],
-                    "options": {
-                        "color": 'rgba(76, 175, 80, 0.6)',
-                        "lineWidth": 2,
-                        "title": "Support Max"
-                    }
-                })
-            
-            if chart_data['resistance_min']:
-                main_series.append({
-                    "type": 'Line',
-                    "data": chart_data['resistance_min'],
-                    "options": {
-                        "color": COLOR_RESISTANCE,
-                        "lineWidth": 2,
-                        "title": "Resistance Min"
-                    }
-                })
-            
-            if chart_data['resistance_max']:
-                main_series.append({
-                    "type": 'Line',
-                    "data": chart_data['resistance_max'],
-                    "options": {
-                        "color": 'rgba(244, 67, 54, 0.6)',
-                        "lineWidth": 2,
-                        "title": "Resistance Max"
-                    }
-                })
+        # Key support and resistance levels as horizontal price lines
+        if show_support_resistance and levels is not None:
+            with stage('level_price_lines'):
+                price_lines = build_level_price_lines(levels, df, {'support': COLOR_SUPPORT, 'resistance': COLOR_RESISTANCE})
+            if price_lines:
+                main_series[0]["priceLines"] = price_lines
         
         # Add trading signals markers
         if show_signals:
@@ -233,11 +173,30 @@ def create_lightweight_chart(df, show_volume=True, show_signals=True, show_suppo
                     break
             
             if direction_col:
-                markers = create_trading_signals_markers(df, direction_col)
+                markers = create_trading_signals_markers(df, direction_col, compact)
                 if markers:
                     # Add markers to the candlestick series
                     main_series[0]["markers"] = markers
         
+        # Indicator lines, colored in selection order
+        indicator_panes = []
+        colors = iter(INDICATOR_COLORS * 4)
+        for name, placement, lines in indicators or []:
+            points_by_label = build_compact_indicator_series(lines) if compact else build_indicator_series(df, lines)
+            series = [{
+                "type": 'Line',
+                "data": points,
+                "options": {
+                    "color": next(colors),
+                    "lineWidth": 1,
+                    "title": label
+                }
+            } for label, points in points_by_label.items()]
+            if placement == 'overlay':
+                main_series.extend(series)
+            else:
+                indicator_panes.append(create_indicator_pane(name, series))
+
         chart_options.append(main_chart_options)
         series_config.append({
             "chart": main_chart_options,
@@ -300,8 +259,16 @@ def create_lightweight_chart(df, show_volume=True, show_signals=True, show_suppo
                 "series": volume_series
             })
         
+        series_config.extend(indicator_panes)
+
         # Render the charts
-        renderLightweightCharts(series_config, 'tesla_chart')
+        with stage('chart_component') as timed:
+            if compact:
+                timed.bytes = render_compact_charts(series_config, chart_data['axis'])
+            else:
+                renderLightweightCharts(series_config, 'tesla_chart')
+        if timed.enabled and not compact:
+            timed.bytes = len(json.dumps(series_config))
         
         # Add legend
         st.markdown("""
@@ -334,14 +301,74 @@ def create_lightweight_chart(df, show_volume=True, show_signals=True, show_suppo
         # Fallback to basic Streamlit charts
         st.subheader("📈 Fallback - Basic Price Chart")
         try:
-            chart_data = df.set_index('timestamp')[['open', 'high', 'low', 'close']]
+            chart_data = df.set_index(bar_timestamps(df))[['open', 'high', 'low', 'close']]
             st.line_chart(chart_data)
         except Exception as fallback_error:
             st.error(f"Even fallback chart failed: {fallback_error}")
             st.write("Please check your data format and try again.")
 
-def create_additional_charts(df):
-    """Create additional analysis charts"""
+@instrument('equity_chart')
+def create_equity_chart(times, equity, drawdown, max_points=MAX_CHART_BARS):
+    """Equity curve with a drawdown pane, decimated to at most `max_points` points"""
+    step = max(1, -(-len(equity) // max_points))
+    keep = np.unique(np.append(np.arange(0, len(equity), step), len(equity) - 1))
+    times = np.asarray(times)[keep].tolist()
+    equity_points = [{'time': t, 'value': v} for t, v in zip(times, np.asarray(equity)[keep].tolist())]
+    drawdown_points = [{'time': t, 'value': v * 100} for t, v in zip(times, np.asarray(drawdown)[keep].tolist())]
+
+    equity_chart = {
+        "width": 800,
+        "height": 350,
+        "layout": {
+            "background": {
+                "type": "solid",
+                "color": '#111'
+            },
+            "textColor": "white"
+        },
+        "grid": {
+            "vertLines": {
+                "color": "rgba(197, 203, 206, 0.5)"
+            },
+            "horzLines": {
+                "color": "rgba(197, 203, 206, 0.5)"
+            }
+        },
+        "timeScale": {
+            "borderColor": "rgba(197, 203, 206, 0.8)",
+            "timeVisible": True
+        }
+    }
+    equity_series = [{
+        "type": 'Area',
+        "data": equity_points,
+        "options": {
+            "lineColor": COLOR_BULL,
+            "topColor": 'rgba(38,166,154,0.4)',
+            "bottomColor": 'rgba(38,166,154,0.0)',
+            "lineWidth": 2,
+            "title": "Equity"
+        }
+    }]
+    drawdown_series = [{
+        "type": 'Area',
+        "data": drawdown_points,
+        "options": {
+            "lineColor": COLOR_BEAR,
+            "topColor": 'rgba(239,83,80,0.0)',
+            "bottomColor": 'rgba(239,83,80,0.4)',
+            "lineWidth": 1,
+            "title": "Drawdown %"
+        }
+    }]
+    renderLightweightCharts([
+        {"chart": equity_chart, "series": equity_series},
+        create_indicator_pane('Drawdown %', drawdown_series),
+    ], 'equity_chart')
+
+@instrument('additional_charts')
+def create_additional_charts(df, volume_ma=None):
+    """Create additional analysis charts; `volume_ma` is a precomputed 20-bar volume average aligned with `df`"""
     try:
         # Volume analysis
         st.subheader("📊 Volume Analysis")
@@ -350,7 +377,7 @@ def create_additional_charts(df):
         
         with col1:
             # Volume chart
-            volume_chart_data = df.set_index('timestamp')[['volume']]
+            volume_chart_data = df.set_index(bar_timestamps(df))[['volume']]
             st.bar_chart(volume_chart_data)
         
         with col2:
@@ -360,8 +387,11 @@ def create_additional_charts(df):
             st.metric("Correlation Coefficient", f"{correlation:.3f}")
             
             # Volume moving average
-            df['volume_ma'] = df['volume'].rolling(window=20).mean()
-            volume_ma_data = df.set_index('timestamp')[['volume', 'volume_ma']].dropna()
+            if volume_ma is None:
+                volume_ma = sma(df['volume'].to_numpy(dtype='float64'), 20)
+            volume_ma_data = pd.DataFrame(
+                {'volume': df['volume'].to_numpy(), 'volume_ma': volume_ma}, index=bar_timestamps(df)
+            ).dropna()
             st.line_chart(volume_ma_data)
         
         # Support/Resistance Analysis
@@ -373,7 +403,7 @@ def create_additional_charts(df):
             st.write("**Support Levels Distribution**")
             support_data = df[df['support_min'].notna()]
             if not support_data.empty:
-                support_chart = support_data.set_index('timestamp')[['support_min', 'support_max']]
+                support_chart = support_data.set_index(bar_timestamps(support_data))[['support_min', 'support_max']]
                 st.line_chart(support_chart)
                 
                 avg_support = support_data[['support_min', 'support_max']].mean()
@@ -385,7 +415,7 @@ def create_additional_charts(df):
             st.write("**Resistance Levels Distribution**")
             resistance_data = df[df['resistance_min'].notna()]
             if not resistance_data.empty:
-                resistance_chart = resistance_data.set_index('timestamp')[['resistance_min', 'resistance_max']]
+                resistance_chart = resistance_data.set_index(bar_timestamps(resistance_data))[['resistance_min', 'resistance_max']]
                 st.line_chart(resistance_chart)
                 
                 avg_resistance = resistance_data[['resistance_min', 'resistance_max']].mean()
@@ -0,0 +1,104 @@
+import json
+import os
+from functools import lru_cache
+
+import streamlit.components.v1 as components
+
+# Vendored lightweight-charts v4.1.3 (Apache-2.0), shared with the live chart component so no chart needs a CDN
+LIGHTWEIGHT_CHARTS_JS = os.path.join(os.path.dirname(__file__), 'live_chart_frontend',
+                                     'lightweight-charts.standalone.production.js')
+# Characters that could close the <script> element or start markup when JSON is embedded in HTML
+SCRIPT_ESCAPES = str.maketrans({'<': '\\u003c', '>': '\\u003e', '&': '\\u0026'})
+
+# Decodes the compact payload from charts.payload and draws stacked charts with synced time scales.
+# Series "data" is either a plain list of points or a dict of encoded columns on the shared axis.
+COMPACT_CHART_HTML = """
+<div id="charts"></div>
+<script>%(library)s</script>
+<script>
+const payload = %(payload)s;
+const ARRAYS = {float32: Float32Array, float64: Float64Array, int32: Int32Array, uint8: Uint8Array};
+
+function decode(column) {
+  const raw = atob(column.b64);
+  const bytes = new Uint8Array(raw.length);
+  for (let i = 0; i < raw.length; i++) bytes[i] = raw.charCodeAt(i);
+  if (column.dtype === 'bits') {
+    const flags = new Uint8Array(column.length);
+    for (let i = 0; i < column.length; i++) flags[i] = (bytes[i >> 3] >> (i & 7)) & 1;
+    return flags;
+  }
+  return new ARRAYS[column.dtype](bytes.buffer);
+}
+
+const deltas = decode(payload.axis.dt);
+const times = new Float64Array(deltas.length + 1);
+times[0] = payload.axis.t0;
+for (let i = 0; i < deltas.length; i++) times[i + 1] = times[i] + deltas[i];
+
+function expand(type, data) {
+  if (Array.isArray(data)) return data;
+  const points = [];
+  if (type === 'Candlestick') {
+    const [o, h, l, c] = ['open', 'high', 'low', 'close'].map(name => decode(data[name]));
+    for (let i = 0; i < o.length; i++) points.push({time: times[i], open: o[i], high: h[i], low: l[i], close: c[i]});
+    return points;
+  }
+  const values = decode(data.value);
+  const up = data.up ? decode(data.up) : null;
+  for (let i = 0; i < values.length; i++) {
+    if (Number.isNaN(values[i])) continue;
+    const point = {time: times[i], value: values[i]};
+    if (up) point.color = data.colors[up[i]];
+    points.push(point);
+  }
+  return points;
+}
+
+function expandMarkers(markers) {
+  if (Array.isArray(markers)) return markers;
+  const rows = decode(markers.rows);
+  const long = decode(markers.long);
+  return Array.from(rows, (row, i) => ({time: times[row], ...markers.styles[long[i] ? 'long' : 'short']}));
+}
+
+const container = document.getElementById('charts');
+const charts = payload.charts.map(spec => {
+  const element = document.createElement('div');
+  container.appendChild(element);
+  const chart = LightweightCharts.createChart(element, spec.chart);
+  for (const series of spec.series) {
+    const target = chart['add' + series.type + 'Series'](series.options || {});
+    if (series.priceScale) target.priceScale().applyOptions(series.priceScale);
+    target.setData(expand(series.type, series.data));
+    if (series.markers) target.setMarkers(expandMarkers(series.markers));
+    for (const line of series.priceLines || []) target.createPriceLine(line);
+  }
+  return chart;
+});
+
+charts.forEach(source => source.timeScale().subscribeVisibleLogicalRangeChange(range => {
+  if (range) charts.filter(chart => chart !== source).forEach(chart => chart.timeScale().setVisibleLogicalRange(range));
+}));
+charts.forEach(chart => chart.timeScale().fitContent());
+</script>
+"""
+
+@lru_cache(maxsize=1)
+def lightweight_charts_js():
+    with open(LIGHTWEIGHT_CHARTS_JS, encoding='utf-8') as file:
+        return file.read()
+
+def script_json(value):
+    """Compact JSON that is safe inside a <script> element: <, > and & become unicode escapes"""
+    return json.dumps(value, separators=(',', ':')).translate(SCRIPT_ESCAPES)
+
+def render_compact_charts(series_config, axis):
+    """Render renderLightweightCharts-style `series_config` whose series data uses the compact encoding.
+
+    Returns the serialized payload size in bytes.
+    """
+    payload = script_json({'axis': axis, 'charts': series_config})
+    height = sum(spec['chart'].get('height', 300) for spec in series_config) + 8 * len(series_config)
+    components.html(COMPACT_CHART_HTML % {'library': lightweight_charts_js(), 'payload': payload}, height=height)
+    return len(payload)
@@ -0,0 +1,26 @@
+import os
+import streamlit as st
+import streamlit.components.v1 as components
+from charts.live_feed import build_live_delta
+from config.constants import COLOR_VOLUME, INDICATOR_COLORS
+
+# Static frontend that patches the series in place from each delta: series.update() for each changed point,
+# setData() only on a reset. The charts outlive reruns because the component keeps its iframe.
+_live_chart = components.declare_component('live_chart', path=os.path.join(os.path.dirname(__file__), 'live_chart_frontend'))
+
+def render_live_chart(session, lines, key='live_chart'):
+    """Send the chart the changes of `session` it has not seen yet, over the app's own Streamlit connection.
+
+    Meant to run in a fragment on a timer. The last update sent to this
+    browser session is kept in session state; a chart that was reloaded
+    or missed an update answers with a new `resync` value and gets a full
+    reset on the next run. `lines` is a list of (indicator label,
+    'overlay' or 'pane').
+    """
+    sent = st.session_state.setdefault(f'{key}_sent', {'session': None, 'seq': -1, 'resync': None})
+    after = sent['seq'] if sent['session'] == session.id else -1
+    delta = build_live_delta(session, after)
+    sent.update(session=session.id, seq=delta['seq'])
+    request = _live_chart(delta=delta, lines=lines, colors=INDICATOR_COLORS, volumeColor=COLOR_VOLUME, key=key, default=None)
+    if request and request.get('resync') != sent['resync']:
+        sent.update(seq=-1, resync=request['resync'])
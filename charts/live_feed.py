@@ -0,0 +1,29 @@
+from charts.payload import build_chart_payload, build_indicator_series, build_signal_markers
+from config.constants import MAX_CHART_BARS
+
+def build_live_delta(session, after):
+    """Chart points changed in `session` since update `after`.
+
+    Only bars from the first changed index on are sent; a client that has
+    applied update `base` (= `after`) patches those points in place. A
+    client further behind than the session's change history, or new to
+    it, gets a reset with the last MAX_CHART_BARS bars instead.
+    """
+    with session.lock:
+        end = len(session.bars)
+        start = session.changed_since(after)
+        reset = start is None
+        if reset:
+            start = max(0, end - MAX_CHART_BARS)
+        frame = session.bars.frame(start, end)
+        lines = {line.label: line.values.view()[start:end] for line in session.indicators}
+        chart_data = build_chart_payload(frame)
+        return {
+            'seq': session.seq,
+            'base': after,
+            'reset': reset,
+            'candles': chart_data['candles'],
+            'volume': chart_data['volume'],
+            'markers': build_signal_markers(frame, 'direction'),
+            'lines': build_indicator_series(frame, lines),
+        }
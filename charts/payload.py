@@ -0,0 +1,136 @@
+import base64
+
+import numpy as np
+import pandas as pd
+from config.constants import COLOR_BEAR, COLOR_BULL
+
+# Signal marker styles; compact payloads send them once instead of once per marker
+MARKER_STYLES = {
+    'long': {'position': 'belowBar', 'color': '#4CAF50', 'shape': 'arrowUp', 'text': 'LONG'},
+    'short': {'position': 'aboveBar', 'color': '#F44336', 'shape': 'arrowDown', 'text': 'SHORT'},
+}
+
+def _float_column(df, col):
+    values = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float64)
+    # Cleaned prices are whole cents, so float32 columns widen back to the same decimals
+    return values.round(2) if df[col].dtype == np.float32 else values
+
+def bar_up(df):
+    """True for bars that did not close below their open; candle and volume colors are derived from it at render time"""
+    return ~(_float_column(df, 'open') > _float_column(df, 'close'))
+
+def _line_records(times, values):
+    """Build {'time', 'value'} points, skipping NaN values in bulk"""
+    mask = ~np.isnan(values)
+    return [{'time': t, 'value': v} for t, v in zip(times[mask].tolist(), values[mask].tolist())]
+
+def build_chart_payload(df):
+    """Build candle and volume series straight from column arrays"""
+    times = df['time'].to_numpy()
+    time_list = times.tolist()
+    opens, highs, lows, closes = (_float_column(df, col).tolist() for col in ['open', 'high', 'low', 'close'])
+
+    candles = [
+        {'time': t, 'open': o, 'high': h, 'low': l, 'close': c}
+        for t, o, h, l, c in zip(time_list, opens, highs, lows, closes)
+    ]
+    colors = np.where(bar_up(df), COLOR_BULL, COLOR_BEAR).tolist()
+    volume = [
+        {'time': t, 'value': v, 'color': color}
+        for t, v, color in zip(time_list, _float_column(df, 'volume').tolist(), colors)
+    ]
+
+    return {'candles': candles, 'volume': volume}
+
+def build_level_price_lines(level_index, df, colors, count=5):
+    """Horizontal price lines for the `count` strongest clustered levels of each kind within `df`'s price and time range"""
+    if not len(df):
+        return []
+    low, high = float(df['low'].min()), float(df['high'].max())
+    start, end = int(df['time'].iloc[0]), int(df['time'].iloc[-1])
+    lines = []
+    for kind, color in colors.items():
+        for level in level_index.strongest(kind, count, low=low, high=high, start=start, end=end):
+            lines.append({
+                'price': level['price'],
+                'color': color,
+                'lineWidth': 2,
+                'lineStyle': 2,
+                'axisLabelVisible': True,
+                'title': f"{kind.title()} ({level['touches']:,})",
+            })
+    return lines
+
+def build_indicator_series(df, lines):
+    """Line points for each indicator output aligned row-for-row with `df`"""
+    times = df['time'].to_numpy()
+    return {label: _line_records(times, np.asarray(values, dtype=np.float64)) for label, values in lines.items()}
+
+def build_signal_markers(df, direction_col):
+    """Build LONG/SHORT markers from the direction column without iterating rows"""
+    if not direction_col:
+        return []
+
+    direction = df[direction_col]
+    upper = direction.astype(str).str.upper().to_numpy()
+    present = direction.notna().to_numpy()
+    is_long = present & (upper == 'LONG')
+    is_short = present & (upper == 'SHORT')
+
+    signal_rows = np.flatnonzero(is_long | is_short)
+    times = df['time'].to_numpy()[signal_rows].tolist()
+    long_style, short_style = MARKER_STYLES['long'], MARKER_STYLES['short']
+    return [{'time': t, **(long_style if long_signal else short_style)}
+            for t, long_signal in zip(times, is_long[signal_rows].tolist())]
+
+def encode_column(values, dtype):
+    """Little-endian `values` as base64, decoded into a typed array of `dtype` on the client"""
+    array = np.ascontiguousarray(values, dtype=np.dtype(dtype).newbyteorder('<'))
+    return {'dtype': np.dtype(dtype).name, 'b64': base64.b64encode(array.tobytes()).decode('ascii')}
+
+def encode_bits(flags):
+    """Boolean flags packed eight to a byte, least significant bit first"""
+    flags = np.asarray(flags, dtype=bool)
+    packed = np.packbits(flags, bitorder='little')
+    return {'dtype': 'bits', 'length': len(flags), 'b64': base64.b64encode(packed.tobytes()).decode('ascii')}
+
+def build_time_axis(df):
+    """The shared time axis: the first UNIX second plus int32 deltas to each following bar"""
+    times = df['time'].to_numpy(dtype=np.int64)
+    if not len(times):
+        return {'t0': 0, 'dt': encode_column([], 'int32')}
+    return {'t0': int(times[0]), 'dt': encode_column(np.diff(times), 'int32')}
+
+def build_compact_payload(df):
+    """Columnar equivalent of build_chart_payload, aligned to the axis from build_time_axis.
+
+    Prices travel as float32, volume as float64 and the volume bar colors
+    as a 1-bit up/down flag the client expands from `colors`.
+    """
+    if not len(df):
+        return {'candles': {}, 'volume': {}}
+    candles = {col: encode_column(_float_column(df, col), 'float32') for col in ['open', 'high', 'low', 'close']}
+    volume = {
+        'value': encode_column(_float_column(df, 'volume'), 'float64'),
+        'up': encode_bits(bar_up(df)),
+        'colors': [COLOR_BEAR, COLOR_BULL],
+    }
+    return {'candles': candles, 'volume': volume}
+
+def build_compact_indicator_series(lines):
+    """float32 indicator values aligned to the shared axis; NaN marks gaps the client skips"""
+    return {label: {'value': encode_column(values, 'float32')} for label, values in lines.items()}
+
+def build_compact_signal_markers(df, direction_col):
+    """Row positions of LONG/SHORT signals and a 1-bit long flag, expanded with MARKER_STYLES on the client"""
+    if not direction_col:
+        return {}
+
+    direction = df[direction_col]
+    upper = direction.astype(str).str.upper().to_numpy()
+    present = direction.notna().to_numpy()
+    is_long = present & (upper == 'LONG')
+    signal_rows = np.flatnonzero(is_long | (present & (upper == 'SHORT')))
+    if not len(signal_rows):
+        return {}
+    return {'rows': encode_column(signal_rows, 'int32'), 'long': encode_bits(is_long[signal_rows]), 'styles': MARKER_STYLES}
@@ -0,0 +1,185 @@
+import re
+import statistics
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+
+import numpy as np
+from chatbot.query_engine import extract_filters
+from config.constants import ANSWER_CACHE_MAX_ENTRIES, ANSWER_CACHE_SIMILARITY, ANSWER_CACHE_TTL_SECONDS
+
+# Words that change how a question is phrased but not what it asks
+FILLER_WORDS = {
+    'a', 'an', 'the', 'is', 'are', 'was', 'were', 'be', 'what', 'whats', 'which', 'please', 'tell', 'me', 'us', 'show',
+    'give', 'can', 'could', 'would', 'you', 'i', 'we', 'do', 'does', 'did', 'of', 'for', 'in', 'on', 'at', 'to', 'about',
+    'tesla', 'tsla', 'stock', 's', 'current', 'currently', 'now', 'level', 'levels',
+}
+WORD_PATTERN = re.compile(r"[a-z0-9.]+")
+NUMBER_PATTERN = re.compile(r"\d+(?:\.\d+)?")
+# Words that flip what a question asks while barely moving its embedding, by the sense they carry.
+# Two questions only share an answer when they use the same senses.
+CONTRAST_WORDS = {
+    'above': 'above', 'over': 'above', 'exceed': 'above', 'exceeded': 'above',
+    'below': 'below', 'under': 'below', 'beneath': 'below',
+    'highest': 'max', 'maximum': 'max', 'max': 'max', 'peak': 'max', 'top': 'max', 'largest': 'max', 'biggest': 'max',
+    'lowest': 'min', 'minimum': 'min', 'min': 'min', 'bottom': 'min', 'smallest': 'min',
+    'higher': 'more', 'more': 'more', 'greater': 'more', 'most': 'more',
+    'lower': 'less', 'less': 'less', 'fewer': 'less', 'least': 'less',
+    'long': 'long', 'longs': 'long', 'bullish': 'long', 'buy': 'long', 'buys': 'long',
+    'short': 'short', 'shorts': 'short', 'bearish': 'short', 'sell': 'short', 'sells': 'short',
+    'support': 'support', 'supports': 'support', 'resistance': 'resistance', 'resistances': 'resistance',
+    'open': 'open', 'opening': 'open', 'close': 'close', 'closing': 'close', 'closed': 'close',
+    'start': 'start', 'beginning': 'start', 'first': 'start', 'earliest': 'start',
+    'end': 'end', 'last': 'end', 'latest': 'end', 'final': 'end',
+    'up': 'up', 'rise': 'up', 'rose': 'up', 'gain': 'up', 'gains': 'up', 'rally': 'up',
+    'down': 'down', 'fall': 'down', 'fell': 'down', 'drop': 'down', 'dropped': 'down', 'decline': 'down',
+    'average': 'average', 'mean': 'average', 'total': 'total', 'sum': 'total',
+}
+
+def normalize_question(question):
+    """Lowercase, drop punctuation and filler words, so rephrasings of one question share a key"""
+    words = WORD_PATTERN.findall(question.lower().replace("'", ''))
+    return ' '.join(word.strip('.') for word in words if word.strip('.') and word.strip('.') not in FILLER_WORDS)
+
+def question_facts(question):
+    """The specifics two questions must share to share an answer: numbers, year, month, signal direction
+    and the senses of their contrast words (above/below, highest/lowest, long/short, ...)"""
+    senses = {CONTRAST_WORDS[word] for word in WORD_PATTERN.findall(question.lower()) if word in CONTRAST_WORDS}
+    return (tuple(sorted(set(NUMBER_PATTERN.findall(question)))), tuple(sorted(extract_filters(question).items())),
+            tuple(sorted(senses)))
+
+@dataclass
+class CachedAnswer:
+    text: str
+    question: str
+    similarity: float
+
+class _Entry:
+    __slots__ = ('question', 'facts', 'vector', 'text', 'expires')
+
+    def __init__(self, question, facts, vector, text, expires):
+        self.question = question
+        self.facts = facts
+        self.vector = vector
+        self.text = text
+        self.expires = expires
+
+class AnswerCache:
+    """Per-dataset LLM answers, matched by normalized question and then by embedding similarity.
+
+    A lookup hits when a live entry of the same dataset has the same
+    normalized text, or shares the question's numbers, dates, direction
+    and contrast words and has cosine similarity of at least `threshold`.
+    Entries expire after `ttl_seconds` and the least recently used are
+    evicted past `max_entries`. Datasets are keyed by content hash only:
+    display names such as symbols repeat across uploads, and answers
+    about content nobody loads any more simply age out.
+    """
+
+    def __init__(self, embed=None, threshold=ANSWER_CACHE_SIMILARITY, ttl_seconds=ANSWER_CACHE_TTL_SECONDS,
+                 max_entries=ANSWER_CACHE_MAX_ENTRIES, clock=time.monotonic):
+        self._embed = embed
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.clock = clock
+        self.entries = OrderedDict()
+        self.counts = {'hits': 0, 'semantic_hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0, 'invalidated': 0}
+        self.first_token_s = deque(maxlen=1000)
+        self._lock = threading.Lock()
+
+    def embed(self, text):
+        if self._embed is None:
+            # Offline hashing keeps lookups free of provider calls; imported here so the app starts without LangChain
+            from chatbot.embeddings import LocalHashEmbeddings
+            self._embed = LocalHashEmbeddings().embed_query
+        return np.asarray(self._embed(text), dtype=np.float32)
+
+    def invalidate(self, dataset_key):
+        with self._lock:
+            stale = [key for key in self.entries if key[0] == dataset_key]
+            for key in stale:
+                del self.entries[key]
+            self.counts['invalidated'] += len(stale)
+        return len(stale)
+
+    def lookup(self, dataset_key, question):
+        normalized = normalize_question(question)
+        facts = question_facts(question)
+        vector = self.embed(normalized)
+        now = self.clock()
+        with self._lock:
+            best, best_similarity = None, self.threshold
+            for key, entry in list(self.entries.items()):
+                if entry.expires <= now:
+                    del self.entries[key]
+                    self.counts['expired'] += 1
+                    continue
+                if key[0] != dataset_key:
+                    continue
+                if key[1] == normalized:
+                    best, best_similarity = key, 1.0
+                    break
+                if entry.facts == facts:
+                    similarity = float(vector @ entry.vector)
+                    if similarity >= best_similarity:
+                        best, best_similarity = key, similarity
+            if best is None:
+                self.counts['misses'] += 1
+                return None
+            self.entries.move_to_end(best)
+            self.counts['hits'] += 1
+            self.counts['semantic_hits'] += best_similarity < 1.0
+            entry = self.entries[best]
+            return CachedAnswer(entry.text, entry.question, best_similarity)
+
+    def store(self, dataset_key, question, text):
+        normalized = normalize_question(question)
+        entry = _Entry(question, question_facts(question), self.embed(normalized), text, self.clock() + self.ttl_seconds)
+        with self._lock:
+            self.entries[(dataset_key, normalized)] = entry
+            self.entries.move_to_end((dataset_key, normalized))
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.counts['evictions'] += 1
+
+    def record_first_token(self, seconds):
+        with self._lock:
+            self.first_token_s.append(seconds)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.counts['hits'] + self.counts['misses']
+            first_token = sorted(self.first_token_s)
+            return {
+                'entries': len(self.entries),
+                **self.counts,
+                'hit_rate': round(self.counts['hits'] / lookups, 3) if lookups else 0.0,
+                'first_token_p50_ms': round(statistics.median(first_token) * 1000, 1) if first_token else None,
+                'first_token_p95_ms': round(first_token[int(0.95 * (len(first_token) - 1))] * 1000, 1) if first_token else None,
+            }
+
+def stream_and_store(cache, dataset_key, question, tokens):
+    """Pass `tokens` through as they arrive, recording time to first token and caching the full answer at the end.
+
+    An answer whose stream fails or is abandoned midway is not cached.
+    """
+    started = time.perf_counter()
+    parts = []
+    for token in tokens:
+        if not parts:
+            cache.record_first_token(time.perf_counter() - started)
+        parts.append(token)
+        yield token
+    if parts:
+        cache.store(dataset_key, question, ''.join(parts))
+
+_default_cache = None
+
+def get_answer_cache():
+    """Process-wide answer cache shared by every session"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = AnswerCache()
+    return _default_cache
@@ -1,51 +1,85 @@
-
 import os
+import re
 import pandas as pd
-from langchain_community.document_loaders import DataFrameLoader
-from langchain.text_splitter import CharacterTextSplitter
-from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
-from langchain_community.vectorstores import FAISS
-from langchain.chains import RetrievalQA
-from langchain_core.runnables import Runnable
+from chatbot.documents import build_window_documents
+from chatbot.embeddings import CachedEmbeddings, get_embedding_backend
+from chatbot.pipeline import EmbeddingPipeline
+from chatbot.retrieval import PartitionedRetriever, build_partitioned_index, prune_indexes
+from config.constants import CHATBOT_DOC_WINDOW, CHATBOT_INDEX_DIR, CHATBOT_INDEX_MAX_BYTES, CHATBOT_LLM
+from utils.profiling import instrument, stage
 
 
-import os
 from dotenv import load_dotenv
 
 # ✅ Load environment variables
 load_dotenv()
 
 # ✅ Access your Gemini API key
-os.environ["GOOGLE_API_KEY"] = os.getenv("GOOGLE_API_KEY")
-
-
-def build_chatbot(df: pd.DataFrame) -> Runnable:
+if os.getenv("GOOGLE_API_KEY"):
+    os.environ["GOOGLE_API_KEY"] = os.getenv("GOOGLE_API_KEY")
+
+# The prompt RetrievalQA's "stuff" chain used, so streamed answers read the same as before
+QA_PROMPT = """Use the following pieces of context to answer the question at the end. If you don't know the answer, just say that you don't know, don't try to make up an answer.
+
+{context}
+
+Question: {question}
+Helpful Answer:"""
+
+class RetrievalChat:
+    """Answer from the retrieved window summaries, streaming the LLM's tokens as they arrive"""
+
+    def __init__(self, llm, retriever, prompt=QA_PROMPT):
+        self.llm = llm
+        self.retriever = retriever
+        self.prompt = prompt
+
+    def stream(self, question):
+        documents = self.retriever.invoke(question)
+        context = "\n\n".join(document.page_content for document in documents)
+        for chunk in self.llm.stream(self.prompt.format(context=context, question=question)):
+            # Chat models yield message chunks; plain LLMs and the fake yield strings
+            text = getattr(chunk, 'content', chunk)
+            if text:
+                yield text
+
+    def invoke(self, inputs):
+        """RetrievalQA-compatible call: {"query": question} -> {"result": answer}"""
+        return {"result": "".join(self.stream(inputs["query"]))}
+
+def get_llm(name=CHATBOT_LLM):
+    """Build the configured chat model: 'google' (Gemini) or 'fake' (local streaming stand-in)"""
+    if name == 'fake':
+        from chatbot.fake_llm import FakeStreamingLLM
+        return FakeStreamingLLM()
+    if name == 'google':
+        from langchain_google_genai import ChatGoogleGenerativeAI
+        return ChatGoogleGenerativeAI(model="models/gemini-1.5-flash")
+    raise ValueError(f"Unknown chatbot LLM: {name}")
+
+@instrument('build_chatbot')
+def build_chatbot(df: pd.DataFrame, dataset_name: str = "default", progress=None) -> RetrievalChat:
     """Creates a QA chatbot using Gemini + FAISS vector store from Tesla trading data."""
-    df['row_summary'] = df.apply(lambda row: row.to_string(), axis=1)
-    print( df['row_summary'],"-----")
-    # Step 1: Load dataframe into LangChain documents
-    loader = DataFrameLoader(df, page_content_column="row_summary") 
-     # You can use 'summary' column too if you have
-    documents = loader.load()
-
-
-
-    # Step 2: Split documents into manageable chunks
-    splitter = CharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
-    chunks = splitter.split_documents(documents)
-
-
+    # Step 1: Summarize bars into one document per day/week/month window
+    with stage('chatbot_documents', rows=len(df)) as timed:
+        documents = build_window_documents(df, CHATBOT_DOC_WINDOW)
+        timed.bytes = sum(len(document.page_content) for document in documents) if timed.enabled else None
 
-    # Step 3: Embed chunks using Gemini embeddings
-    embeddings = GoogleGenerativeAIEmbeddings(model="models/embedding-001")
+    # Step 2: Window summaries are already small, so no further splitting is needed
 
-    # Step 4: Store in FAISS vector store
-    vectorstore = FAISS.from_documents(chunks, embeddings)
+    # Step 3: Embed new documents in concurrent, rate-limited batches; cached text is reused
+    embeddings = CachedEmbeddings(EmbeddingPipeline(get_embedding_backend(), progress=progress))
 
+    # Step 4: Load the dataset's year-month FAISS shards from disk and add only new documents.
+    # Keyed by dataset name so an appended file updates its index in place; other indexes are pruned to a byte budget
+    index_dir = os.path.join(CHATBOT_INDEX_DIR, re.sub(r"[^A-Za-z0-9_.-]+", "_", dataset_name))
+    with stage('chatbot_embed_index', rows=len(documents)) as timed:
+        shards = build_partitioned_index(documents, embeddings, index_dir)
+        timed.cache = f"{embeddings.hits} hit / {embeddings.misses} miss"
+    prune_indexes(CHATBOT_INDEX_DIR, CHATBOT_INDEX_MAX_BYTES, keep=[index_dir])
 
-    # Step 5: Create retriever-based QA chain with Gemini LLM
-    llm = ChatGoogleGenerativeAI(model="models/gemini-1.5-flash")
-    retriever = vectorstore.as_retriever()
-    qa_chain = RetrievalQA.from_chain_type(llm=llm, retriever=retriever)
 
-    return qa_chain
+    # Step 5: Create the retrieval chat over the configured LLM
+    # Searches only the shards inside the date range the question mentions
+    retriever = PartitionedRetriever(shards=shards, embeddings=embeddings)
+    return RetrievalChat(get_llm(), retriever)
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+from langchain_core.documents import Document
+from utils.helpers import bar_timestamps
+
+WINDOW_LABELS = {'D': 'Day', 'W': 'Week', 'M': 'Month'}
+
+def choose_window(df, min_bars_per_document=10):
+    """Pick the finest of day/week/month windows that averages at least `min_bars_per_document` bars"""
+    for window in WINDOW_LABELS:
+        periods = bar_timestamps(df).dt.to_period(window).nunique()
+        if periods and len(df) / periods >= min_bars_per_document:
+            return window
+    return 'M'
+
+def _fmt_price(values):
+    return values.map('{:,.2f}'.format).where(values.notna(), 'n/a')
+
+def summarize_windows(df, window):
+    """Aggregate bars into one row per day/week/month window"""
+    timestamps = bar_timestamps(df)
+    direction = df['direction'].astype(str).str.upper() if 'direction' in df.columns else pd.Series('NEUTRAL', index=df.index)
+    frame = pd.DataFrame({
+        'timestamp': timestamps,
+        'open': df['open'],
+        'high': df['high'],
+        'low': df['low'],
+        'close': df['close'],
+        'volume': df['volume'],
+        'long': (direction == 'LONG').to_numpy(),
+        'short': (direction == 'SHORT').to_numpy(),
+    })
+    for col in ['support_min', 'support_max', 'resistance_min', 'resistance_max']:
+        frame[col] = pd.to_numeric(df[col], errors='coerce') if col in df.columns else np.nan
+
+    summary = frame.groupby(timestamps.dt.to_period(window).rename('period'), sort=True).agg(
+        start=('timestamp', 'min'),
+        end=('timestamp', 'max'),
+        bars=('close', 'size'),
+        open=('open', 'first'),
+        high=('high', 'max'),
+        low=('low', 'min'),
+        close=('close', 'last'),
+        volume_total=('volume', 'sum'),
+        volume_avg=('volume', 'mean'),
+        long_signals=('long', 'sum'),
+        short_signals=('short', 'sum'),
+        support_min=('support_min', 'min'),
+        support_max=('support_max', 'max'),
+        resistance_min=('resistance_min', 'min'),
+        resistance_max=('resistance_max', 'max'),
+    )
+    return summary.reset_index()
+
+def render_window_text(summary, window):
+    """Render every summary row to text with vectorized string operations"""
+    label = WINDOW_LABELS[window]
+    return (
+        f"TSLA {label} " + summary['period'].astype(str)
+        + " (" + summary['start'].dt.strftime('%Y-%m-%d %H:%M') + " to " + summary['end'].dt.strftime('%Y-%m-%d %H:%M') + ")"
+        + "\nBars: " + summary['bars'].astype(str)
+        + "\nOpen: " + _fmt_price(summary['open']) + ", High: " + _fmt_price(summary['high'])
+        + ", Low: " + _fmt_price(summary['low']) + ", Close: " + _fmt_price(summary['close'])
+        + "\nTotal volume: " + summary['volume_total'].map('{:,.0f}'.format)
+        + ", Average volume: " + summary['volume_avg'].map('{:,.0f}'.format)
+        + "\nLONG signals: " + summary['long_signals'].astype(str)
+        + ", SHORT signals: " + summary['short_signals'].astype(str)
+        + "\nSupport range: " + _fmt_price(summary['support_min']) + " - " + _fmt_price(summary['support_max'])
+        + "\nResistance range: " + _fmt_price(summary['resistance_min']) + " - " + _fmt_price(summary['resistance_max'])
+    )
+
+def build_window_documents(df, window='auto'):
+    """Build one summary document per day/week/month window with time-range metadata"""
+    if window == 'auto':
+        window = choose_window(df)
+    summary = summarize_windows(df, window)
+    texts = render_window_text(summary, window).tolist()
+    starts = summary['start']
+    metadata = pd.DataFrame({
+        'window': window,
+        'period': summary['period'].astype(str),
+        'start': starts.dt.strftime('%Y-%m-%dT%H:%M:%S'),
+        'end': summary['end'].dt.strftime('%Y-%m-%dT%H:%M:%S'),
+        'year': starts.dt.year,
+        'month': starts.dt.month,
+        'bars': summary['bars'],
+        'long_signals': summary['long_signals'].astype(int),
+        'short_signals': summary['short_signals'].astype(int),
+    }).to_dict('records')
+    return [Document(page_content=text, metadata=meta) for text, meta in zip(texts, metadata)]
@@ -0,0 +1,135 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from chatbot.pipeline import EmbeddingPipeline, RateLimitError
+from config.constants import EMBEDDING_BACKEND, EMBEDDING_CACHE_PATH, EMBEDDING_SERVER_URL
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9_.\-]+")
+
+class LocalHashEmbeddings(Embeddings):
+    """Deterministic offline embedder using signed feature hashing of word tokens"""
+
+    def __init__(self, dimensions=384):
+        self.dimensions = dimensions
+        self.model = f'local-hash-{dimensions}'
+
+    def _embed(self, text):
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for token in TOKEN_PATTERN.findall(text.lower()):
+            digest = int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), 'little')
+            vector[digest % self.dimensions] += 1.0 if digest >> 63 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+class HttpEmbeddings(Embeddings):
+    """Client for a JSON embedding endpoint such as chatbot/fake_embedding_server.py"""
+
+    def __init__(self, url=EMBEDDING_SERVER_URL, timeout=30):
+        self.url = url
+        self.timeout = timeout
+        self.model = f'http:{url}'
+
+    def embed_documents(self, texts):
+        request = urllib.request.Request(
+            self.url, data=json.dumps({'texts': list(texts)}).encode(), headers={'Content-Type': 'application/json'}
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())['embeddings']
+        except urllib.error.HTTPError as error:
+            if error.code == 429:
+                retry_after = error.headers.get('Retry-After')
+                raise RateLimitError(f'429 from {self.url}', float(retry_after) if retry_after else None) from error
+            raise
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+class CachedEmbeddings(Embeddings):
+    """Wrap an embedding backend with a SQLite cache keyed by a hash of model name and text.
+
+    Only texts missing from the cache reach the backend, so re-embedding an
+    unchanged corpus costs no backend calls.
+    """
+
+    def __init__(self, backend, path=EMBEDDING_CACHE_PATH):
+        self.backend = backend
+        self.model = getattr(backend, 'model', type(backend).__name__)
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute('CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB)')
+        self.hits = 0
+        self.misses = 0
+
+    def text_key(self, text):
+        return hashlib.sha256(f'{self.model}\0{text}'.encode()).hexdigest()
+
+    def lookup(self, keys):
+        """Return {key: vector} for the keys already cached"""
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                rows = self._conn.execute(
+                    f'SELECT key, vector FROM embeddings WHERE key IN ({",".join("?" * len(batch))})', batch
+                ).fetchall()
+                found.update((key, np.frombuffer(blob, dtype=np.float32).tolist()) for key, blob in rows)
+        return found
+
+    def store(self, keys, vectors):
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)',
+                [(key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in zip(keys, vectors)]
+            )
+
+    def store_texts(self, texts, vectors):
+        self.store([self.text_key(text) for text in texts], vectors)
+
+    def embed_documents(self, texts):
+        keys = [self.text_key(text) for text in texts]
+        cached = self.lookup(list(set(keys)))
+        missing = list(dict.fromkeys(key for key in keys if key not in cached))
+        if missing:
+            text_by_key = dict(zip(keys, texts))
+            missing_texts = [text_by_key[key] for key in missing]
+            if isinstance(self.backend, EmbeddingPipeline):
+                # Store each batch as it lands so an interrupted run resumes where it stopped
+                vectors = self.backend.embed_documents(missing_texts, on_batch=self.store_texts)
+            else:
+                vectors = self.backend.embed_documents(missing_texts)
+                self.store(missing, vectors)
+            cached.update(zip(missing, [list(map(float, vector)) for vector in vectors]))
+        self.hits += len(keys) - len(missing)
+        self.misses += len(missing)
+        return [cached[key] for key in keys]
+
+    def embed_query(self, text):
+        return self.backend.embed_query(text)
+
+def get_embedding_backend(name=EMBEDDING_BACKEND):
+    """Build the configured embedding backend: 'google' (Gemini), 'http' (JSON endpoint) or 'local' (offline hashing)"""
+    if name == 'local':
+        return LocalHashEmbeddings()
+    if name == 'http':
+        return HttpEmbeddings()
+    if name == 'google':
+        from langchain_google_genai import GoogleGenerativeAIEmbeddings
+        return GoogleGenerativeAIEmbeddings(model="models/embedding-001")
+    raise ValueError(f"Unknown embedding backend: {name}")
@@ -0,0 +1,89 @@
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+from chatbot.answer_cache import AnswerCache, stream_and_store
+from chatbot.chatbot import RetrievalChat
+from chatbot.documents import build_window_documents
+from chatbot.embeddings import CachedEmbeddings, LocalHashEmbeddings
+from chatbot.fake_llm import FakeStreamingLLM
+from chatbot.retrieval import PartitionedRetriever, build_partitioned_index
+from data.ingest import stream_clean_csv
+
+# (question, paraphrases that should reuse its answer, near-misses that must not)
+QUESTION_FAMILIES = [
+    ("How did TSLA trade in March {year}?",
+     ["how did tesla trade in march {year}", "In March {year}, how did TSLA trade?"],
+     ["How did TSLA trade in April {year}?", "How did TSLA trade in March {other_year}?"]),
+    ("Summarize the LONG signals in {year}",
+     ["Please summarize the LONG signals in {year}.", "summarize long signals {year}"],
+     ["Summarize the SHORT signals in {year}"]),
+    ("What was the trend at the end of {year}?",
+     ["What's the trend at the end of {year}?"],
+     ["What was the trend at the start of {year}?"]),
+    ("What was the highest close in {year}?",
+     ["what was the highest close in {year}", "In {year}, what was the highest close?"],
+     ["What was the lowest close in {year}?", "What was the highest open in {year}?"]),
+    ("How often did TSLA close above the resistance in {year}?",
+     ["How often did tesla close above the resistance in {year}?"],
+     ["How often did TSLA close below the resistance in {year}?",
+      "How often did TSLA close above the support in {year}?"]),
+]
+
+def workload(years, repeats):
+    """Each question asked `repeats` times, then its paraphrases, then its near-misses"""
+    questions = []
+    for year in years:
+        # A year outside the data, so a near-miss never repeats a question asked for another year
+        fill = {'year': year, 'other_year': year + len(years)}
+        for question, paraphrases, near_misses in QUESTION_FAMILIES:
+            questions += [(question.format(**fill), 'repeat')] * repeats
+            questions += [(text.format(**fill), 'paraphrase') for text in paraphrases]
+            questions += [(text.format(**fill), 'near_miss') for text in near_misses]
+    return questions
+
+def run(chat, cache, dataset_key, questions):
+    served = {'hit': [], 'miss': []}
+    outcomes = {}
+    for question, kind in questions:
+        started = time.perf_counter()
+        cached = cache.lookup(dataset_key, question)
+        if cached is None:
+            ''.join(stream_and_store(cache, dataset_key, question, chat.stream(question)))
+        served['hit' if cached else 'miss'].append((time.perf_counter() - started) * 1000)
+        outcome = outcomes.setdefault(kind, {'hits': 0, 'questions': 0})
+        outcome['hits'] += cached is not None
+        outcome['questions'] += 1
+    return {
+        **cache.stats(),
+        'by_kind': outcomes,
+        'hit_p50_ms': round(float(np.percentile(served['hit'], 50)), 3) if served['hit'] else None,
+        'miss_p50_ms': round(float(np.percentile(served['miss'], 50)), 1) if served['miss'] else None,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Replay repeated, paraphrased and near-miss questions through the answer cache with a fake LLM.')
+    parser.add_argument('csv')
+    parser.add_argument('--window', default='auto', help="document window: 'D', 'W', 'M' or 'auto'")
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--threshold', type=float, default=None, help='similarity threshold (default from config)')
+    parser.add_argument('--first-token-latency', type=float, default=0.4)
+    parser.add_argument('--token-latency', type=float, default=0.02)
+    args = parser.parse_args(argv)
+
+    df, _ = stream_clean_csv(args.csv)
+    documents = build_window_documents(df, args.window)
+    embeddings = CachedEmbeddings(LocalHashEmbeddings(), path=':memory:')
+    retriever = PartitionedRetriever(shards=build_partitioned_index(documents, embeddings), embeddings=embeddings)
+    chat = RetrievalChat(FakeStreamingLLM(args.first_token_latency, args.token_latency), retriever)
+    cache = AnswerCache() if args.threshold is None else AnswerCache(threshold=args.threshold)
+
+    years = sorted({int(document.metadata['year']) for document in documents})
+    report = run(chat, cache, 'eval', workload(years, args.repeats))
+    print(json.dumps({'documents': len(documents), 'threshold': cache.threshold, **report}, indent=2))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
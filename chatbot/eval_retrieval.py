@@ -0,0 +1,89 @@
+import argparse
+import json
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from langchain_community.vectorstores import FAISS
+from chatbot.documents import build_window_documents
+from chatbot.embeddings import CachedEmbeddings, LocalHashEmbeddings
+from chatbot.retrieval import PartitionedRetriever, build_partitioned_index
+from data.ingest import stream_clean_csv
+
+QUESTION_TEMPLATES = [
+    ("How did TSLA trade in {month_name} {year}?", 'month'),
+    ("What was the closing range in {month_name} {year}?", 'month'),
+    ("Were there LONG signals in {month_name} {year}?", 'month'),
+    ("Summarize the SHORT signals in {year}", 'year'),
+]
+
+
+def labeled_questions(documents, limit=40, seed=7):
+    """Generate questions whose relevant documents are known from window metadata"""
+    periods = sorted({(doc.metadata['year'], doc.metadata['month']) for doc in documents})
+    rng = np.random.default_rng(seed)
+    picks = rng.choice(len(periods), size=min(limit, len(periods)), replace=False)
+    questions = []
+    for i, pick in enumerate(sorted(picks)):
+        year, month = periods[pick]
+        template, scope = QUESTION_TEMPLATES[i % len(QUESTION_TEMPLATES)]
+        month_name = pd.Timestamp(2000, month, 1).strftime('%B')
+        questions.append({
+            'question': template.format(year=year, month_name=month_name),
+            'year': year,
+            'month': month if scope == 'month' else None,
+        })
+    return questions
+
+
+def is_relevant(document, label):
+    if document.metadata['year'] != label['year']:
+        return False
+    return label['month'] is None or document.metadata['month'] == label['month']
+
+
+def evaluate(search, questions, repeats=5):
+    latencies, precisions = [], []
+    for label in questions:
+        for _ in range(repeats):
+            started = time.perf_counter()
+            documents = search(label['question'])
+            latencies.append((time.perf_counter() - started) * 1000)
+        precisions.append(sum(is_relevant(doc, label) for doc in documents) / len(documents) if documents else 0.0)
+    return {
+        'precision_at_k': round(float(np.mean(precisions)), 3),
+        'p50_ms': round(float(np.percentile(latencies, 50)), 3),
+        'p95_ms': round(float(np.percentile(latencies, 95)), 3),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare flat and year-month partitioned retrieval on a labeled question set.')
+    parser.add_argument('csv')
+    parser.add_argument('--window', default='D', help="document window: 'D', 'W', 'M' or 'auto'")
+    parser.add_argument('--k', type=int, default=4)
+    parser.add_argument('--questions', type=int, default=40)
+    args = parser.parse_args(argv)
+
+    df, _ = stream_clean_csv(args.csv)
+    documents = build_window_documents(df, args.window)
+    embeddings = CachedEmbeddings(LocalHashEmbeddings(), path=':memory:')
+    questions = labeled_questions(documents, args.questions)
+
+    flat = FAISS.from_documents(documents, embeddings)
+    partitioned = PartitionedRetriever(shards=build_partitioned_index(documents, embeddings), embeddings=embeddings, k=args.k)
+
+    report = {
+        'documents': len(documents),
+        'shards': len(partitioned.shards),
+        'questions': len(questions),
+        'flat': evaluate(lambda q: flat.similarity_search(q, k=args.k), questions),
+        'partitioned': evaluate(lambda q: partitioned.search(q)[0], questions),
+    }
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
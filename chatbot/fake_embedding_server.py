@@ -0,0 +1,77 @@
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from chatbot.embeddings import LocalHashEmbeddings
+
+class FakeEmbeddingHandler(BaseHTTPRequestHandler):
+    """POST /embed {"texts": [...]} -> {"embeddings": [...]}, with simulated latency and 429s"""
+
+    def do_POST(self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            request_number = server.requests
+        payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+
+        rate_limited = (server.rate_limit_every and request_number % server.rate_limit_every == 0) \
+            or random.random() < server.rate_limit_probability
+        if rate_limited:
+            with server.lock:
+                server.rejected += 1
+            self.send_response(429)
+            self.send_header('Retry-After', str(server.retry_after))
+            self.end_headers()
+            return
+
+        time.sleep(server.latency + server.latency_per_text * len(payload['texts']))
+        body = json.dumps({'embeddings': server.embedder.embed_documents(payload['texts'])}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_fake_server(port=0, latency=0.05, latency_per_text=0.0005, rate_limit_every=0,
+                      rate_limit_probability=0.0, retry_after=0.1):
+    """Start the fake embedding server on a daemon thread; returns (server, url)"""
+    server = ThreadingHTTPServer(('127.0.0.1', port), FakeEmbeddingHandler)
+    server.embedder = LocalHashEmbeddings()
+    server.lock = threading.Lock()
+    server.requests = 0
+    server.rejected = 0
+    server.latency = latency
+    server.latency_per_text = latency_per_text
+    server.rate_limit_every = rate_limit_every
+    server.rate_limit_probability = rate_limit_probability
+    server.retry_after = retry_after
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}/embed'
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Local embedding server that simulates latency and 429s.')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds per request')
+    parser.add_argument('--latency-per-text', type=float, default=0.0005, help='extra seconds per text')
+    parser.add_argument('--rate-limit-every', type=int, default=0, help='answer every Nth request with 429')
+    parser.add_argument('--rate-limit-probability', type=float, default=0.0)
+    parser.add_argument('--retry-after', type=float, default=0.1)
+    args = parser.parse_args(argv)
+
+    server, url = start_fake_server(args.port, args.latency, args.latency_per_text, args.rate_limit_every,
+                                    args.rate_limit_probability, args.retry_after)
+    print(f'Fake embedding server listening on {url}')
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
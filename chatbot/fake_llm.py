@@ -0,0 +1,32 @@
+import time
+
+class FakeStreamingLLM:
+    """Offline stand-in for the chat model: streams a deterministic answer word by word with simulated latency.
+
+    The answer quotes the first retrieved context line, so retrieval
+    still shapes the output.
+    """
+
+    def __init__(self, first_token_latency=0.4, token_latency=0.02):
+        self.first_token_latency = first_token_latency
+        self.token_latency = token_latency
+        self.calls = 0
+
+    def answer(self, prompt):
+        context, _, question = prompt.partition('\nQuestion: ')
+        lines = [line for line in context.splitlines()[1:] if line.strip()]
+        question = question.split('\n', 1)[0]
+        evidence = lines[0] if lines else "no matching context"
+        return f"For \"{question}\", the closest data says: {evidence}"
+
+    def stream(self, prompt):
+        self.calls += 1
+        time.sleep(self.first_token_latency)
+        words = self.answer(prompt).split(' ')
+        for index, word in enumerate(words):
+            if index:
+                time.sleep(self.token_latency)
+            yield word if index == len(words) - 1 else word + ' '
+
+    def invoke(self, prompt):
+        return ''.join(self.stream(prompt))
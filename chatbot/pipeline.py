@@ -0,0 +1,155 @@
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from langchain_core.embeddings import Embeddings
+from config.constants import (EMBEDDING_BATCH_CHARS, EMBEDDING_BATCH_SIZE, EMBEDDING_CONCURRENCY,
+                              EMBEDDING_MAX_RETRIES, EMBEDDING_REQUESTS_PER_SECOND)
+
+class RateLimitError(Exception):
+    """Raised by embedding backends when the provider answers 429"""
+
+    def __init__(self, message='rate limited', retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+def is_rate_limited(error):
+    """Recognise 429s from our HTTP client and from provider SDK exceptions, by status code or exception type"""
+    if isinstance(error, RateLimitError):
+        return True
+    status = getattr(error, 'status_code', None) or getattr(error, 'code', None)
+    response = getattr(error, 'response', None)
+    if status is None and response is not None:
+        status = getattr(response, 'status_code', None)
+    return status == 429 or type(error).__name__ in ('ResourceExhausted', 'TooManyRequests')
+
+class TokenBucket:
+    """Thread-safe token bucket whose rate backs off on 429s and recovers on success"""
+
+    def __init__(self, rate, capacity=None):
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_for = (1 - self.tokens) / self.rate
+            time.sleep(wait_for)
+
+    def throttle(self):
+        with self._lock:
+            self.rate = max(self.max_rate / 16, self.rate / 2)
+
+    def recover(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate * 1.1)
+
+def make_batches(texts, batch_size, max_chars):
+    """Split texts into batches bounded by both item count and total characters"""
+    batches, current, chars = [], [], 0
+    for index, text in enumerate(texts):
+        if current and (len(current) >= batch_size or chars + len(text) > max_chars):
+            batches.append(current)
+            current, chars = [], 0
+        current.append(index)
+        chars += len(text)
+    if current:
+        batches.append(current)
+    return batches
+
+class EmbeddingPipeline(Embeddings):
+    """Embed documents in bounded batches across a thread pool with rate limiting and retries.
+
+    ``on_batch(texts, vectors)`` runs as each batch completes, so a cache
+    wired to it acts as a checkpoint: a rerun after a failure only embeds
+    the batches that never finished. ``progress(done, total, docs_per_sec)``
+    is always called from the submitting thread, which keeps it safe for
+    Streamlit elements.
+    """
+
+    def __init__(self, backend, batch_size=EMBEDDING_BATCH_SIZE, max_concurrency=EMBEDDING_CONCURRENCY,
+                 requests_per_second=EMBEDDING_REQUESTS_PER_SECOND, max_retries=EMBEDDING_MAX_RETRIES,
+                 max_batch_chars=EMBEDDING_BATCH_CHARS, base_delay=0.5, progress=None):
+        self.backend = backend
+        self.model = getattr(backend, 'model', type(backend).__name__)
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.max_batch_chars = max_batch_chars
+        self.base_delay = base_delay
+        self.bucket = TokenBucket(requests_per_second)
+        self.progress = progress
+        self.stats = {'docs': 0, 'batches': 0, 'retries': 0, 'rate_limited': 0, 'seconds': 0.0}
+        # Retries are counted on worker threads, so every stats update holds this lock
+        self._stats_lock = threading.Lock()
+
+    def _count(self, **increments):
+        with self._stats_lock:
+            for name, value in increments.items():
+                self.stats[name] += value
+
+    def _embed_batch(self, texts):
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            try:
+                vectors = self.backend.embed_documents(texts)
+                self.bucket.recover()
+                return vectors
+            except Exception as error:
+                if not is_rate_limited(error) or attempt == self.max_retries:
+                    raise
+                self._count(rate_limited=1, retries=1)
+                self.bucket.throttle()
+                delay = getattr(error, 'retry_after', None) or self.base_delay * 2 ** attempt
+                time.sleep(delay * (1 + random.random() * 0.25))
+
+    def embed_documents(self, texts, on_batch=None):
+        texts = list(texts)
+        vectors = [None] * len(texts)
+        batches = make_batches(texts, self.batch_size, self.max_batch_chars)
+        started = time.perf_counter()
+        done = 0
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            # Keep at most 2x concurrency batches in flight so memory stays bounded
+            pending = {}
+            queue = iter(batches)
+            for batch in queue:
+                pending[executor.submit(self._embed_batch, [texts[i] for i in batch])] = batch
+                if len(pending) >= self.max_concurrency * 2:
+                    break
+            while pending:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    batch = pending.pop(future)
+                    batch_vectors = future.result()
+                    for i, vector in zip(batch, batch_vectors):
+                        vectors[i] = vector
+                    if on_batch:
+                        on_batch([texts[i] for i in batch], batch_vectors)
+                    done += len(batch)
+                    self._count(batches=1)
+                    if self.progress:
+                        elapsed = time.perf_counter() - started
+                        self.progress(done, len(texts), done / elapsed if elapsed else 0.0)
+                    next_batch = next(queue, None)
+                    if next_batch is not None:
+                        pending[executor.submit(self._embed_batch, [texts[i] for i in next_batch])] = next_batch
+
+        self._count(docs=len(texts), seconds=time.perf_counter() - started)
+        return vectors
+
+    def embed_query(self, text):
+        self.bucket.acquire()
+        return self.backend.embed_query(text)
@@ -0,0 +1,315 @@
+import re
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from utils.helpers import bar_timestamps
+from utils.level_index import LevelIndex
+
+MONTHS = {
+    'january': 1, 'february': 2, 'march': 3, 'april': 4, 'may': 5, 'june': 6,
+    'july': 7, 'august': 8, 'september': 9, 'october': 10, 'november': 11, 'december': 12,
+}
+MONTH_ABBREVIATIONS = {name[:3]: number for name, number in MONTHS.items()}
+
+YEAR_PATTERN = re.compile(r'\b((?:19|20)\d{2})\b')
+# "may" is far more often the verb, so it only names the month next to a year or after "in"/"of"
+MONTH_PATTERN = re.compile(r'\b(' + '|'.join(name for name in list(MONTHS) + list(MONTH_ABBREVIATIONS) if name != 'may') + r')\b'
+                           r'|\b(?:in|of)\s+(may)\b|\b(may)(?=\s+(?:19|20)\d{2}\b)|(?<=\b(?:19|20)\d{2}\s)(may)\b')
+DIRECTION_PATTERN = re.compile(r'\b(long|short|neutral)\b')
+COUNT_PATTERN = re.compile(r'\bhow many\b|\bnumber of\b|\bcount\b')
+SIGNAL_PATTERN = re.compile(r'\bsignals?\b')
+# Conditions and ranges the index cannot apply; answering without them would be confidently wrong
+CONDITION_PATTERN = re.compile(r'\b(above|below|under|over|exceed\w*|greater|less|more|fewer|higher|lower|at least|at most)\b')
+OUTCOME_PATTERN = re.compile(r'\b(profit\w*|loss\w*|losing|win\w*|returns?|pnl|gain\w*|drawdown)\b')
+RANGE_PATTERN = re.compile(
+    r'\b(last|past|previous|this|recent)\s+(\d+\s+)?(days?|weeks?|months?|years?|quarters?|sessions?)\b'
+    r'|\b(between|since|until|till|before|after|ytd|yesterday|today)\b|\byear to date\b|\bfrom\b.*\b(to|through)\b'
+)
+# The engine returns values, not the dates they occurred on
+WHEN_PATTERN = re.compile(r'\b(which|what)\s+(day|date|week|month|year|session|time)\b|\bwhen\b')
+LEVEL_KIND_PATTERN = re.compile(r'\b(support|resistance)\b')
+NEAREST_PATTERN = re.compile(r'\b(nearest|closest|next)\b')
+STRONGEST_PATTERN = re.compile(r'\b(strongest|strong|key|major|top)\b')
+# A reference price such as "below $250" or "near 180.5"; otherwise the last close is used
+PRICE_PATTERN = re.compile(r'\b(below|under|above|over|near|around)\s+\$?(\d+(?:\.\d+)?)')
+LEVELS_LISTED = 5
+
+AGGREGATE_WORDS = [
+    ('mean', re.compile(r'\b(average|avg|mean)\b')),
+    ('sum', re.compile(r'\b(total|sum)\b')),
+    ('max', re.compile(r'\b(highest|max|maximum|largest|biggest|peak)\b')),
+    ('min', re.compile(r'\b(lowest|min|minimum|smallest)\b')),
+]
+METRIC_WORDS = [
+    ('resistance', re.compile(r'\bresistance\b')),
+    ('support', re.compile(r'\bsupport\b')),
+    ('volume', re.compile(r'\bvolume\b')),
+    ('close', re.compile(r'\bclos(e|ing)\b')),
+    ('open', re.compile(r'\bopen(ing)?\b')),
+    ('price', re.compile(r'\bprice\b')),
+]
+
+# (metric, aggregate) -> (column in the grouped index, how groups combine)
+METRIC_COLUMNS = {
+    ('volume', 'mean'): ('volume', 'mean'),
+    ('volume', 'sum'): ('volume', 'sum'),
+    ('volume', 'max'): ('volume_max', 'max'),
+    ('volume', 'min'): ('volume_min', 'min'),
+    ('close', 'mean'): ('close', 'mean'),
+    ('close', 'max'): ('close_max', 'max'),
+    ('close', 'min'): ('close_min', 'min'),
+    ('open', 'mean'): ('open', 'mean'),
+    ('price', 'mean'): ('close', 'mean'),
+    ('price', 'max'): ('high_max', 'max'),
+    ('price', 'min'): ('low_min', 'min'),
+    ('resistance', 'max'): ('resistance_max', 'max'),
+    ('resistance', 'min'): ('resistance_min', 'min'),
+    ('support', 'max'): ('support_max', 'max'),
+    ('support', 'min'): ('support_min', 'min'),
+}
+
+@dataclass
+class ParsedQuery:
+    kind: str
+    metric: Optional[str] = None
+    aggregate: Optional[str] = None
+    direction: Optional[str] = None
+    year: Optional[int] = None
+    month: Optional[int] = None
+    per_day: bool = False
+    signals: bool = True
+    price: Optional[float] = None
+    side: Optional[str] = None
+
+@dataclass
+class QueryAnswer:
+    text: str
+    path: str
+    value: Optional[float] = None
+    elapsed_ms: float = 0.0
+
+def extract_filters(question):
+    """Pull the year, month and signal direction mentioned in a question"""
+    text = question.lower()
+    year_match = YEAR_PATTERN.search(text)
+    month_match = MONTH_PATTERN.search(text)
+    direction_match = DIRECTION_PATTERN.search(text)
+    month = None
+    if month_match:
+        word = next(group for group in month_match.groups() if group)
+        month = MONTHS.get(word) or MONTH_ABBREVIATIONS[word[:3]]
+    return {
+        'year': int(year_match.group(1)) if year_match else None,
+        'month': month,
+        'direction': direction_match.group(1).upper() if direction_match else None,
+    }
+
+def has_unparsed_scope(text):
+    """Whether a question names a range or several years, months or directions that a single filter cannot hold"""
+    months = {next(group for group in match.groups() if group)[:3] for match in MONTH_PATTERN.finditer(text)}
+    return (RANGE_PATTERN.search(text) is not None or len(set(YEAR_PATTERN.findall(text))) > 1
+            or len(months) > 1 or len(set(DIRECTION_PATTERN.findall(text))) > 1)
+
+def parse_question(question):
+    """Parse the aggregate question shapes the engine can answer; None means fall through.
+
+    Questions with a condition, outcome or range the indexes cannot apply
+    also fall through, rather than being answered without it.
+    """
+    text = question.lower()
+    filters = extract_filters(question)
+    if has_unparsed_scope(text) or WHEN_PATTERN.search(text):
+        return None
+
+    if COUNT_PATTERN.search(text):
+        if CONDITION_PATTERN.search(text) or OUTCOME_PATTERN.search(text):
+            return None
+        signals = filters['direction'] is not None or SIGNAL_PATTERN.search(text) is not None
+        per_day = bool(re.search(r'\bdays?\b', text))
+        # Without a signal or direction only whole days and bars can be counted; trades need the backtest
+        if not signals and not (per_day or re.search(r'\bbars?\b', text)):
+            return None
+        return ParsedQuery('count', per_day=per_day, signals=signals, **filters)
+
+    level_kind = LEVEL_KIND_PATTERN.search(text)
+    if level_kind and (NEAREST_PATTERN.search(text) or STRONGEST_PATTERN.search(text)):
+        price_match = PRICE_PATTERN.search(text)
+        side = re.search(r'\b(below|under|above|over)\b', text)
+        return ParsedQuery(
+            'nearest' if NEAREST_PATTERN.search(text) else 'strongest', metric=level_kind.group(1),
+            price=float(price_match.group(2)) if price_match else None,
+            side=None if side is None else ('below' if side.group(1) in ('below', 'under') else 'above'),
+            **filters,
+        )
+
+    if CONDITION_PATTERN.search(text) or OUTCOME_PATTERN.search(text):
+        return None
+    aggregate = next((name for name, pattern in AGGREGATE_WORDS if pattern.search(text)), None)
+    metric = next((name for name, pattern in METRIC_WORDS if pattern.search(text)), None)
+    if aggregate is None or (metric, aggregate) not in METRIC_COLUMNS:
+        return None
+    return ParsedQuery('aggregate', metric=metric, aggregate=aggregate, **filters)
+
+class AnalyticIndex:
+    """Per (year, month, direction) partial aggregates that any filter combination can be folded from"""
+
+    def __init__(self, df):
+        timestamps = bar_timestamps(df)
+        keys = pd.DataFrame({
+            'year': timestamps.dt.year.to_numpy(),
+            'month': timestamps.dt.month.to_numpy(),
+            'direction': df['direction'].astype(str).str.upper().to_numpy() if 'direction' in df.columns else 'NEUTRAL',
+            'day': timestamps.dt.normalize().to_numpy(),
+        })
+        for col in ['open', 'close', 'volume', 'high', 'low', 'support_min', 'support_max', 'resistance_min', 'resistance_max']:
+            keys[col] = pd.to_numeric(df[col], errors='coerce').to_numpy(dtype=np.float64) if col in df.columns else np.nan
+
+        grouped = keys.groupby(['year', 'month', 'direction'], sort=True)
+        self.groups = grouped.agg(
+            rows=('close', 'size'),
+            days=('day', 'nunique'),
+            volume_sum=('volume', 'sum'),
+            volume_count=('volume', 'count'),
+            volume_max=('volume', 'max'),
+            volume_min=('volume', 'min'),
+            close_sum=('close', 'sum'),
+            close_count=('close', 'count'),
+            close_max=('close', 'max'),
+            close_min=('close', 'min'),
+            open_sum=('open', 'sum'),
+            open_count=('open', 'count'),
+            high_max=('high', 'max'),
+            low_min=('low', 'min'),
+            support_min=('support_min', 'min'),
+            support_max=('support_max', 'max'),
+            resistance_min=('resistance_min', 'min'),
+            resistance_max=('resistance_max', 'max'),
+        ).reset_index()
+        # Distinct days regardless of direction, for "how many days" without a signal filter
+        self.days = keys.groupby(['year', 'month'], sort=True)['day'].nunique().reset_index()
+        # Distinct days with any signal; summing the per-direction counts would count a LONG-and-SHORT day twice
+        signals = keys[keys['direction'] != 'NEUTRAL']
+        self.signal_days = signals.groupby(['year', 'month'], sort=True)['day'].nunique().reset_index()
+
+    def select(self, table, year=None, month=None, direction=None):
+        mask = np.ones(len(table), dtype=bool)
+        if year is not None:
+            mask &= table['year'].to_numpy() == year
+        if month is not None:
+            mask &= table['month'].to_numpy() == month
+        if direction is not None and 'direction' in table.columns:
+            mask &= table['direction'].to_numpy() == direction
+        return table[mask]
+
+    def count(self, query):
+        if not query.signals and query.per_day:
+            return int(self.select(self.days, query.year, query.month)['day'].sum())
+        if query.direction is None and query.per_day:
+            return int(self.select(self.signal_days, query.year, query.month)['day'].sum())
+        selected = self.select(self.groups, query.year, query.month, query.direction)
+        if not query.signals:
+            return int(selected['rows'].sum())
+        if query.direction is None:
+            # Signals are the non-neutral rows
+            selected = selected[selected['direction'] != 'NEUTRAL']
+        return int(selected['days' if query.per_day else 'rows'].sum())
+
+    def aggregate(self, query):
+        column, how = METRIC_COLUMNS[(query.metric, query.aggregate)]
+        selected = self.select(self.groups, query.year, query.month, query.direction)
+        if selected.empty:
+            return None
+        if how == 'mean':
+            count = selected[f'{column}_count'].sum()
+            return float(selected[f'{column}_sum'].sum() / count) if count else None
+        if how == 'sum':
+            return float(selected[f'{column}_sum'].sum())
+        value = selected[column].max() if how == 'max' else selected[column].min()
+        return None if pd.isna(value) else float(value)
+
+def year_month_bounds(year, month):
+    """UNIX-second [start, end] for a year or year-month filter; (None, None) without a year"""
+    if year is None:
+        return None, None
+    start = pd.Timestamp(year, month or 1, 1)
+    end = start + (pd.DateOffset(months=1) if month else pd.DateOffset(years=1))
+    return start.value // 10 ** 9, end.value // 10 ** 9 - 1
+
+class QueryEngine:
+    """Answer aggregate questions from precomputed indexes before falling back to the LLM"""
+
+    def __init__(self, df, levels=None):
+        self.index = AnalyticIndex(df)
+        self.levels = levels if levels is not None else LevelIndex(df)
+        self.last_close = float(df['close'].iloc[-1]) if len(df) else np.nan
+
+    def answer(self, question):
+        started = time.perf_counter()
+        query = parse_question(question)
+        if query is None:
+            return None
+
+        scope = describe_scope(query)
+        if query.kind == 'count':
+            value = self.index.count(query)
+            subject = f"{query.direction or 'LONG/SHORT'} signal {'days' if query.per_day else 'bars'}"
+            if not query.signals:
+                subject = 'trading days' if query.per_day else 'bars'
+            text = f"There were {value:,} {subject}{scope}."
+        elif query.kind == 'nearest':
+            value, text = self.nearest_level(query)
+        elif query.kind == 'strongest':
+            value, text = self.strongest_levels(query, scope)
+        else:
+            value = self.index.aggregate(query)
+            label = f"{AGGREGATE_LABELS[query.aggregate]} {METRIC_LABELS[query.metric]}"
+            if value is None:
+                text = f"No data available for the {label}{scope}."
+            elif query.metric == 'volume':
+                text = f"The {label}{scope} was {value:,.0f}."
+            else:
+                text = f"The {label}{scope} was ${value:,.2f}."
+        return QueryAnswer(text, 'analytic', value, (time.perf_counter() - started) * 1000)
+
+    def nearest_level(self, query):
+        price = self.last_close if query.price is None else query.price
+        reference = f"the last close ${price:,.2f}" if query.price is None else f"${price:,.2f}"
+        side = query.side or ('below' if query.metric == 'support' else 'above')
+        find = self.levels.nearest_below if side == 'below' else self.levels.nearest_above
+        level = find(query.metric, price)
+        if level is None:
+            return None, f"No {query.metric} level {side} {reference}."
+        distance = abs(level['price'] - price) / price * 100 if price else np.nan
+        return level['price'], (f"The nearest {query.metric} level {side} {reference} is ${level['price']:,.2f} "
+                                 f"({distance:.2f}% away, listed on {level['touches']:,} bars).")
+
+    def strongest_levels(self, query, scope):
+        start, end = year_month_bounds(query.year, query.month)
+        levels = self.levels.strongest(query.metric, LEVELS_LISTED, start=start, end=end)
+        if start is None:
+            # Level spans are kept per timestamp, so a month across all years cannot be isolated
+            scope = ''
+        if not levels:
+            return None, f"No {query.metric} levels{scope}."
+        listed = ', '.join(f"${level['price']:,.2f} ({level['touches']:,} bars)" for level in levels)
+        return levels[0]['price'], f"The strongest {query.metric} levels{scope} are {listed}."
+
+AGGREGATE_LABELS = {'mean': 'average', 'sum': 'total', 'max': 'highest', 'min': 'lowest'}
+METRIC_LABELS = {
+    'volume': 'volume', 'close': 'closing price', 'open': 'opening price', 'price': 'price',
+    'resistance': 'resistance level', 'support': 'support level',
+}
+
+def describe_scope(query):
+    parts = []
+    if query.direction and query.kind == 'aggregate':
+        parts.append(f" on {query.direction} bars")
+    if query.month:
+        month_name = pd.Timestamp(2000, query.month, 1).strftime('%B')
+        parts.append(f" in {month_name} {query.year}" if query.year else f" in {month_name} (all years)")
+    elif query.year:
+        parts.append(f" in {query.year}")
+    return ''.join(parts)
@@ -0,0 +1,211 @@
+import json
+import hashlib
+import os
+import shutil
+import uuid
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List
+
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from chatbot.query_engine import YEAR_PATTERN, extract_filters
+
+MANIFEST_FILE = "manifest.json"
+# Shard holding every document, searched when a question names no year or month
+ALL_SHARD = "all"
+
+
+def document_id(document):
+    """Stable id for a document, derived from its text"""
+    return hashlib.sha256(document.page_content.encode()).hexdigest()
+
+
+def load_or_update_vectorstore(documents, embeddings, index_dir):
+    """Load the FAISS index saved in `index_dir` and sync it with `documents`.
+
+    Only documents whose text is not yet indexed are embedded and added;
+    documents that disappeared from the dataset are deleted.
+    """
+    index_dir = Path(index_dir)
+    manifest_path = index_dir / MANIFEST_FILE
+    documents_by_id = {document_id(document): document for document in documents}
+
+    if manifest_path.exists():
+        vectorstore = FAISS.load_local(str(index_dir), embeddings, allow_dangerous_deserialization=True)
+        indexed = set(json.loads(manifest_path.read_text()))
+        new_ids = [doc_id for doc_id in documents_by_id if doc_id not in indexed]
+        stale_ids = list(indexed - documents_by_id.keys())
+        if stale_ids:
+            vectorstore.delete(stale_ids)
+        if new_ids:
+            vectorstore.add_documents([documents_by_id[doc_id] for doc_id in new_ids], ids=new_ids)
+        if not new_ids and not stale_ids:
+            return vectorstore
+    else:
+        vectorstore = FAISS.from_documents(list(documents_by_id.values()), embeddings, ids=list(documents_by_id))
+
+    index_dir.mkdir(parents=True, exist_ok=True)
+    vectorstore.save_local(str(index_dir))
+    manifest_path.write_text(json.dumps(list(documents_by_id)))
+    return vectorstore
+
+
+def shard_key(metadata):
+    return f"{int(metadata['year']):04d}-{int(metadata['month']):02d}"
+
+
+def shard_in_sync(documents, shard_dir):
+    """Whether the shard saved in `shard_dir` indexes exactly `documents`"""
+    manifest_path = Path(shard_dir) / MANIFEST_FILE
+    if not manifest_path.exists():
+        return False
+    try:
+        return set(json.loads(manifest_path.read_text())) == {document_id(document) for document in documents}
+    except ValueError:
+        return False
+
+
+def saved_document_ids(index_dir):
+    """Ids of the documents in the index saved under `index_dir`, from its ALL_SHARD manifest"""
+    manifest_path = Path(index_dir) / ALL_SHARD / MANIFEST_FILE
+    try:
+        return set(json.loads(manifest_path.read_text()))
+    except (OSError, ValueError):
+        return set()
+
+
+def build_partitioned_index(documents, embeddings, index_dir=None):
+    """Build one FAISS shard per year-month plus an ALL_SHARD of every document, persisted under `index_dir` when given.
+
+    A saved index that already matches the documents is only read. Anything
+    else is updated in a staging directory next to `index_dir`, starting
+    from a copy of the saved shards so appended bars only add their new
+    documents, and swapped in with os.replace, so sessions building the
+    same dataset at once never see each other's half-written shards.
+    """
+    groups = defaultdict(list)
+    for document in documents:
+        groups[shard_key(document.metadata)].append(document)
+    # Undated questions search this one index instead of fanning out over every month
+    groups[ALL_SHARD] = list(documents)
+
+    # Embed every document not yet in the saved index in one pipelined call; the per-shard builds then hit the cache
+    indexed = saved_document_ids(index_dir) if index_dir is not None else set()
+    embeddings.embed_documents([document.page_content for document in documents if document_id(document) not in indexed])
+
+    if index_dir is None:
+        return {key: FAISS.from_documents(docs, embeddings) for key, docs in groups.items()}
+
+    index_dir = Path(index_dir)
+    try:
+        if index_dir.is_dir() and {path.name for path in index_dir.iterdir()} == groups.keys() \
+                and all(shard_in_sync(docs, index_dir / key) for key, docs in groups.items()):
+            shards = {key: FAISS.load_local(str(index_dir / key), embeddings, allow_dangerous_deserialization=True)
+                      for key in sorted(groups)}
+            # The directory's mtime marks last use for prune_indexes
+            os.utime(index_dir)
+            return shards
+    except (OSError, RuntimeError):
+        # Swapped out by another session mid-read; rebuild from whatever is there now
+        pass
+
+    index_dir.parent.mkdir(parents=True, exist_ok=True)
+    staging = index_dir.parent / f'.tmp-{uuid.uuid4().hex}'
+    try:
+        staging.mkdir()
+        # Start from the saved shards so only new documents are embedded and added; stale periods are left behind
+        for key in groups:
+            if (index_dir / key).is_dir():
+                shutil.copytree(index_dir / key, staging / key)
+        shards = {key: load_or_update_vectorstore(docs, embeddings, staging / key) for key, docs in sorted(groups.items())}
+        shutil.rmtree(index_dir, ignore_errors=True)
+        try:
+            os.replace(staging, index_dir)
+        except OSError:
+            # Another session swapped in its build first; the shards in memory are already complete
+            if not index_dir.is_dir():
+                raise
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    return shards
+
+
+def directory_bytes(path):
+    return sum(file.stat().st_size for file in Path(path).rglob('*') if file.is_file())
+
+
+def prune_indexes(root, max_bytes, keep=()):
+    """Delete least-recently-used dataset indexes under `root` until they fit in `max_bytes`; returns their names"""
+    root = Path(root)
+    if not root.is_dir():
+        return []
+    entries = sorted(((entry, directory_bytes(entry), entry.stat().st_mtime) for entry in root.iterdir()
+                      if entry.is_dir() and not entry.name.startswith('.')), key=lambda item: item[2])
+    keep = {Path(path).name for path in keep}
+    total = sum(size for _, size, _ in entries)
+    pruned = []
+    for entry, size, _ in entries:
+        if total <= max_bytes:
+            break
+        if entry.name in keep:
+            continue
+        shutil.rmtree(entry, ignore_errors=True)
+        total -= size
+        pruned.append(entry.name)
+    return pruned
+
+
+def select_shards(shard_keys, question):
+    """Keep only shards inside the year/month range a question mentions; ALL_SHARD when it names none"""
+    filters = extract_filters(question)
+    years = sorted({int(year) for year in YEAR_PATTERN.findall(question.lower())})
+    if not years and not filters['month'] and ALL_SHARD in shard_keys:
+        return [ALL_SHARD], filters['direction']
+    selected = []
+    for key in shard_keys:
+        if key == ALL_SHARD:
+            continue
+        year, month = int(key[:4]), int(key[5:])
+        if years and not years[0] <= year <= years[-1]:
+            continue
+        if filters['month'] and month != filters['month']:
+            continue
+        selected.append(key)
+    return selected, filters['direction']
+
+
+def direction_filter(direction):
+    """Metadata filter keeping windows that contain at least one signal in `direction`"""
+    if direction in ('LONG', 'SHORT'):
+        field = f"{direction.lower()}_signals"
+        return lambda metadata: metadata.get(field, 0) > 0
+    return None
+
+
+class PartitionedRetriever(BaseRetriever):
+    """Search only the year-month shards matching the question's date range, then merge by score.
+
+    Questions without a date go to the single ALL_SHARD index.
+    """
+
+    shards: Dict[str, FAISS]
+    embeddings: object
+    k: int = 4
+
+    def search(self, question):
+        keys, direction = select_shards(self.shards, question)
+        if not keys:
+            return [], keys
+        embedding = self.embeddings.embed_query(question)
+        scored = []
+        for key in keys:
+            scored.extend(self.shards[key].similarity_search_with_score_by_vector(
+                embedding, k=self.k, filter=direction_filter(direction), fetch_k=max(20, self.k * 5)
+            ))
+        scored.sort(key=lambda item: item[1])
+        return [document for document, _ in scored[:self.k]], keys
+
+    def _get_relevant_documents(self, query, *, run_manager=None) -> List[Document]:
+        return self.search(query)[0]
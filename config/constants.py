@@ -1,5 +1,99 @@
+import os
+
 COLOR_BULL = 'rgba(38,166,154,1)'   # Green
 COLOR_BEAR = 'rgba(239,83,80,1)'    # Red
 COLOR_SUPPORT = 'rgba(76, 175, 80, 0.8)'
 COLOR_RESISTANCE = 'rgba(244, 67, 54, 0.8)'
 COLOR_VOLUME = 'rgba(76, 175, 80, 0.3)'
+
+# Chart timeframe pyramid (label -> pandas resample rule), finest first
+CHART_TIMEFRAMES = {
+    '1m': '1min',
+    '5m': '5min',
+    '15m': '15min',
+    '1h': '1h',
+    '1D': '1D',
+    '1W': 'W-MON',
+}
+MAX_CHART_BARS = 5000
+# Opt-in: send chart series as base64 typed arrays on a shared delta-encoded time axis, drawn by the vendored
+# lightweight-charts build instead of the streamlit_lightweight_charts component
+CHART_COMPACT_PAYLOAD = os.environ.get('TSLA_COMPACT_CHARTS', '0') == '1'
+
+# Live streaming mode: sources are polled every LIVE_POLL_SECONDS and read at most LIVE_READ_BYTES per poll;
+# sessions keep the last LIVE_DELTA_HISTORY updates and resend a full window to charts further behind.
+# Browsers get chart deltas over the Streamlit connection every LIVE_REFRESH_SECONDS.
+LIVE_POLL_SECONDS = float(os.environ.get('TSLA_LIVE_POLL_SECONDS', 0.25))
+LIVE_REFRESH_SECONDS = float(os.environ.get('TSLA_LIVE_REFRESH_SECONDS', 0.5))
+LIVE_READ_BYTES = 1024 ** 2
+LIVE_DELTA_HISTORY = 512
+LIVE_REPLAY_PORT = int(os.environ.get('TSLA_LIVE_REPLAY_PORT', 8767))
+# The only sources viewers can open, as comma-separated 'socket:host:port' or 'csv:/path' entries;
+# a session nobody has viewed for LIVE_IDLE_SECONDS is stopped
+LIVE_SOURCES = [tuple(entry.strip().split(':', 1)) for entry in
+                os.environ.get('TSLA_LIVE_SOURCES', f'socket:127.0.0.1:{LIVE_REPLAY_PORT}').split(',') if entry.strip()]
+LIVE_IDLE_SECONDS = float(os.environ.get('TSLA_LIVE_IDLE_SECONDS', 300))
+
+# Opt-in: compact cleaned frames drop raw and display-only columns (times live only in int64 `time`), keep levels
+# as Arrow lists (plain lists without pyarrow) and signals as categoricals; their prices can be downcast to 'float32'
+CLEANED_SCHEMA_COMPACT = os.environ.get('TSLA_COMPACT_SCHEMA', '0') == '1'
+CLEANED_PRICE_DTYPE = os.environ.get('TSLA_PRICE_DTYPE', 'float64')
+
+# Data-quality pass: gaps are steps over QUALITY_GAP_FACTOR bar intervals, outliers are returns beyond QUALITY_OUTLIER_Z
+# robust z-scores, and stale-price / zero-volume runs are reported from QUALITY_STALE_BARS / QUALITY_ZERO_VOLUME_BARS bars
+QUALITY_GAP_FACTOR = 1.5
+QUALITY_OUTLIER_Z = float(os.environ.get('TSLA_QUALITY_OUTLIER_Z', 8.0))
+QUALITY_STALE_BARS = 10
+QUALITY_ZERO_VOLUME_BARS = 3
+QUALITY_EXAMPLES = 5
+
+# Persistent cleaned-dataset cache
+DATA_CACHE_DIR = os.environ.get('TSLA_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'tesla_trading'))
+DATA_CACHE_MAX_BYTES = int(os.environ.get('TSLA_CACHE_MAX_BYTES', 2 * 1024 ** 3))
+
+# Cleaned datasets and their derived artifacts shared read-only across sessions
+DATASET_REGISTRY_MAX_BYTES = int(os.environ.get('TSLA_REGISTRY_MAX_BYTES', 1024 ** 3))
+
+# In-memory indicator arrays shared across sessions
+INDICATOR_CACHE_MAX_BYTES = int(os.environ.get('TSLA_INDICATOR_CACHE_MAX_BYTES', 256 * 1024 ** 2))
+INDICATOR_COLORS = ['#FFB300', '#29B6F6', '#AB47BC', '#FF7043', '#66BB6A', '#EC407A', '#BDBDBD']
+
+# Backtest costs in basis points per unit of position traded; 0 workers means one per CPU
+BACKTEST_FEE_BPS = 1.0
+BACKTEST_SLIPPAGE_BPS = 2.0
+BACKTEST_MAX_WORKERS = int(os.environ.get('TSLA_BACKTEST_WORKERS', 0))
+
+# Worker processes for cleaning several uploaded files at once; 0 means one per CPU
+LOADER_MAX_WORKERS = int(os.environ.get('TSLA_LOADER_WORKERS', 0))
+
+# Per-stage instrumentation: on by default when TSLA_PROFILE=1, otherwise toggled in the sidebar
+PROFILING_ENABLED = os.environ.get('TSLA_PROFILE', '0') == '1'
+PROFILE_JSONL_PATH = os.environ.get('TSLA_PROFILE_JSONL', os.path.join(DATA_CACHE_DIR, 'profile', 'stages.jsonl'))
+# stages.jsonl is rotated to stages.jsonl.1 once it grows past this, so at most twice this is kept on disk
+PROFILE_JSONL_MAX_BYTES = int(os.environ.get('TSLA_PROFILE_JSONL_MAX_BYTES', 64 * 1024 ** 2))
+PROFILE_PROMETHEUS_PATH = os.environ.get('TSLA_PROFILE_PROM', os.path.join(DATA_CACHE_DIR, 'profile', 'tsla_stages.prom'))
+
+# Files larger than this are read and cleaned chunk by chunk
+STREAMING_THRESHOLD_BYTES = int(os.environ.get('TSLA_STREAMING_THRESHOLD_BYTES', 256 * 1024 ** 2))
+STREAMING_CHUNK_ROWS = 500_000
+
+# Chatbot embeddings and vector index
+EMBEDDING_BACKEND = os.environ.get('TSLA_EMBEDDINGS', 'google')
+EMBEDDING_CACHE_PATH = os.path.join(DATA_CACHE_DIR, 'embeddings.sqlite')
+CHATBOT_INDEX_DIR = os.path.join(DATA_CACHE_DIR, 'faiss')
+CHATBOT_INDEX_MAX_BYTES = int(os.environ.get('TSLA_CHATBOT_INDEX_MAX_BYTES', 512 * 1024 ** 2))
+# 'D', 'W', 'M' or 'auto' (finest window averaging at least 10 bars per document)
+CHATBOT_DOC_WINDOW = os.environ.get('TSLA_CHATBOT_DOC_WINDOW', 'auto')
+EMBEDDING_SERVER_URL = os.environ.get('TSLA_EMBEDDINGS_URL', 'http://127.0.0.1:8765/embed')
+EMBEDDING_BATCH_SIZE = 100
+EMBEDDING_BATCH_CHARS = 50_000
+EMBEDDING_CONCURRENCY = int(os.environ.get('TSLA_EMBEDDING_CONCURRENCY', 4))
+EMBEDDING_REQUESTS_PER_SECOND = float(os.environ.get('TSLA_EMBEDDING_RPS', 5))
+EMBEDDING_MAX_RETRIES = 6
+
+# Chatbot LLM: 'google' (Gemini) or 'fake' (local streaming stand-in for tests and benchmarks)
+CHATBOT_LLM = os.environ.get('TSLA_CHATBOT_LLM', 'google')
+# LLM answers reused per dataset for questions whose normalized embedding is at least this cosine-similar
+ANSWER_CACHE_SIMILARITY = float(os.environ.get('TSLA_ANSWER_CACHE_SIMILARITY', 0.9))
+ANSWER_CACHE_TTL_SECONDS = float(os.environ.get('TSLA_ANSWER_CACHE_TTL', 6 * 3600))
+ANSWER_CACHE_MAX_ENTRIES = 2048
@@ -0,0 +1,220 @@
+import argparse
+import hashlib
+import io
+import json
+import os
+import shutil
+import sys
+import uuid
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from config.constants import DATA_CACHE_DIR, DATA_CACHE_MAX_BYTES
+from utils.helpers import level_arrays, level_list_array
+
+META_FILE = 'meta.json'
+
+class DatasetCache:
+    """Content-addressed disk cache of cleaned frames stored as memory-mappable .npy columns.
+
+    Entries live in ``<root>/<key>/`` with one file per column plus a
+    ``meta.json`` describing how to rebuild the frame. The meta file's mtime
+    tracks last use, and entries are evicted least-recently-used first once
+    the cache grows beyond ``max_bytes``.
+    """
+
+    def __init__(self, root=DATA_CACHE_DIR, max_bytes=DATA_CACHE_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(data, version):
+        """Hash the raw file bytes together with the cleaner version"""
+        digest = hashlib.sha256(data)
+        digest.update(f'|cleaner={version}'.encode())
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Return the cached frame for `key` (numeric columns memory-mapped) or None"""
+        entry = self.root / key
+        meta_path = entry / META_FILE
+        if not meta_path.exists():
+            self.misses += 1
+            return None
+
+        try:
+            meta = json.loads(meta_path.read_text())
+            columns = {spec['name']: _load_column(entry, spec) for spec in meta['columns']}
+        except (OSError, ValueError, KeyError):
+            # A torn or stale entry is treated as a miss and rebuilt by the caller
+            shutil.rmtree(entry, ignore_errors=True)
+            self.misses += 1
+            return None
+
+        os.utime(meta_path)
+        self.hits += 1
+        df = pd.DataFrame(columns, copy=False)
+        df.attrs.update(meta.get('attrs', {}))
+        return df
+
+    def put(self, key, df):
+        """Store a cleaned frame under `key` and evict old entries if over budget"""
+        self.root.mkdir(parents=True, exist_ok=True)
+        staging = self.root / f'.tmp-{uuid.uuid4().hex}'
+        staging.mkdir()
+        try:
+            specs = [_save_column(staging, f'c{i}', name, df[name]) for i, name in enumerate(df.columns)]
+            meta = {'rows': len(df), 'columns': specs, 'attrs': df.attrs}
+            (staging / META_FILE).write_text(json.dumps(meta, default=str))
+            target = self.root / key
+            if target.exists():
+                shutil.rmtree(target)
+            os.replace(staging, target)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+        self.evict(keep={key})
+
+    def entries(self):
+        """List (key, bytes, last_used) for every complete entry, oldest first"""
+        if not self.root.exists():
+            return []
+        found = []
+        for entry in self.root.iterdir():
+            meta_path = entry / META_FILE
+            if entry.name.startswith('.') or not meta_path.exists():
+                continue
+            size = sum(f.stat().st_size for f in entry.iterdir())
+            found.append((entry.name, size, meta_path.stat().st_mtime))
+        return sorted(found, key=lambda item: item[2])
+
+    def evict(self, keep=()):
+        """Drop least-recently-used entries, other than the keys in `keep`, until the cache fits in max_bytes"""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        evicted = []
+        for key, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            if key in keep:
+                continue
+            shutil.rmtree(self.root / key, ignore_errors=True)
+            total -= size
+            evicted.append(key)
+        return evicted
+
+    def stats(self):
+        entries = self.entries()
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(entries),
+            'bytes': sum(size for _, size, _ in entries),
+            'max_bytes': self.max_bytes,
+        }
+
+def _save_column(directory, stem, name, column):
+    spec = {'name': name, 'dtype': str(column.dtype), 'file': stem}
+
+    if isinstance(column.dtype, pd.DatetimeTZDtype):
+        spec.update(kind='datetime_tz', tz=str(column.dt.tz))
+        np.save(directory / f'{stem}.npy', column.dt.tz_convert(None).to_numpy())
+    elif column.dtype.kind in 'biufcmM':
+        spec['kind'] = 'array'
+        np.save(directory / f'{stem}.npy', column.to_numpy())
+    elif isinstance(column.dtype, pd.ArrowDtype) or _is_list_column(column):
+        spec['kind'] = 'levels'
+        values, offsets = level_arrays(column)
+        if isinstance(column.dtype, pd.ArrowDtype):
+            spec['arrow'] = np.dtype(column.dtype.pyarrow_dtype.value_type.to_pandas_dtype()).name
+            values = values.astype(spec['arrow'])
+        np.save(directory / f'{stem}.values.npy', values)
+        np.save(directory / f'{stem}.offsets.npy', offsets)
+    else:
+        spec['kind'] = 'labels'
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            # Keep the category order; factorizing would reorder categories by first appearance
+            codes, categories = column.cat.codes.to_numpy(), column.cat.categories
+        else:
+            codes, categories = pd.factorize(column, use_na_sentinel=True)
+        np.save(directory / f'{stem}.codes.npy', codes.astype(np.int32))
+        np.save(directory / f'{stem}.categories.npy', np.asarray(categories, dtype=str))
+    return spec
+
+def _load_column(directory, spec):
+    stem = directory / spec['file']
+    kind = spec['kind']
+
+    if kind == 'array':
+        return np.load(f'{stem}.npy', mmap_mode='r')
+    if kind == 'datetime_tz':
+        naive = pd.Series(np.load(f'{stem}.npy', mmap_mode='r'), copy=False)
+        return naive.dt.tz_localize('UTC').dt.tz_convert(spec['tz'])
+    if kind == 'levels':
+        if 'arrow' in spec:
+            return level_list_array(np.load(f'{stem}.values.npy'), np.load(f'{stem}.offsets.npy'), spec['arrow'])
+        values = np.load(f'{stem}.values.npy').tolist()
+        offsets = np.load(f'{stem}.offsets.npy').tolist()
+        return pd.Series([values[start:end] for start, end in zip(offsets[:-1], offsets[1:])], dtype=object)
+
+    codes = np.load(f'{stem}.codes.npy', mmap_mode='r')
+    categories = np.load(f'{stem}.categories.npy')
+    if spec['dtype'] == 'category':
+        return pd.Categorical.from_codes(codes, categories)
+    labels = categories.astype(object)[codes] if len(categories) else np.full(len(codes), np.nan, dtype=object)
+    labels[codes < 0] = np.nan
+    return pd.Series(labels).astype(spec['dtype'])
+
+def _is_list_column(column):
+    if column.dtype != object:
+        return False
+    first = column.first_valid_index()
+    return first is not None and isinstance(column[first], list)
+
+_default_cache = None
+
+def get_dataset_cache():
+    """Process-wide cache instance configured from config.constants"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = DatasetCache()
+    return _default_cache
+
+def prewarm(directory, cache):
+    """Clean every CSV in `directory` into the cache, skipping files already cached"""
+    from data.cleaning import CLEANER_VERSION, clean_ohlcv_frame
+
+    for path in sorted(Path(directory).glob('*.csv')):
+        data = path.read_bytes()
+        key = cache.key(data, CLEANER_VERSION)
+        if (cache.root / key / META_FILE).exists():
+            print(f'cached   {path.name}')
+            continue
+        try:
+            cleaned = clean_ohlcv_frame(pd.read_csv(io.BytesIO(data)))
+        except ValueError as error:
+            print(f'skipped  {path.name}: {error}')
+            continue
+        cache.put(key, cleaned)
+        print(f'prewarmed {path.name} ({len(cleaned):,} rows)')
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Manage the cleaned TSLA dataset cache.')
+    parser.add_argument('--cache-dir', default=DATA_CACHE_DIR)
+    parser.add_argument('--max-bytes', type=int, default=DATA_CACHE_MAX_BYTES)
+    commands = parser.add_subparsers(dest='command', required=True)
+    prewarm_parser = commands.add_parser('prewarm', help='clean and cache every CSV in a directory')
+    prewarm_parser.add_argument('directory')
+    commands.add_parser('stats', help='show cache size and entry count')
+    args = parser.parse_args(argv)
+
+    cache = DatasetCache(args.cache_dir, args.max_bytes)
+    if args.command == 'prewarm':
+        prewarm(args.directory, cache)
+    print(json.dumps(cache.stats(), indent=2))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
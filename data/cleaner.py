@@ -1,84 +1,86 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-from utils.helpers import parse_level_array, validate_ohlcv_row
-
-@st.cache_data
-def load_tesla_data_from_csv(uploaded_file):
-    """Load Tesla data from uploaded CSV file"""
-    if uploaded_file is None:
-        return None
+from data.cache import get_dataset_cache
+from data.ingest import load_csv_bytes
+from data.multi_loader import build_symbol_store, load_files, uploads_key
+from data.registry import DATASET, freeze_frame, get_dataset_registry
+from data.resample import build_ohlcv_pyramid
+from utils.profiling import instrument, mark_cache
 
+@instrument('load_csv')
+def load_tesla_data_from_csv(name, data):
+    """Clean one uploaded CSV through the disk cache, reporting what happened in the sidebar"""
     try:
-        df = pd.read_csv(uploaded_file)
-        st.sidebar.write("**Available Columns:**")
-        st.sidebar.write(list(df.columns))
-        cleaned_df = clean_tsla_data_for_charts(df)
+        cache = get_dataset_cache()
+        cleaned_df, info = load_csv_bytes(data, cache)
+        mark_cache('disk hit' if info['cached'] else 'miss')
+        if not info['cached']:
+            if info['streamed']:
+                st.info("🧹 Streamed large file through the chunked cleaner")
+                st.sidebar.write("**Streaming Ingest:**", info['ingest_stats'])
+            else:
+                st.info("🧹 Cleaned and processed uploaded data")
+                st.sidebar.write("**Available Columns:**")
+                st.sidebar.write(info['columns'])
+            warn_malformed_levels(cleaned_df.attrs['malformed_levels'])
+            st.sidebar.write("**Validation Corrections:**")
+            st.sidebar.write(cleaned_df.attrs.get('validation_counts', {}))
+
+        cleaned_df.attrs.update(dataset_key=info['key'], dataset_name=name)
         return cleaned_df
 
+    except ValueError as e:
+        st.error(f"❌ {e}")
+        return None
     except Exception as e:
         st.error(f"❌ Error loading CSV file: {str(e)}")
         return None
 
-def clean_tsla_data_for_charts(df):
-    st.info("🧹 Cleaning and processing uploaded data...")
-    df_cleaned = df.copy()
-
-    required_cols = ['open', 'high', 'low', 'close', 'volume']
-    missing_cols = [col for col in required_cols if col not in df_cleaned.columns]
-    if missing_cols:
-        st.error(f"❌ Missing required columns: {missing_cols}")
-        return None
-
-    ohlcv_cols = ['open', 'high', 'low', 'close', 'volume']
-    original_rows = len(df_cleaned)
-    df_cleaned = df_cleaned.drop_duplicates(subset=ohlcv_cols, keep='first').copy()
-    duplicates_removed = original_rows - len(df_cleaned)
-
-    possible_timestamp_names = ['timestamp', 'date', 'time', 'datetime', 'Date', 'Time', 'DateTime']
-    timestamp_col = next((col for col in possible_timestamp_names if col in df_cleaned.columns), None)
-    if not timestamp_col:
-        st.error("❌ No timestamp column found.")
-        return None
-
-    df_cleaned['timestamp'] = pd.to_datetime(df_cleaned[timestamp_col])
-    df_cleaned = df_cleaned.sort_values('timestamp').reset_index(drop=True)
-    validated = df_cleaned[ohlcv_cols].apply(validate_ohlcv_row, axis=1)
-    df_cleaned[ohlcv_cols] = validated
-
-    support_col = next((col for col in ['Support', 'support', 'support_levels'] if col in df_cleaned.columns), None)
-    resistance_col = next((col for col in ['Resistance', 'resistance', 'resistance_levels'] if col in df_cleaned.columns), None)
-
-    if support_col:
-        df_cleaned['support_levels'] = df_cleaned[support_col].apply(parse_level_array)
-        df_cleaned['support_min'] = df_cleaned['support_levels'].apply(lambda x: min(x) if x else None)
-        df_cleaned['support_max'] = df_cleaned['support_levels'].apply(lambda x: max(x) if x else None)
-    else:
-        df_cleaned['support_levels'] = [[] for _ in range(len(df_cleaned))]
-        df_cleaned['support_min'] = None
-        df_cleaned['support_max'] = None
+@instrument('load_uploads', cached=True)
+def load_symbol_store(uploaded_files):
+    """Load uploaded CSVs into a symbol-keyed store shared read-only by every session.
 
-    if resistance_col:
-        df_cleaned['resistance_levels'] = df_cleaned[resistance_col].apply(parse_level_array)
-        df_cleaned['resistance_min'] = df_cleaned['resistance_levels'].apply(lambda x: min(x) if x else None)
-        df_cleaned['resistance_max'] = df_cleaned['resistance_levels'].apply(lambda x: max(x) if x else None)
-    else:
-        df_cleaned['resistance_levels'] = [[] for _ in range(len(df_cleaned))]
-        df_cleaned['resistance_min'] = None
-        df_cleaned['resistance_max'] = None
+    Returns (uploads key, store, per-file timings or None); the store is
+    None when nothing could be loaded.
+    """
+    files = [(uploaded_file.name, uploaded_file.getvalue()) for uploaded_file in uploaded_files]
+    key = uploads_key(files)
+    loaded = get_dataset_registry().get_or_build(key, DATASET, lambda: load_uploads(files))
+    st.sidebar.write("**Dataset Cache:**", get_dataset_cache().stats())
+    st.sidebar.write("**Dataset Registry:**", get_dataset_registry().stats())
+    if loaded is None:
+        return key, None, None
+    store, timings = loaded
+    if timings is not None:
+        for file, error in timings.loc[timings['error'].notna(), ['file', 'error']].itertuples(index=False):
+            st.error(f"❌ {file}: {error}")
+    return key, (store if len(store) else None), timings
 
-    direction_col = next((col for col in ['direction', 'Direction', 'signal'] if col in df_cleaned.columns), None)
-    if direction_col:
-        df_cleaned['direction'] = df_cleaned[direction_col].fillna('NEUTRAL')
-        df_cleaned['direction'] = df_cleaned['direction'].replace('', 'NEUTRAL')
+def load_uploads(files):
+    """Registry miss: clean the uploads and build their (store, timings)"""
+    mark_cache('miss')
+    if len(files) == 1:
+        name, data = files[0]
+        df = load_tesla_data_from_csv(name, data)
+        if df is None:
+            return None
+        return build_symbol_store([(name, df.attrs['dataset_key'], df)]), None
+    return load_many_csvs(files)
 
-    price_cols = ['open', 'high', 'low', 'close', 'support_min', 'support_max', 'resistance_min', 'resistance_max']
-    existing_price_cols = [col for col in price_cols if col in df_cleaned.columns]
-    df_cleaned[existing_price_cols] = df_cleaned[existing_price_cols].round(2)
-    df_cleaned['volume'] = df_cleaned['volume'].round(0).astype(int)
+@instrument('load_files')
+def load_many_csvs(files):
+    """Clean several uploads across worker processes"""
+    with st.spinner("🧹 Cleaning files in parallel..."):
+        return load_files(files)
 
-    from config.constants import COLOR_BEAR, COLOR_BULL
-    df_cleaned['color'] = np.where(df_cleaned['open'] > df_cleaned['close'], COLOR_BEAR, COLOR_BULL)
-    df_cleaned['time'] = df_cleaned['timestamp'].dt.strftime('%Y-%m-%d')
+@instrument('pyramid', cached=True)
+def load_ohlcv_pyramid(df):
+    """Build the multi-timeframe OHLCV pyramid once per cleaned dataset, shared read-only across sessions"""
+    def build():
+        mark_cache('miss')
+        return {label: freeze_frame(frame) for label, frame in build_ohlcv_pyramid(df).items()}
+    return get_dataset_registry().get_or_build(df.attrs.get('dataset_key'), 'pyramid', build)
 
-    return df_cleaned
+def warn_malformed_levels(malformed_levels):
+    for kind, count in malformed_levels.items():
+        if count:
+            st.warning(f"⚠️ Ignored {count} malformed {kind} level cells")
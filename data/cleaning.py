@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+from config.constants import CLEANED_PRICE_DTYPE, CLEANED_SCHEMA_COMPACT, COLOR_BEAR, COLOR_BULL
+from data.quality import assess_quality
+from utils.helpers import level_list_array, parse_level_column, reduce_levels, split_levels, to_unix_seconds, validate_ohlcv_frame
+
+# Bump whenever cleaning output changes so stale disk-cache entries are ignored; the schema mode is part of it
+CLEANER_VERSION = '9' + (f'-compact-{CLEANED_PRICE_DTYPE}' if CLEANED_SCHEMA_COMPACT else '')
+
+OHLCV_COLS = ['open', 'high', 'low', 'close', 'volume']
+PRICE_COLS = ['open', 'high', 'low', 'close', 'support_min', 'support_max', 'resistance_min', 'resistance_max']
+TIMESTAMP_NAMES = ['timestamp', 'date', 'time', 'datetime', 'Date', 'Time', 'DateTime']
+SUPPORT_NAMES = ['Support', 'support', 'support_levels']
+RESISTANCE_NAMES = ['Resistance', 'resistance', 'resistance_levels']
+DIRECTION_NAMES = ['direction', 'Direction', 'signal']
+SYMBOL_NAMES = ['symbol', 'Symbol', 'ticker', 'Ticker']
+
+def find_column(columns, candidates):
+    return next((col for col in candidates if col in columns), None)
+
+def clean_ohlcv_frame(df):
+    """Clean a raw OHLCV export without any UI: dedupe, validate, parse levels, sort by time.
+
+    Only rows repeating both the timestamp and the OHLCV values are
+    dropped; other repeated timestamps are left for the quality report.
+    Raises ValueError when required columns are missing. Returns the
+    cleaned frame with the validation and quality reports in its attrs.
+    """
+    missing_cols = [col for col in OHLCV_COLS if col not in df.columns]
+    if missing_cols:
+        raise ValueError(f"Missing required columns: {missing_cols}")
+    timestamp_col = find_column(df.columns, TIMESTAMP_NAMES)
+    if not timestamp_col:
+        raise ValueError("No timestamp column found.")
+
+    df_cleaned = df.drop_duplicates(subset=[timestamp_col] + OHLCV_COLS, keep='first').copy()
+    df_cleaned, report = clean_rows(df_cleaned, timestamp_col)
+    df_cleaned = df_cleaned.sort_values('time', kind='stable').reset_index(drop=True)
+    df_cleaned.attrs.update(report, **quality_attrs(df_cleaned))
+    return df_cleaned
+
+def quality_attrs(df):
+    """The quality report to cache with a sorted cleaned frame; multi-symbol files are assessed per symbol later"""
+    if find_column(df.columns, SYMBOL_NAMES):
+        return {}
+    return {'quality': assess_quality(df)}
+
+def clean_rows(df_cleaned, timestamp_col, timestamp_format=None, compact=CLEANED_SCHEMA_COMPACT, price_dtype=CLEANED_PRICE_DTYPE):
+    """Apply the row-local cleaning steps (no dedupe or sort), so it can run chunk by chunk.
+
+    With `compact`, the raw timestamp, level and signal columns, the
+    per-row candle color and the datetime `timestamp` are dropped (charts
+    derive colors at render time and utils.helpers.bar_timestamps views
+    `time` as datetimes), levels become Arrow list columns, the direction
+    and symbol categoricals and prices `price_dtype`. Returns the cleaned
+    frame and a report with validation and malformed-level counts.
+    """
+    df_cleaned['timestamp'] = pd.to_datetime(df_cleaned[timestamp_col], format=timestamp_format)
+    validated, validation_counts = validate_ohlcv_frame(df_cleaned[OHLCV_COLS])
+    input_price_dtype = df_cleaned['close'].dtype
+    df_cleaned[OHLCV_COLS] = validated
+    if input_price_dtype == np.float32:
+        df_cleaned[OHLCV_COLS[:4]] = df_cleaned[OHLCV_COLS[:4]].astype(np.float32)
+
+    raw_cols = {timestamp_col}
+    malformed_levels = {}
+    for kind, level_col in (('support', find_column(df_cleaned.columns, SUPPORT_NAMES)),
+                            ('resistance', find_column(df_cleaned.columns, RESISTANCE_NAMES))):
+        if level_col:
+            values, offsets, malformed = parse_level_column(df_cleaned[level_col])
+            raw_cols.add(level_col)
+            malformed_levels[kind] = int(malformed.sum())
+        else:
+            values, offsets = np.array([], dtype=np.float64), np.zeros(len(df_cleaned) + 1, dtype=np.int64)
+        df_cleaned[f'{kind}_levels'] = level_list_array(values, offsets, price_dtype) if compact else split_levels(values, offsets)
+        df_cleaned[f'{kind}_min'] = reduce_levels(values, offsets, np.minimum)
+        df_cleaned[f'{kind}_max'] = reduce_levels(values, offsets, np.maximum)
+
+    direction_col = find_column(df_cleaned.columns, DIRECTION_NAMES)
+    if direction_col:
+        direction = fill_direction(df_cleaned[direction_col])
+        # Streamed chunks read signals as categoricals; the full schema keeps plain strings either way
+        df_cleaned['direction'] = direction.astype('category') if compact else direction.astype(str)
+        raw_cols.add(direction_col)
+
+    symbol_col = find_column(df_cleaned.columns, SYMBOL_NAMES)
+    if compact and symbol_col:
+        df_cleaned[symbol_col] = df_cleaned[symbol_col].astype('category')
+
+    existing_price_cols = [col for col in PRICE_COLS if col in df_cleaned.columns]
+    df_cleaned[existing_price_cols] = df_cleaned[existing_price_cols].round(2)
+    df_cleaned['volume'] = df_cleaned['volume'].round(0).astype(int)
+
+    if not compact:
+        df_cleaned['color'] = np.where(df_cleaned['open'] > df_cleaned['close'], COLOR_BEAR, COLOR_BULL)
+    df_cleaned['time'] = to_unix_seconds(df_cleaned['timestamp'])
+
+    if compact:
+        derived = {'time', 'direction', 'support_levels', 'resistance_levels'}
+        df_cleaned = df_cleaned.drop(columns=sorted((raw_cols | {'timestamp'}) - derived))
+        if price_dtype != 'float64':
+            df_cleaned[existing_price_cols] = df_cleaned[existing_price_cols].astype(price_dtype)
+
+    return df_cleaned, {'validation_counts': validation_counts, 'malformed_levels': malformed_levels}
+
+def fill_direction(direction):
+    """Map missing and empty signals to NEUTRAL, for plain or categorical columns"""
+    if isinstance(direction.dtype, pd.CategoricalDtype):
+        if '' in direction.cat.categories:
+            direction = direction.cat.remove_categories([''])
+        if 'NEUTRAL' not in direction.cat.categories:
+            direction = direction.cat.add_categories(['NEUTRAL'])
+        return direction.fillna('NEUTRAL')
+    return direction.fillna('NEUTRAL').replace('', 'NEUTRAL')
@@ -0,0 +1,166 @@
+import io
+import resource
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+from pandas.tseries.api import guess_datetime_format
+from config.constants import STREAMING_CHUNK_ROWS, STREAMING_THRESHOLD_BYTES
+from data.cache import get_dataset_cache
+from data.cleaning import (CLEANER_VERSION, DIRECTION_NAMES, OHLCV_COLS, TIMESTAMP_NAMES, clean_ohlcv_frame, clean_rows,
+                           find_column, quality_attrs)
+from utils.profiling import stage
+
+TIMESTAMP_FORMATS = [
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%d %H:%M',
+    '%Y-%m-%dT%H:%M:%S',
+    '%Y-%m-%d',
+    '%m/%d/%Y %H:%M:%S',
+    '%m/%d/%Y %H:%M',
+    '%m/%d/%Y',
+]
+
+def detect_timestamp_format(sample):
+    """Pick one strptime format that parses every value in `sample`, or None to let pandas infer"""
+    sample = pd.Series(sample).dropna().astype(str)
+    if sample.empty:
+        return None
+    guessed = guess_datetime_format(sample.iloc[0])
+    for fmt in ([guessed] if guessed else []) + TIMESTAMP_FORMATS:
+        try:
+            pd.to_datetime(sample, format=fmt)
+            return fmt
+        except (ValueError, TypeError):
+            continue
+    return None
+
+def csv_dtypes(columns, price_dtype='float64'):
+    """Fixed compact dtypes for the columns present in the file header"""
+    dtypes = {col: price_dtype for col in ['open', 'high', 'low', 'close'] if col in columns}
+    if 'volume' in columns:
+        # Read as float so blank cells survive; cleaning rounds it to int64
+        dtypes['volume'] = 'float64'
+    direction_col = find_column(columns, DIRECTION_NAMES)
+    if direction_col:
+        dtypes[direction_col] = 'category'
+    return dtypes
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes on Linux
+    return peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024
+
+def stream_clean_csv(source, chunksize=500_000, price_dtype='float64'):
+    """Read and clean a CSV in bounded chunks.
+
+    Each chunk is deduplicated on its raw timestamp and OHLCV values and
+    cleaned with clean_rows. Duplicates spanning chunks are removed
+    afterwards with the per-row hashes kept from each chunk, and the merged
+    frame is sorted stably by timestamp and quality-assessed, matching
+    clean_ohlcv_frame. Validation
+    counts cover rows that were only later found to be cross-chunk
+    duplicates.
+
+    Returns the cleaned frame and a stats dict with rows, seconds,
+    rows/sec and peak RSS.
+    """
+    started = time.perf_counter()
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    header = pd.read_csv(source, nrows=0).columns
+    if hasattr(source, 'seek'):
+        source.seek(0)
+
+    missing_cols = [col for col in OHLCV_COLS if col not in header]
+    if missing_cols:
+        raise ValueError(f"Missing required columns: {missing_cols}")
+    timestamp_col = find_column(header, TIMESTAMP_NAMES)
+    if not timestamp_col:
+        raise ValueError("No timestamp column found.")
+
+    chunks, hashes = [], []
+    report = {'validation_counts': {}, 'malformed_levels': {}}
+    rows_read = 0
+    timestamp_format = None
+
+    reader = pd.read_csv(source, chunksize=chunksize, dtype=csv_dtypes(header, price_dtype))
+    for chunk in reader:
+        rows_read += len(chunk)
+        if timestamp_format is None:
+            timestamp_format = detect_timestamp_format(chunk[timestamp_col].head(1000))
+        chunk = chunk.drop_duplicates(subset=[timestamp_col] + OHLCV_COLS, keep='first')
+        hashes.append(pd.util.hash_pandas_object(chunk[[timestamp_col] + OHLCV_COLS], index=False).to_numpy())
+        chunk, chunk_report = clean_rows(chunk, timestamp_col, timestamp_format)
+        for section, counts in chunk_report.items():
+            for name, count in counts.items():
+                report[section][name] = report[section].get(name, 0) + count
+        chunks.append(chunk)
+
+    columns = list(chunks[0].columns) if chunks else list(header)
+    categoricals = {}
+    for col in columns if chunks else []:
+        if isinstance(chunks[0][col].dtype, pd.CategoricalDtype):
+            categoricals[col] = union_categoricals([chunk[col] for chunk in chunks])
+            for chunk in chunks:
+                del chunk[col]
+
+    df = pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=list(header))
+    for col, values in categoricals.items():
+        df[col] = values
+    df = df[columns]
+
+    unique = ~pd.Series(np.concatenate(hashes) if hashes else np.empty(0, np.uint64)).duplicated(keep='first').to_numpy()
+    df = df[unique].sort_values('time', kind='stable').reset_index(drop=True)
+    df.attrs.update(report, **quality_attrs(df))
+
+    seconds = time.perf_counter() - started
+    stats = {
+        'rows_read': rows_read,
+        'rows': len(df),
+        'chunks': len(chunks),
+        'timestamp_format': timestamp_format,
+        'seconds': round(seconds, 3),
+        'rows_per_sec': round(rows_read / seconds) if seconds else None,
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+    }
+    return df, stats
+
+def load_csv_bytes(data, cache=None):
+    """Clean raw CSV bytes through the disk cache, streaming files above the threshold.
+
+    Returns the cleaned frame and an info dict with the cache key, whether
+    it was a cache hit, the raw columns (small files) or ingest stats
+    (streamed files), and read/clean seconds. Raises ValueError for files
+    that cannot be cleaned.
+    """
+    cache = cache or get_dataset_cache()
+    key = cache.key(data, CLEANER_VERSION)
+    info = {'key': key, 'cached': False, 'streamed': False, 'columns': None, 'ingest_stats': None,
+            'read_s': 0.0, 'clean_s': 0.0}
+    cleaned = cache.get(key)
+    if cleaned is not None:
+        info['cached'] = True
+        return cleaned, info
+
+    started = time.perf_counter()
+    if len(data) > STREAMING_THRESHOLD_BYTES:
+        info['streamed'] = True
+        with stage('stream_clean') as timed:
+            cleaned, info['ingest_stats'] = stream_clean_csv(io.BytesIO(data), chunksize=STREAMING_CHUNK_ROWS)
+            timed.rows, timed.bytes = len(cleaned), len(data)
+        info['clean_s'] = time.perf_counter() - started
+    else:
+        with stage('read_csv') as timed:
+            raw = pd.read_csv(io.BytesIO(data))
+            timed.rows, timed.bytes = len(raw), len(data)
+        info['columns'] = list(raw.columns)
+        info['read_s'] = time.perf_counter() - started
+        with stage('clean', rows=len(raw)):
+            cleaned = clean_ohlcv_frame(raw)
+        info['clean_s'] = time.perf_counter() - started - info['read_s']
+    cache.put(key, cleaned)
+    return cleaned, info
@@ -0,0 +1,385 @@
+import io
+import itertools
+import os
+import socket
+import statistics
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+from backtest.backtest import signal_array
+from config.constants import LIVE_DELTA_HISTORY, LIVE_IDLE_SECONDS, LIVE_POLL_SECONDS, LIVE_READ_BYTES, LIVE_SOURCES
+from data.cleaning import DIRECTION_NAMES, OHLCV_COLS, TIMESTAMP_NAMES, clean_rows, find_column
+from data.ingest import detect_timestamp_format
+from utils.helpers import GrowableArray
+from utils.indicators import INDICATORS, STREAMING_INDICATORS
+from utils.metrics import LiveMetrics
+
+# Columnar live bars; the signal is +1 LONG, -1 SHORT, 0 otherwise
+LIVE_COLUMNS = {
+    'time': np.int64,
+    'open': np.float64,
+    'high': np.float64,
+    'low': np.float64,
+    'close': np.float64,
+    'volume': np.int64,
+    'signal': np.int8,
+    'support_min': np.float64,
+    'support_max': np.float64,
+    'resistance_min': np.float64,
+    'resistance_max': np.float64,
+}
+LIVE_INDICATORS = ['SMA', 'EMA', 'RSI', 'Volume MA']
+
+class LineSource:
+    """Newline-delimited CSV arriving in pieces; the first complete line is the header"""
+
+    def __init__(self):
+        self.header = None
+        self.closed = False
+        self._partial = b''
+
+    def _lines(self, data):
+        complete, _, self._partial = (self._partial + data).rpartition(b'\n')
+        lines = [line.rstrip(b'\r') for line in complete.split(b'\n') if line.strip()] if complete else []
+        if self.header is None and lines:
+            self.header = lines.pop(0).decode()
+        return lines
+
+    def _restart(self):
+        self.header = None
+        self._partial = b''
+
+    def read_lines(self, max_bytes=LIVE_READ_BYTES):
+        """Complete data lines received since the last call, from at most `max_bytes` new bytes"""
+        raise NotImplementedError
+
+class CsvTailSource(LineSource):
+    """Follows a CSV file that another process appends to, like `tail -f`; a truncated file is read again from the top"""
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self._offset = 0
+
+    def read_lines(self, max_bytes=LIVE_READ_BYTES):
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return []
+        if size < self._offset:
+            self._offset = 0
+            self._restart()
+        if size == self._offset:
+            return []
+        with open(self.path, 'rb') as handle:
+            handle.seek(self._offset)
+            data = handle.read(max_bytes)
+        self._offset += len(data)
+        return self._lines(data)
+
+    def pending_bytes(self):
+        """Bytes written to the file that have not been read yet"""
+        try:
+            return max(0, os.path.getsize(self.path) - self._offset)
+        except OSError:
+            return 0
+
+class SocketSource(LineSource):
+    """Reads CSV lines from a TCP feed such as data.replay_server; the feed sends its header first"""
+
+    def __init__(self, host, port):
+        super().__init__()
+        self.address = (host, port)
+        self._socket = None
+
+    def read_lines(self, max_bytes=LIVE_READ_BYTES):
+        if self.closed:
+            return []
+        if self._socket is None:
+            self._socket = socket.create_connection(self.address, timeout=5)
+            self._socket.setblocking(False)
+        chunks, received = [], 0
+        while received < max_bytes:
+            try:
+                chunk = self._socket.recv(min(65536, max_bytes - received))
+            except BlockingIOError:
+                break
+            if not chunk:
+                self.close()
+                break
+            chunks.append(chunk)
+            received += len(chunk)
+        return self._lines(b''.join(chunks))
+
+    def close(self):
+        self.closed = True
+        if self._socket is not None:
+            self._socket.close()
+
+def _read_lines(header, lines, **options):
+    return pd.read_csv(io.BytesIO(b'\n'.join([header.encode()] + lines)), dtype=str, keep_default_na=False,
+                       on_bad_lines='skip', **options)
+
+def parse_bar_lines(header, lines, timestamp_format=None):
+    """Clean a batch of raw CSV lines into bars sorted by time, keeping the last row for each timestamp.
+
+    Lines with the wrong field count, an unparseable timestamp or a
+    missing OHLCV value are dropped rather than failing the batch.
+    Returns the cleaned frame (None if nothing survived) and the number
+    of lines rejected.
+    """
+    columns = header.split(',')
+    missing_cols = [col for col in OHLCV_COLS if col not in columns]
+    if missing_cols:
+        raise ValueError(f"Missing required columns: {missing_cols}")
+    timestamp_col = find_column(columns, TIMESTAMP_NAMES)
+    if not timestamp_col:
+        raise ValueError("No timestamp column found.")
+
+    raw = _read_lines(header, lines)
+    raw[timestamp_col] = pd.to_datetime(raw[timestamp_col], format=timestamp_format, errors='coerce')
+    raw[OHLCV_COLS] = raw[OHLCV_COLS].apply(pd.to_numeric, errors='coerce')
+    valid = (raw[timestamp_col].notna() & raw[OHLCV_COLS].notna().all(axis=1)).to_numpy()
+    rejected = len(lines) - int(valid.sum())
+    if not valid.any():
+        return None, rejected
+
+    cleaned, _ = clean_rows(raw[valid].copy(), timestamp_col)
+    return cleaned.sort_values('time', kind='stable').drop_duplicates('time', keep='last'), rejected
+
+def detect_line_format(header, lines):
+    """Timestamp format of a batch of raw lines, detected from its first rows"""
+    timestamp_col = find_column(header.split(','), TIMESTAMP_NAMES)
+    if not timestamp_col:
+        return None
+    return detect_timestamp_format(_read_lines(header, lines[:100], usecols=[timestamp_col])[timestamp_col])
+
+class LiveBars:
+    """Bars received so far as growable columns; appends are O(1) amortized"""
+
+    def __init__(self, capacity=1024):
+        self.columns = {name: GrowableArray(dtype, capacity) for name, dtype in LIVE_COLUMNS.items()}
+
+    def __len__(self):
+        return len(self.columns['time'])
+
+    def __getitem__(self, name):
+        return self.columns[name].view()
+
+    def apply(self, bars):
+        """Merge time-sorted cleaned `bars`: a bar at the newest time revises it, older bars are dropped as late.
+
+        Returns (replaced, appended, late).
+        """
+        values = {name: self._values(bars, name) for name in LIVE_COLUMNS}
+        times = values['time']
+        newest = self['time'][-1] if len(self) else None
+        if newest is None:
+            replaced, late, fresh = False, 0, np.ones(len(times), dtype=bool)
+        else:
+            same = np.flatnonzero(times == newest)
+            replaced, late, fresh = bool(len(same)), int((times < newest).sum()), times > newest
+            if replaced:
+                for name, column in self.columns.items():
+                    column.set_last(values[name][same[-1]])
+        for name, column in self.columns.items():
+            column.extend(values[name][fresh])
+        return replaced, int(fresh.sum()), late
+
+    @staticmethod
+    def _values(bars, name):
+        if name == 'signal':
+            direction_col = find_column(bars.columns, DIRECTION_NAMES)
+            return signal_array(bars[direction_col]) if direction_col else np.zeros(len(bars), dtype=np.int8)
+        return bars[name].to_numpy(dtype=LIVE_COLUMNS[name])
+
+    def frame(self, lo, hi):
+        """Rows [lo, hi) as a chart-ready frame (time, OHLCV, direction); the columns are copies"""
+        frame = pd.DataFrame({name: self[name][lo:hi].copy() for name in ['time'] + OHLCV_COLS})
+        frame['direction'] = np.select([self['signal'][lo:hi] > 0, self['signal'][lo:hi] < 0], ['LONG', 'SHORT'], 'NEUTRAL')
+        return frame
+
+_session_ids = itertools.count(1)
+
+class LiveSession:
+    """Polls a LineSource on a background thread and keeps bars, indicators and metrics current.
+
+    Every applied batch bumps `seq` and records the first bar index it
+    changed, so a chart that has seen update `seq` can be sent only the
+    bars from that index on. Latency is measured from the poll that read
+    a batch to the moment its bars, indicators and metrics are updated.
+    """
+
+    def __init__(self, source, indicators=LIVE_INDICATORS, poll_seconds=LIVE_POLL_SECONDS):
+        self.id = next(_session_ids)
+        self.source = source
+        self.poll_seconds = poll_seconds
+        self.bars = LiveBars()
+        # Each line also records whether it overlays the price chart or gets its own pane
+        self.indicators, self.placement = [], {}
+        for name in indicators:
+            build, params = STREAMING_INDICATORS[name]
+            for line in build(**params):
+                self.indicators.append(line)
+                self.placement[line.label] = INDICATORS[name][2]
+        self.metrics = LiveMetrics()
+        self.lock = threading.Lock()
+        self.seq = 0
+        self.changes = deque(maxlen=LIVE_DELTA_HISTORY)
+        self.latencies = deque(maxlen=10_000)
+        self.counts = {'bars': 0, 'replaced': 0, 'late': 0, 'rejected': 0}
+        self.error = None
+        # Set when the feed closed normally, so a stopped thread is not mistaken for a crashed one
+        self.finished = False
+        self.first_bar_at = self.last_bar_at = None
+        self.viewed_at = time.monotonic()
+        self._timestamp_format = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if isinstance(self.source, SocketSource):
+            self.source.close()
+
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                busy = self.poll()
+            except (OSError, ValueError) as exc:
+                # A missing feed or a bad header ends the session; the app shows the error
+                if not self._stop.is_set():
+                    self.error = str(exc)
+                return
+            except Exception as exc:
+                # So does any other parsing or cleaning failure, rather than leaving a dead session that looks live
+                if not self._stop.is_set():
+                    self.error = f'{type(exc).__name__}: {exc}'
+                return
+            if not busy and self.source.closed:
+                self.finished = True
+                return
+            if not busy and self._stop.wait(self.poll_seconds):
+                return
+
+    def poll(self):
+        """Read and apply one batch; returns the number of lines read"""
+        read_at = time.perf_counter()
+        lines = self.source.read_lines()
+        if not lines:
+            return 0
+        if self._timestamp_format is None:
+            self._timestamp_format = detect_line_format(self.source.header, lines)
+        bars, rejected = parse_bar_lines(self.source.header, lines, self._timestamp_format)
+        with self.lock:
+            self.counts['rejected'] += rejected
+            if bars is not None:
+                self._apply(bars)
+                self.latencies.append(time.perf_counter() - read_at)
+        return len(lines)
+
+    def _apply(self, bars):
+        start = len(self.bars)
+        replaced, appended, late = self.bars.apply(bars)
+        self.counts['late'] += late
+        if not replaced and not appended:
+            return
+        self.last_bar_at = time.perf_counter()
+        if self.first_bar_at is None:
+            self.first_bar_at = self.last_bar_at
+        self.counts['bars'] += appended
+        self.counts['replaced'] += replaced
+        columns = {name: self.bars[name] for name in ['high', 'low', 'close', 'volume', 'signal']}
+        first = start - 1 if replaced else start
+        for i in range(first, len(self.bars)):
+            revise = i < start
+            for line in self.indicators:
+                line.push(columns[line.source], i, revise)
+            self.metrics.push(*(columns[name][i].item() for name in ['high', 'low', 'close', 'volume', 'signal']), replace=revise)
+        self.seq += 1
+        self.changes.append((self.seq, first))
+
+    def changed_since(self, seq):
+        """First bar index changed after update `seq`, or None when `seq` is too old (or from another session) to patch"""
+        if seq == self.seq:
+            return len(self.bars)
+        if seq > self.seq or not self.changes or self.changes[0][0] > seq + 1:
+            return None
+        return min(first for change_seq, first in self.changes if change_seq > seq)
+
+    def stats(self):
+        with self.lock:
+            latencies = sorted(self.latencies)
+            elapsed = self.last_bar_at - self.first_bar_at if self.first_bar_at else 0.0
+            return {
+                **self.counts,
+                'seq': self.seq,
+                'bars_per_sec': round(self.counts['bars'] / elapsed, 1) if elapsed else 0.0,
+                'latency_p50_ms': round(statistics.median(latencies) * 1000, 2) if latencies else None,
+                'latency_p99_ms': round(latencies[int(0.99 * (len(latencies) - 1))] * 1000, 2) if latencies else None,
+                'error': self.error,
+            }
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+_reaper = None
+
+def get_live_session(kind, target, allowed=LIVE_SOURCES, idle_seconds=LIVE_IDLE_SECONDS):
+    """Process-wide session for a configured source, shared by every browser watching it.
+
+    `kind` is 'csv' (target is a file path) or 'socket' (target is
+    'host:port'); sources outside `allowed` raise ValueError, so viewers
+    cannot make the server open arbitrary files or endpoints. A session
+    that failed is replaced; one whose feed ended is kept so its bars
+    stay on screen, but one whose thread died without finishing is
+    replaced too. Each call marks the session viewed, and a background
+    reaper stops and drops sessions not viewed for `idle_seconds`.
+    """
+    global _reaper
+    if (kind, target) not in allowed:
+        raise ValueError(f"Live source {kind}:{target} is not configured (TSLA_LIVE_SOURCES)")
+    with _sessions_lock:
+        if _reaper is None:
+            _reaper = threading.Thread(target=_reap_idle_sessions, args=(idle_seconds,), daemon=True)
+            _reaper.start()
+        session = _sessions.get((kind, target))
+        if session is None or session.error or not (session.running or session.finished):
+            if kind == 'csv':
+                source = CsvTailSource(target)
+            else:
+                host, _, port = target.rpartition(':')
+                source = SocketSource(host or '127.0.0.1', int(port))
+            session = _sessions[(kind, target)] = LiveSession(source).start()
+        session.viewed_at = time.monotonic()
+        return session
+
+def stop_idle_sessions(idle_seconds=LIVE_IDLE_SECONDS):
+    """Stop and drop the sessions nobody has viewed for `idle_seconds`; returns how many"""
+    now = time.monotonic()
+    with _sessions_lock:
+        idle = [key for key, session in _sessions.items() if now - session.viewed_at > idle_seconds]
+        for key in idle:
+            _sessions.pop(key).stop()
+    return len(idle)
+
+def _reap_idle_sessions(idle_seconds):
+    while True:
+        time.sleep(max(1.0, idle_seconds / 4))
+        stop_idle_sessions(idle_seconds)
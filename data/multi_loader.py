@@ -0,0 +1,167 @@
+import hashlib
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from config.constants import LOADER_MAX_WORKERS
+from data.cache import META_FILE, DatasetCache, get_dataset_cache
+from data.cleaning import CLEANER_VERSION, SYMBOL_NAMES, find_column
+from data.ingest import load_csv_bytes
+from data.registry import freeze_frame
+
+SYMBOL_PATTERN = re.compile(r'[A-Za-z][A-Za-z.]{0,9}')
+
+def symbol_from_filename(name, default='TSLA'):
+    """Leading ticker-like token of a file name, e.g. 'aapl_1m_2023.csv' -> 'AAPL'"""
+    match = SYMBOL_PATTERN.match(Path(name).stem)
+    return match.group(0).rstrip('.').upper() if match else default
+
+def clean_file(name, data, cache_root):
+    """Clean one CSV into the disk cache and report timings; runs inside a worker process.
+
+    Only the cache key travels back to the parent, which maps the cleaned
+    columns from disk instead of unpickling a whole frame. Workers never
+    evict, so one file's fresh entry cannot be removed by another worker
+    before the parent reads it; the parent evicts once every file is in.
+    """
+    started = time.perf_counter()
+    cache = DatasetCache(cache_root, max_bytes=float('inf'))
+    key = cache.key(data, CLEANER_VERSION)
+    timing = {'file': name, 'key': key, 'cached': (cache.root / key / META_FILE).exists(), 'pid': os.getpid(),
+              'read_s': 0.0, 'clean_s': 0.0, 'error': None}
+    if not timing['cached']:
+        try:
+            _, info = load_csv_bytes(data, cache)
+            timing.update(read_s=info['read_s'], clean_s=info['clean_s'])
+        except ValueError as error:
+            timing['error'] = str(error)
+    timing['seconds'] = time.perf_counter() - started
+    return timing
+
+class SymbolStore:
+    """Cleaned frames keyed by symbol, with lookups on a shared time axis"""
+
+    def __init__(self, frames):
+        self.frames = dict(sorted(frames.items()))
+
+    @property
+    def symbols(self):
+        return list(self.frames)
+
+    def __getitem__(self, symbol):
+        return self.frames[symbol]
+
+    def __len__(self):
+        return len(self.frames)
+
+    def align_to(self, times, symbol, column='close'):
+        """Value of `symbol` as of each time in `times` (last bar at or before it), NaN before its first bar"""
+        frame = self.frames[symbol]
+        index = np.searchsorted(frame['time'].to_numpy(), times, side='right') - 1
+        values = frame[column].to_numpy(dtype=np.float64)[np.maximum(index, 0)]
+        values[index < 0] = np.nan
+        return values
+
+    def aligned(self, column='close', symbols=None):
+        """One column per symbol on the union of all bar times, forward-filled"""
+        series = [
+            self.frames[symbol].drop_duplicates('time', keep='last').set_index('time')[column].rename(symbol)
+            for symbol in symbols or self.symbols
+        ]
+        return pd.concat(series, axis=1, join='outer').sort_index().ffill()
+
+def split_symbols(name, df):
+    """Split a cleaned frame by its symbol column, or label it from the file name"""
+    symbol_col = find_column(df.columns, SYMBOL_NAMES)
+    if not symbol_col:
+        return {symbol_from_filename(name): df}
+    symbols = df[symbol_col].astype(str).str.strip().str.upper()
+    return {symbol: df[(symbols == symbol).to_numpy()].reset_index(drop=True) for symbol in symbols.unique()}
+
+def merge_symbol_frames(parts):
+    """Combine (file key, frame) parts of one symbol into a single frame sorted by time"""
+    if len(parts) == 1:
+        return parts[0][1]
+    merged = pd.concat([frame for _, frame in parts], ignore_index=True)
+    # Categoricals with different categories concatenate to object; compact frames keep them categorical
+    for col, dtype in parts[0][1].dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype) and not isinstance(merged[col].dtype, pd.CategoricalDtype):
+            merged[col] = merged[col].astype('category')
+    # Overlapping exports of the same bars keep the copy from the later file. Repeated timestamps inside one
+    # file are left in place for the quality report to count.
+    source = np.repeat(np.arange(len(parts)), [len(frame) for _, frame in parts])
+    latest = pd.Series(source).groupby(merged['time'].to_numpy()).transform('max').to_numpy()
+    merged = merged[source == latest].sort_values('time', kind='stable').reset_index(drop=True)
+    # The parts' quality reports describe the files, not the merged bars, which are assessed on first use
+    merged.attrs.pop('quality', None)
+    return merged
+
+def build_symbol_store(parts):
+    """SymbolStore of read-only frames from (file name, file key, cleaned frame) triples"""
+    by_symbol = {}
+    for name, key, df in parts:
+        for symbol, frame in split_symbols(name, df).items():
+            by_symbol.setdefault(symbol, []).append((key, frame))
+
+    frames = {}
+    for symbol, symbol_parts in by_symbol.items():
+        # freeze_frame returns a new frame, so the input frames' attrs are left alone
+        frame = freeze_frame(merge_symbol_frames(symbol_parts))
+        digest = hashlib.sha256('|'.join(sorted(key for key, _ in symbol_parts) + [symbol]).encode())
+        frame.attrs.update(dataset_key=digest.hexdigest(), dataset_name=symbol)
+        frames[symbol] = frame
+    return SymbolStore(frames)
+
+def uploads_key(files):
+    """Content hash of a set of (name, bytes) uploads; names count because they can name the symbol"""
+    digest = hashlib.sha256()
+    for name, data in sorted(files):
+        digest.update(f'{name}|{DatasetCache.key(data, CLEANER_VERSION)}|'.encode())
+    return digest.hexdigest()
+
+def load_files(files, max_workers=LOADER_MAX_WORKERS, cache=None):
+    """Clean (name, bytes) files across a process pool into a SymbolStore.
+
+    Returns the store and a per-file timing table whose attrs hold the
+    wall-clock seconds and worker count, so parallel speedup is
+    sum(seconds) / wall seconds.
+    """
+    cache = cache or get_dataset_cache()
+    started = time.perf_counter()
+    names, blobs = zip(*files) if files else ((), ())
+    workers = min(max_workers or os.cpu_count() or 1, len(files)) or 1
+    args = (names, blobs, repeat(str(cache.root)))
+    if workers == 1:
+        timings = list(map(clean_file, *args))
+    else:
+        # Spawned workers start clean instead of forking a parent that may hold threads and locks (Streamlit's)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+            timings = list(executor.map(clean_file, *args))
+
+    parts = []
+    for timing, data in zip(timings, blobs):
+        df = cache.get(timing['key']) if not timing['error'] else None
+        if df is None and not timing['error']:
+            # Removed since the worker wrote it (another session's eviction); clean it again here
+            try:
+                df, _ = load_csv_bytes(data, cache)
+            except ValueError as error:
+                timing['error'] = str(error)
+        if df is None and not timing['error']:
+            timing['error'] = 'cleaned data missing from the cache'
+        timing['rows'] = len(df) if df is not None else 0
+        if df is not None:
+            parts.append((timing['file'], timing['key'], df))
+    # Evict only once every file of this load is mapped, and never one of them
+    cache.evict(keep={timing['key'] for timing in timings})
+    store = build_symbol_store(parts)
+
+    timings = pd.DataFrame(timings).drop(columns='key')
+    timings.attrs.update(wall_seconds=time.perf_counter() - started, workers=workers)
+    return store, timings
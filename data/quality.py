@@ -0,0 +1,143 @@
+import time
+
+import numpy as np
+import pandas as pd
+from config.constants import QUALITY_EXAMPLES, QUALITY_GAP_FACTOR, QUALITY_OUTLIER_Z, QUALITY_STALE_BARS, QUALITY_ZERO_VOLUME_BARS
+
+DAY_SECONDS = 86400
+# Scales the median absolute deviation to a standard deviation for normally distributed returns
+MAD_TO_SIGMA = 1.4826
+
+def _iso(seconds):
+    return pd.Timestamp(int(seconds), unit='s').isoformat()
+
+def _runs(mask):
+    """Start index and length of every run of True in a boolean array"""
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], mask.view(np.int8), [0]))))
+    return edges[::2], edges[1::2] - edges[::2]
+
+def _largest(values, count):
+    """Indices of the `count` largest values, largest first"""
+    if len(values) > count:
+        top = np.argpartition(values, -count)[-count:]
+    else:
+        top = np.arange(len(values))
+    return top[np.argsort(values[top])[::-1]]
+
+def _run_report(times, starts, lengths, min_bars, examples):
+    long_runs = lengths >= min_bars
+    starts, lengths = starts[long_runs], lengths[long_runs]
+    top = _largest(lengths, examples)
+    return {
+        'runs': int(len(starts)),
+        'bars': int(lengths.sum()),
+        'longest': [{'start': _iso(times[start]), 'end': _iso(times[start + length - 1]), 'bars': int(length)}
+                    for start, length in zip(starts[top], lengths[top])],
+    }
+
+def _gaps(times, steps, interval, gap_factor):
+    """(gap step indices, bars missing at each, missing weekday sessions or None) for sorted bar times.
+
+    Intraday data only counts gaps inside a calendar day, since the
+    overnight and weekend breaks are expected; whole weekdays without a
+    bar are counted as missing sessions instead, exchange holidays
+    included. Daily data counts the missing weekdays themselves, and
+    coarser data any step over `gap_factor` intervals.
+    """
+    if interval >= 2 * DAY_SECONDS:
+        gaps = np.flatnonzero(steps > gap_factor * interval)
+        return gaps, np.rint(steps[gaps] / interval).astype(np.int64) - 1, None
+
+    days = times // DAY_SECONDS
+    new_day = np.flatnonzero(days[1:] != days[:-1])
+    skipped = np.busday_count((days[new_day] + 1).astype('datetime64[D]'), days[new_day + 1].astype('datetime64[D]'))
+    missing_sessions = int(skipped.sum())
+    if interval >= DAY_SECONDS:
+        has_gap = skipped > 0
+        return new_day[has_gap], skipped[has_gap].astype(np.int64), missing_sessions
+
+    gaps = np.flatnonzero((days[1:] == days[:-1]) & (steps > gap_factor * interval))
+    return gaps, steps[gaps] // interval - 1, missing_sessions
+
+def assess_quality(df, gap_factor=QUALITY_GAP_FACTOR, outlier_z=QUALITY_OUTLIER_Z, stale_bars=QUALITY_STALE_BARS,
+                   zero_volume_bars=QUALITY_ZERO_VOLUME_BARS, examples=QUALITY_EXAMPLES):
+    """Data-quality report of a cleaned frame sorted by time, in one vectorized pass over its bars.
+
+    Counts duplicated timestamps, gaps against the inferred bar interval
+    (the median positive step), one-bar log returns beyond `outlier_z`
+    robust (MAD) z-scores, runs of at least `stale_bars` bars with an
+    unchanged close and runs of at least `zero_volume_bars` zero-volume
+    bars, with the largest few of each as examples. The report is plain
+    JSON so it can be cached with the dataset.
+    """
+    started = time.perf_counter()
+    times = df['time'].to_numpy(dtype=np.int64)
+    close = df['close'].to_numpy(dtype=np.float64)
+    volume = df['volume'].to_numpy()
+    steps = np.diff(times)
+
+    duplicated = np.flatnonzero(steps == 0) + 1
+    positive = steps[steps > 0]
+    interval = int(np.median(positive)) if len(positive) else DAY_SECONDS
+
+    gaps, missing, missing_sessions = _gaps(times, steps, interval, gap_factor)
+    widest = _largest(steps[gaps], examples)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = np.diff(np.log(close))
+    # Repeated timestamps are not a move in time, so their returns are left out
+    returns[steps == 0] = np.nan
+    finite = np.isfinite(returns)
+    z = np.zeros_like(returns)
+    if finite.any():
+        center = np.median(returns[finite])
+        deviation = np.abs(returns[finite] - center)
+        scale = MAD_TO_SIGMA * np.median(deviation)
+        if scale == 0:
+            # Mostly unchanged closes leave no spread to scale by; fall back to the standard deviation
+            scale = returns[finite].std()
+        if scale > 0:
+            z[finite] = (returns[finite] - center) / scale
+    # Zero or missing prices give infinite log returns, which are outliers by definition
+    z[np.isinf(returns)] = np.inf
+    outliers = np.flatnonzero(np.abs(z) > outlier_z)
+    strongest = outliers[_largest(np.abs(z[outliers]), examples)]
+
+    # A run of k unchanged steps is k + 1 bars at the same close
+    stale_starts, stale_steps = _runs(close[1:] == close[:-1])
+    zero_starts, zero_lengths = _runs(volume == 0)
+
+    return {
+        'rows': int(len(times)),
+        'interval_seconds': interval,
+        'duplicate_timestamps': int(len(duplicated)),
+        'duplicate_examples': [_iso(times[i]) for i in duplicated[:examples]],
+        'gaps': int(len(gaps)),
+        'missing_bars': int(missing.sum()),
+        'missing_sessions': missing_sessions,
+        'largest_gaps': [{'start': _iso(times[i]), 'end': _iso(times[i + 1]), 'bars_missing': int(count)}
+                         for i, count in zip(gaps[widest], missing[widest])],
+        'return_outliers': int(len(outliers)),
+        'outlier_examples': [{'time': _iso(times[i + 1]), 'return_pct': round(float(np.expm1(returns[i]) * 100), 2),
+                              'z': round(float(z[i]), 1)} for i in strongest],
+        'stale_price': _run_report(times, stale_starts, stale_steps + 1, stale_bars, examples),
+        'zero_volume': _run_report(times, zero_starts, zero_lengths, zero_volume_bars, examples),
+        'seconds': round(time.perf_counter() - started, 3),
+    }
+
+def quality_issues(report):
+    """Short human-readable lines for the problems a quality report found"""
+    issues = []
+    if report['duplicate_timestamps']:
+        issues.append(f"{report['duplicate_timestamps']:,} bars share a timestamp with the bar before")
+    if report['gaps']:
+        issues.append(f"{report['gaps']:,} gaps ({report['missing_bars']:,} bars missing)")
+    if report['missing_sessions']:
+        issues.append(f"{report['missing_sessions']:,} weekday sessions without bars")
+    if report['return_outliers']:
+        issues.append(f"{report['return_outliers']:,} return outliers")
+    if report['stale_price']['runs']:
+        issues.append(f"{report['stale_price']['runs']:,} stale-price runs ({report['stale_price']['bars']:,} bars)")
+    if report['zero_volume']['runs']:
+        issues.append(f"{report['zero_volume']['runs']:,} zero-volume runs ({report['zero_volume']['bars']:,} bars)")
+    return issues
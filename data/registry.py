@@ -0,0 +1,185 @@
+import sys
+import threading
+import types
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from config.constants import DATASET_REGISTRY_MAX_BYTES
+
+# Artifact name of the dataset itself; it stays resident while any session holds a lease
+DATASET = 'dataset'
+
+def freeze_frame(df):
+    """Read-only view of `df` sharing its data: NumPy-backed columns reject writes.
+
+    Extension-typed columns (categoricals, tz-aware timestamps) and the
+    Python lists inside object columns are shared as they are.
+    """
+    columns = {}
+    for name in df.columns:
+        column = df[name]
+        if isinstance(column.dtype, np.dtype):
+            values = column.to_numpy().view()
+            values.flags.writeable = False
+            columns[name] = values
+        else:
+            columns[name] = column.array
+    frozen = pd.DataFrame(columns, index=df.index, copy=False)
+    frozen.attrs.update(df.attrs)
+    return frozen
+
+SHARED_CODE_TYPES = (type, types.ModuleType, types.FunctionType, types.MethodType, types.BuiltinFunctionType)
+
+def measure_bytes(value, seen=None):
+    """Approximate resident bytes of a cached value, following containers and object attributes once each.
+
+    Modules, classes and functions are shared code rather than data and
+    count as zero; memory held outside Python objects (e.g. inside FAISS)
+    is not seen.
+    """
+    seen = set() if seen is None else seen
+    if id(value) in seen or isinstance(value, SHARED_CODE_TYPES):
+        return 0
+    seen.add(id(value))
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(measure_bytes(item, seen) for item in value.values())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(measure_bytes(item, seen) for item in value)
+    if hasattr(value, '__dict__'):
+        return sys.getsizeof(value) + measure_bytes(vars(value), seen)
+    return sys.getsizeof(value)
+
+class DatasetLease:
+    """A session's hold on a dataset; released explicitly or when the session drops it"""
+
+    def __init__(self, registry, key):
+        self.key = key
+        self._finalizer = weakref.finalize(self, registry.release, key)
+
+    def release(self):
+        self._finalizer()
+
+class DatasetRegistry:
+    """Process-wide LRU of datasets and their derived artifacts keyed by content hash, bounded by measured bytes.
+
+    Every session shares one read-only copy of each entry. A dataset with
+    outstanding leases keeps its DATASET entry resident; derived artifacts
+    (pyramids, indexes, chart payloads, the chatbot chain) are rebuilt on
+    demand after eviction.
+    """
+
+    def __init__(self, max_bytes=DATASET_REGISTRY_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.sizes = {}
+        self.refs = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Reentrant: a lease finalizer can run release() from garbage collection inside a locked section
+        self._lock = threading.RLock()
+        self._building = {}
+
+    def get(self, dataset_key, name=DATASET):
+        with self._lock:
+            entry_key = (dataset_key, name)
+            if entry_key not in self.entries:
+                return None
+            self.entries.move_to_end(entry_key)
+            self.hits += 1
+            return self.entries[entry_key]
+
+    def get_or_build(self, dataset_key, name, build):
+        """Return the cached `name` artifact of `dataset_key`, building it once across concurrent callers.
+
+        A None result is returned without being cached, so failed loads are
+        retried on the next call.
+        """
+        value = self.get(dataset_key, name)
+        if value is not None:
+            return value
+        entry_key = (dataset_key, name)
+        with self._lock:
+            build_lock = self._building.setdefault(entry_key, threading.Lock())
+        try:
+            with build_lock:
+                # Another session may have finished the same build while this one waited
+                value = self.get(dataset_key, name)
+                if value is None:
+                    value = build()
+                    if value is not None:
+                        self.put(dataset_key, name, value)
+        finally:
+            with self._lock:
+                self._building.pop(entry_key, None)
+        return value
+
+    def put(self, dataset_key, name, value):
+        size = measure_bytes(value)
+        with self._lock:
+            entry_key = (dataset_key, name)
+            self.misses += 1
+            if entry_key in self.entries:
+                self.bytes -= self.sizes[entry_key]
+            self.entries[entry_key] = value
+            self.sizes[entry_key] = size
+            self.bytes += size
+            self._evict()
+
+    def _evict(self):
+        for entry_key in list(self.entries):
+            if self.bytes <= self.max_bytes:
+                break
+            dataset_key, name = entry_key
+            if entry_key not in self.entries or (name == DATASET and self.refs.get(dataset_key)):
+                continue
+            del self.entries[entry_key]
+            self.bytes -= self.sizes.pop(entry_key)
+            self.evictions += 1
+
+    def acquire(self, dataset_key):
+        """Pin `dataset_key` for a session until the returned lease is released or garbage collected"""
+        with self._lock:
+            self.refs[dataset_key] = self.refs.get(dataset_key, 0) + 1
+        return DatasetLease(self, dataset_key)
+
+    def release(self, dataset_key):
+        with self._lock:
+            count = self.refs.get(dataset_key, 0) - 1
+            if count > 0:
+                self.refs[dataset_key] = count
+            else:
+                self.refs.pop(dataset_key, None)
+            self._evict()
+
+    def stats(self):
+        with self._lock:
+            datasets = {dataset_key for dataset_key, name in self.entries if name == DATASET}
+            return {
+                'datasets': len(datasets),
+                'entries': len(self.entries),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'leases': sum(self.refs.values()),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+_default_registry = None
+
+def get_dataset_registry():
+    """Process-wide registry shared by every session"""
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = DatasetRegistry()
+    return _default_registry
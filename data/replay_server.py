@@ -0,0 +1,56 @@
+import argparse
+import socketserver
+import threading
+import time
+
+from config.constants import LIVE_REPLAY_PORT
+
+class ReplayHandler(socketserver.BaseRequestHandler):
+    """Sends the CSV header, then the data rows at `rate` rows per second (0 means as fast as possible)"""
+
+    def handle(self):
+        server = self.server
+        self.request.sendall(server.header)
+        started = time.perf_counter()
+        for start in range(0, len(server.rows), server.batch_rows):
+            batch = server.rows[start:start + server.batch_rows]
+            if server.rate:
+                # Pace against the start time so slow sends do not add up to drift
+                delay = started + start / server.rate - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            try:
+                self.request.sendall(b''.join(batch))
+            except OSError:
+                return
+
+def start_replay_server(path, port=0, rate=10.0, batch_rows=1):
+    """Replay the CSV at `path` to every client on a daemon thread; returns (server, 'host:port')"""
+    with open(path, 'rb') as handle:
+        lines = [line if line.endswith(b'\n') else line + b'\n' for line in handle]
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', port), ReplayHandler)
+    server.daemon_threads = True
+    server.header, server.rows = lines[0], lines[1:]
+    server.rate = rate
+    server.batch_rows = max(1, batch_rows)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'127.0.0.1:{server.server_address[1]}'
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Replay a CSV of bars over TCP as a stand-in for a live feed.')
+    parser.add_argument('path')
+    parser.add_argument('--port', type=int, default=LIVE_REPLAY_PORT)
+    parser.add_argument('--rate', type=float, default=10.0, help='rows per second; 0 sends as fast as possible')
+    parser.add_argument('--batch-rows', type=int, default=1, help='rows written per send')
+    args = parser.parse_args(argv)
+
+    server, address = start_replay_server(args.path, args.port, args.rate, args.batch_rows)
+    print(f'Replaying {len(server.rows):,} rows on {address}')
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+from config.constants import CHART_TIMEFRAMES
+from utils.helpers import bar_timestamps, to_unix_seconds
+
+AGGREGATIONS = {
+    'open': 'first',
+    'high': 'max',
+    'low': 'min',
+    'close': 'last',
+    'volume': 'sum',
+    'support_min': 'min',
+    'support_max': 'max',
+    'resistance_min': 'min',
+    'resistance_max': 'max',
+}
+
+def infer_bar_interval(timestamps):
+    """Infer the native bar interval as the median positive gap between bars"""
+    gaps = timestamps.diff()
+    gaps = gaps[gaps > pd.Timedelta(0)]
+    return gaps.median() if not gaps.empty else pd.Timedelta(days=1)
+
+def resample_ohlcv(df, rule):
+    """Aggregate a cleaned (or already resampled) frame into `rule` buckets"""
+    indexed = df.set_index(bar_timestamps(df))
+    buckets = indexed.resample(rule, closed='left', label='left')
+    agg = {col: how for col, how in AGGREGATIONS.items() if col in indexed.columns}
+    out = buckets.agg(agg)
+
+    if 'direction' in indexed.columns:
+        # Keep the last LONG/SHORT signal inside each bucket
+        direction = indexed['direction'].astype(str).str.upper()
+        signals = direction.where(direction.isin(['LONG', 'SHORT']))
+        out['direction'] = signals.resample(rule, closed='left', label='left').last()
+
+    out = out.dropna(subset=['open']).reset_index()
+    if 'direction' in out.columns:
+        out['direction'] = out['direction'].fillna('NEUTRAL')
+    out['volume'] = out['volume'].astype('int64')
+    out['time'] = to_unix_seconds(out['timestamp'])
+    if 'timestamp' not in df.columns:
+        # Compact input: keep the output's times in `time` only
+        out = out.drop(columns='timestamp')
+    return out
+
+def build_ohlcv_pyramid(df, timeframes=CHART_TIMEFRAMES):
+    """Precompute OHLCV aggregates from the native interval up to the coarsest timeframe.
+
+    Each level is resampled from the previous one, which is exact for
+    first/max/min/last/sum aggregations. Returns an ordered dict of
+    label -> frame, finest first.
+    """
+    interval = infer_bar_interval(bar_timestamps(df))
+    native_label = next((label for label, rule in timeframes.items() if _rule_span(rule) == interval), 'Raw')
+
+    pyramid = {native_label: df}
+    previous = df
+    for label, rule in timeframes.items():
+        if label == native_label or _rule_span(rule) <= interval:
+            continue
+        previous = resample_ohlcv(previous, rule)
+        pyramid[label] = previous
+    return pyramid
+
+def select_pyramid_level(pyramid, max_bars, start=None, end=None):
+    """Pick the finest level whose bar count in [start, end) fits within `max_bars`"""
+    for label, frame in pyramid.items():
+        lo, hi = window_bounds(frame, start, end)
+        if hi - lo <= max_bars:
+            return label
+    return label
+
+def window_bounds(frame, start=None, end=None):
+    """Row bounds [lo, hi) of bars with start <= time < end (UNIX seconds)"""
+    times = frame['time'].to_numpy()
+    lo = 0 if start is None else int(np.searchsorted(times, start, side='left'))
+    hi = len(times) if end is None else int(np.searchsorted(times, end, side='left'))
+    return lo, max(lo, hi)
+
+def _rule_span(rule):
+    offset = pd.tseries.frequencies.to_offset(rule)
+    # Anchored weekly offsets such as W-MON have no fixed Timedelta
+    return pd.Timedelta(weeks=offset.n) if isinstance(offset, pd.offsets.Week) else pd.Timedelta(rule)
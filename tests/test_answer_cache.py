@@ -0,0 +1,56 @@
+import pytest
+
+from chatbot.answer_cache import AnswerCache, stream_and_store
+from chatbot.fake_llm import FakeStreamingLLM
+
+@pytest.fixture
+def cache():
+    return AnswerCache()
+
+@pytest.mark.parametrize('asked, near_miss', [
+    ("What is the highest resistance level?", "What is the lowest resistance level?"),
+    ("What is the highest resistance level?", "What is the highest support level?"),
+    ("How often did TSLA close above the support in 2023?", "How often did TSLA close below the support in 2023?"),
+    ("Summarize the LONG signals in 2023", "Summarize the SHORT signals in 2023"),
+    ("Summarize the bullish signals in 2023", "Summarize the bearish signals in 2023"),
+    ("How did TSLA trade in March 2023?", "How did TSLA trade in April 2023?"),
+    ("How did TSLA trade in March 2023?", "How did TSLA trade in March 2022?"),
+    ("What was the trend at the end of 2023?", "What was the trend at the start of 2023?"),
+    ("Did volume rise after the split?", "Did volume fall after the split?"),
+])
+def test_near_misses_do_not_share_answers(asked, near_miss):
+    # Provider embeddings put these pairs far closer than the offline hashing does; a loose threshold
+    # checks that the question facts alone keep them apart
+    cache = AnswerCache(threshold=0.5)
+    cache.store('dataset', asked, 'answer')
+    assert cache.lookup('dataset', near_miss) is None
+
+@pytest.mark.parametrize('asked, paraphrase', [
+    ("What is the highest resistance level?", "what's the highest resistance?"),
+    ("Summarize the LONG signals in 2023", "Please summarize the long signals in 2023."),
+    ("How did TSLA trade in March 2023?", "In March 2023, how did Tesla trade?"),
+])
+def test_paraphrases_share_answers(cache, asked, paraphrase):
+    cache.store('dataset', asked, 'answer')
+    cached = cache.lookup('dataset', paraphrase)
+    assert cached is not None and cached.text == 'answer'
+
+def test_answers_are_keyed_by_dataset_content_only(cache):
+    cache.store('content-a', "What is the highest resistance level?", 'answer a')
+    assert cache.lookup('content-b', "What is the highest resistance level?") is None
+    assert cache.lookup('content-a', "What is the highest resistance level?").text == 'answer a'
+
+def test_streamed_answer_is_cached_once_complete(cache):
+    question = "How did TSLA trade in March 2023?"
+    tokens = list(stream_and_store(cache, 'dataset', question, FakeStreamingLLM().stream(question)))
+    assert tokens
+    assert cache.lookup('dataset', question).text == ''.join(tokens)
+    assert cache.stats()['hits'] == 1
+
+def test_entries_expire():
+    now = [0.0]
+    cache = AnswerCache(ttl_seconds=10, clock=lambda: now[0])
+    cache.store('dataset', "What is the highest resistance level?", 'answer')
+    now[0] = 11.0
+    assert cache.lookup('dataset', "What is the highest resistance level?") is None
+    assert cache.stats()['expired'] == 1
@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from backtest.backtest import backtest_arrays, last_signal_index, run_backtest
+from backtest.sweep import parameter_grid, run_sweep
+from benchmarks.synthetic import generate_ohlcv
+from data.cleaning import clean_ohlcv_frame
+
+def loop_backtest(open_, high, low, close, signal, hold_bars, stop_pct, fee_bps, slippage_bps):
+    """Bar-by-bar reference for backtest_arrays"""
+    n = len(close)
+    last = -1
+    raw = np.zeros(n, dtype=np.int8)
+    position = np.zeros(n, dtype=np.int8)
+    equity = np.ones(n)
+    trade_ids = np.full(n, -1)
+    net = np.zeros(n)
+    value, run_trade, stopped_in_run, stops = 1.0, None, False, 0
+    for i in range(n):
+        previous_last = last
+        if signal[i]:
+            last = i
+        raw[i] = signal[last] if last >= 0 else 0
+        if hold_bars and last >= 0 and i - last >= hold_bars:
+            raw[i] = 0
+        held_raw = raw[i - 1] if i else 0
+        if previous_last != run_trade:
+            run_trade, stopped_in_run = previous_last, False
+        exit_price = close[i]
+        position[i] = raw[i]
+        if stop_pct:
+            level = close[max(previous_last, 0)] * (1 - held_raw * stop_pct)
+            hit = (held_raw > 0 and low[i] <= level) or (held_raw < 0 and high[i] >= level)
+            if hit and not stopped_in_run:
+                stops += 1
+                exit_price = min(level, open_[i]) if held_raw > 0 else max(level, open_[i])
+            stopped_in_run = stopped_in_run or hit
+            if stopped_in_run and last == previous_last:
+                position[i] = 0
+        held = position[i - 1] if i else 0
+        ret = held * (exit_price / close[i - 1] - 1) if held else 0.0
+        ret -= abs(int(position[i]) - int(held)) * (fee_bps + slippage_bps) / 10_000
+        net[i] = ret
+        value *= 1 + ret
+        equity[i] = value
+        trade_ids[i] = previous_last if held else (last if position[i] else -1)
+
+    trade_returns = []
+    for i in range(n):
+        if trade_ids[i] < 0:
+            continue
+        if not trade_returns or trade_ids[i] != current:
+            trade_returns.append(1.0)
+            current = trade_ids[i]
+        trade_returns[-1] *= 1 + net[i]
+    trade_returns = np.array(trade_returns) - 1
+    return equity, position, {
+        'total_return_pct': (equity[-1] - 1) * 100,
+        'max_drawdown_pct': (equity / np.maximum.accumulate(equity) - 1).min() * 100,
+        'trades': len(trade_returns),
+        'win_rate_pct': (trade_returns > 0).mean() * 100 if len(trade_returns) else 0.0,
+        'exposure_pct': (position != 0).mean() * 100,
+        'stops': stops,
+    }
+
+def random_case(rng, n=300):
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    open_ = np.r_[100.0, close[:-1]] * np.exp(rng.normal(0, 0.003, n))
+    high = np.maximum(open_, close) * (1 + rng.random(n) * 0.01)
+    low = np.minimum(open_, close) * (1 - rng.random(n) * 0.01)
+    signal = rng.choice(np.array([0, 1, -1], dtype=np.int8), n, p=[0.9, 0.05, 0.05])
+    return open_, high, low, close, signal
+
+@pytest.mark.parametrize('seed', range(60))
+def test_matches_loop_reference(seed):
+    rng = np.random.default_rng(seed)
+    open_, high, low, close, signal = random_case(rng)
+    hold_bars = [None, 1, 3, 10][seed % 4]
+    stop_pct = [None, 0.005, 0.02][seed % 3]
+    fee_bps, slippage_bps = [(0.0, 0.0), (1.0, 2.0)][seed % 2]
+    equity, _, position, stats = backtest_arrays(open_, high, low, close, signal, last_signal_index(signal),
+                                                 hold_bars, stop_pct, fee_bps, slippage_bps)
+    expected_equity, expected_position, expected = loop_backtest(open_, high, low, close, signal, hold_bars, stop_pct,
+                                                                 fee_bps, slippage_bps)
+    np.testing.assert_array_equal(position, expected_position)
+    np.testing.assert_allclose(equity, expected_equity, rtol=1e-12)
+    for key, value in expected.items():
+        assert stats[key] == pytest.approx(value, rel=1e-9, abs=1e-12), key
+
+def test_sweep_matches_single_runs():
+    df = clean_ohlcv_frame(generate_ohlcv(3000))
+    grid = parameter_grid(hold_bars=[None, 5], stop_pct=[None, 0.01])
+    results = run_sweep(df, grid, max_workers=2)
+    assert len(results) == len(grid)
+    for row in results.itertuples(index=False):
+        hold_bars = None if pd.isna(row.hold_bars) else int(row.hold_bars)
+        stop_pct = None if pd.isna(row.stop_pct) else row.stop_pct
+        assert row.sharpe == pytest.approx(run_backtest(df, hold_bars=hold_bars, stop_pct=stop_pct).stats['sharpe'])
+
+def test_sweep_unlinks_shared_memory_when_a_worker_fails(monkeypatch):
+    from multiprocessing import shared_memory
+    import backtest.sweep as sweep
+    blocks = []
+    share_arrays = sweep.share_arrays
+    monkeypatch.setattr(sweep, 'share_arrays', lambda arrays: blocks.append(share_arrays(arrays)) or blocks[-1])
+    with pytest.raises(TypeError):
+        run_sweep(clean_ohlcv_frame(generate_ohlcv(500)), [{'no_such_param': 1}] * 2, max_workers=2)
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=blocks[0][0].name)
@@ -0,0 +1,59 @@
+import os
+import time
+
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import generate_ohlcv
+from data.cache import META_FILE, DatasetCache
+from data.cleaning import clean_rows, clean_ohlcv_frame
+
+@pytest.fixture(scope='module')
+def cleaned():
+    return clean_ohlcv_frame(generate_ohlcv(3000))
+
+def test_round_trip_keeps_columns_dtypes_and_attrs(tmp_path, cleaned):
+    cache = DatasetCache(tmp_path)
+    key = cache.key(b'csv bytes', 'test')
+    cache.put(key, cleaned)
+    loaded = cache.get(key)
+    # Numeric columns come back memory-mapped; copy to compare values rather than array classes
+    pd.testing.assert_frame_equal(loaded.copy(), cleaned)
+    assert loaded.attrs == cleaned.attrs
+    assert cache.stats()['hits'] == 1
+
+@pytest.mark.parametrize('compact, price_dtype', [(False, 'float64'), (True, 'float32')])
+def test_round_trip_of_each_schema(tmp_path, compact, price_dtype):
+    df, _ = clean_rows(generate_ohlcv(500), 'timestamp', compact=compact, price_dtype=price_dtype)
+    cache = DatasetCache(tmp_path)
+    cache.put('k', df.reset_index(drop=True))
+    pd.testing.assert_frame_equal(cache.get('k').copy(), df.reset_index(drop=True))
+
+def test_key_depends_on_bytes_and_cleaner_version():
+    assert DatasetCache.key(b'a', '1') != DatasetCache.key(b'b', '1')
+    assert DatasetCache.key(b'a', '1') != DatasetCache.key(b'a', '2')
+
+def test_torn_entry_is_a_miss(tmp_path, cleaned):
+    cache = DatasetCache(tmp_path)
+    cache.put('k', cleaned)
+    (tmp_path / 'k' / META_FILE).write_text('{not json')
+    assert cache.get('k') is None
+    assert not (tmp_path / 'k').exists()
+
+def test_least_recently_used_entries_are_evicted(tmp_path, cleaned):
+    cache = DatasetCache(tmp_path)
+    cache.put('old', cleaned)
+    cache.put('new', cleaned)
+    old_meta = tmp_path / 'old' / META_FILE
+    os.utime(old_meta, (time.time() - 60, time.time() - 60))
+    cache.max_bytes = cache.stats()['bytes'] - 1
+    assert cache.evict() == ['old']
+    assert cache.get('new') is not None
+
+def test_compact_frames_keep_times_only_as_epoch_seconds():
+    from utils.helpers import bar_timestamps
+    raw = generate_ohlcv(500)
+    full, _ = clean_rows(raw.copy(), 'timestamp', compact=False)
+    compact, _ = clean_rows(raw.copy(), 'timestamp', compact=True)
+    assert 'timestamp' not in compact.columns and compact['time'].dtype == 'int64'
+    assert (bar_timestamps(compact).to_numpy() == full['timestamp'].to_numpy()).all()
@@ -0,0 +1,86 @@
+import pytest
+
+from benchmarks.synthetic import generate_ohlcv
+from chatbot.documents import build_window_documents
+from chatbot.embeddings import CachedEmbeddings, LocalHashEmbeddings
+from chatbot.retrieval import build_partitioned_index
+from data.cleaning import clean_ohlcv_frame
+
+@pytest.fixture(scope='module')
+def documents():
+    return build_window_documents(clean_ohlcv_frame(generate_ohlcv(20000)))
+
+def test_cached_embeddings_persist_between_instances(tmp_path, documents):
+    texts = [document.page_content for document in documents]
+    first = CachedEmbeddings(LocalHashEmbeddings(), tmp_path / 'embeddings.sqlite')
+    vectors = first.embed_documents(texts)
+    second = CachedEmbeddings(LocalHashEmbeddings(), tmp_path / 'embeddings.sqlite')
+    assert second.embed_documents(texts) == vectors
+    assert (first.misses, second.hits, second.misses) == (len(texts), len(texts), 0)
+
+def test_saved_index_is_reused_and_swapped_in_whole(tmp_path, documents):
+    embeddings = CachedEmbeddings(LocalHashEmbeddings(), tmp_path / 'embeddings.sqlite')
+    index_dir = tmp_path / 'faiss' / 'content-key'
+    shards = build_partitioned_index(documents, embeddings, index_dir)
+    assert len(shards) > 1
+    assert sorted(path.name for path in index_dir.parent.iterdir()) == ['content-key']
+    saved = {path: path.stat().st_mtime_ns for path in index_dir.rglob('*')}
+
+    reloaded = build_partitioned_index(documents, embeddings, index_dir)
+    assert {path: path.stat().st_mtime_ns for path in index_dir.rglob('*')} == saved
+    assert {key: shard.index.ntotal for key, shard in reloaded.items()} == \
+        {key: shard.index.ntotal for key, shard in shards.items()}
+
+def test_changed_documents_rebuild_without_leftovers(tmp_path, documents):
+    embeddings = CachedEmbeddings(LocalHashEmbeddings(), tmp_path / 'embeddings.sqlite')
+    index_dir = tmp_path / 'faiss' / 'content-key'
+    build_partitioned_index(documents, embeddings, index_dir)
+    first_period = documents[0].metadata['period'][:7]
+    kept = [document for document in documents if not document.metadata['period'].startswith(first_period)]
+    shards = build_partitioned_index(kept, embeddings, index_dir)
+    assert first_period not in shards
+    assert sorted(path.name for path in index_dir.iterdir()) == sorted(shards)
+    assert sorted(path.name for path in index_dir.parent.iterdir()) == ['content-key']
+
+def test_undated_questions_search_one_global_index(documents):
+    from langchain_community.vectorstores import FAISS
+    from chatbot.retrieval import ALL_SHARD, PartitionedRetriever
+
+    embeddings = LocalHashEmbeddings()
+    retriever = PartitionedRetriever(shards=build_partitioned_index(documents, embeddings), embeddings=embeddings)
+    flat = FAISS.from_documents(documents, embeddings)
+    question = "How did TSLA trade on heavy volume?"
+    found, keys = retriever.search(question)
+    assert keys == [ALL_SHARD]
+    assert [doc.page_content for doc in found] == [doc.page_content for doc in flat.similarity_search(question, k=4)]
+
+    _, keys = retriever.search(f"How did TSLA trade in {documents[-1].metadata['year']}?")
+    assert ALL_SHARD not in keys and documents[-1].metadata['period'][:7] in keys
+
+class CountingEmbeddings(LocalHashEmbeddings):
+    def __init__(self):
+        super().__init__()
+        self.texts = 0
+
+    def embed_documents(self, texts):
+        self.texts += len(texts)
+        return super().embed_documents(texts)
+
+def test_appended_bars_only_embed_new_documents(tmp_path, documents):
+    index_dir = tmp_path / 'faiss' / 'TSLA'
+    build_partitioned_index(documents[:-5], CachedEmbeddings(LocalHashEmbeddings(), tmp_path / 'first.sqlite'), index_dir)
+    # A cold embedding cache, so every text the update embeds reaches the backend
+    backend = CountingEmbeddings()
+    shards = build_partitioned_index(documents, CachedEmbeddings(backend, tmp_path / 'second.sqlite'), index_dir)
+    assert backend.texts == 5
+    assert shards['all'].index.ntotal == len(documents)
+
+def test_prune_indexes_keeps_recent_and_current(tmp_path):
+    import os
+    from chatbot.retrieval import prune_indexes
+    for age, name in enumerate(['newest', 'middle', 'oldest', 'current']):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / 'index.faiss').write_bytes(b'x' * 100)
+        os.utime(tmp_path / name, (1e9 - age * 100, 1e9 - age * 100))
+    assert prune_indexes(tmp_path, 250, keep=[tmp_path / 'current']) == ['oldest', 'middle']
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['current', 'newest']
@@ -0,0 +1,16 @@
+import json
+import os
+
+from charts.compact_renderer import COMPACT_CHART_HTML, LIGHTWEIGHT_CHARTS_JS, lightweight_charts_js, script_json
+
+def test_script_json_cannot_close_the_script_element():
+    value = {'title': 'TSLA </script><script>alert(1)</script> & more', 'rows': [1, 2.5]}
+    encoded = script_json(value)
+    assert '<' not in encoded and '>' not in encoded and '&' not in encoded
+    assert json.loads(encoded) == value
+
+def test_charts_use_the_vendored_library():
+    assert 'unpkg.com' not in COMPACT_CHART_HTML
+    assert 'Lightweight Charts' in lightweight_charts_js()[:200]
+    with open(os.path.join(os.path.dirname(LIGHTWEIGHT_CHARTS_JS), 'index.html')) as file:
+        assert 'src="lightweight-charts.standalone.production.js"' in file.read()
@@ -0,0 +1,33 @@
+import io
+
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import generate_ohlcv
+from data.cleaning import clean_ohlcv_frame
+from data.ingest import stream_clean_csv
+from utils.helpers import bar_timestamps
+
+@pytest.fixture(scope='module')
+def raw_csv():
+    raw = generate_ohlcv(5000, duplicate_rate=0.01)
+    # A repeated bar straddling the first chunk boundary, and a repeated price at a new timestamp
+    raw = pd.concat([raw.iloc[:999], raw.iloc[[998]], raw.iloc[999:]], ignore_index=True)
+    repeat = raw.iloc[[10]].copy()
+    repeat['timestamp'] = '2030-01-02 09:30:00'
+    raw = pd.concat([raw, repeat], ignore_index=True)
+    return raw.to_csv(index=False).encode()
+
+@pytest.mark.parametrize('chunksize', [1000, 777, 100_000])
+def test_streaming_matches_batch_cleaning(raw_csv, chunksize):
+    batch = clean_ohlcv_frame(pd.read_csv(io.BytesIO(raw_csv)))
+    streamed, stats = stream_clean_csv(io.BytesIO(raw_csv), chunksize=chunksize)
+    pd.testing.assert_frame_equal(streamed, batch)
+    assert streamed.attrs['quality'] == {**batch.attrs['quality'], 'seconds': streamed.attrs['quality']['seconds']}
+    assert stats['rows'] == len(batch)
+
+def test_only_exact_repeats_are_dropped(raw_csv):
+    raw = pd.read_csv(io.BytesIO(raw_csv))
+    cleaned = clean_ohlcv_frame(raw)
+    assert len(cleaned) == len(raw.drop_duplicates(subset=['timestamp', 'open', 'high', 'low', 'close', 'volume']))
+    assert bar_timestamps(cleaned).iloc[-1] == pd.Timestamp('2030-01-02 09:30:00')
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import generate_ohlcv
+from data.cleaning import clean_ohlcv_frame
+from utils.level_index import LevelIndex, LevelTable, cluster_levels, cluster_starts
+
+@pytest.fixture(scope='module')
+def index():
+    return LevelIndex(clean_ohlcv_frame(generate_ohlcv(20000)))
+
+def test_dense_ladder_does_not_chain_into_one_cluster():
+    # Levels a cent apart are each within tolerance of their neighbour
+    price = np.round(np.arange(100.0, 200.0, 0.01), 2)
+    starts = cluster_starts(price, 0.25)
+    assert len(starts) > 100
+    ends = np.r_[starts[1:], len(price)] - 1
+    assert np.all(price[ends] - price[starts] <= price[starts] * 0.25 / 100 + 1e-9)
+
+@pytest.mark.parametrize('kind', ['support', 'resistance'])
+def test_no_cluster_is_wider_than_the_tolerance(index, kind):
+    levels = index.table(kind, clustered=False)
+    starts = cluster_starts(levels.price, index.tolerance_pct)
+    ends = np.r_[starts[1:], len(levels)] - 1
+    assert np.all(levels.price[ends] - levels.price[starts] <= levels.price[starts] * index.tolerance_pct / 100 + 1e-9)
+    clusters = index.table(kind)
+    assert clusters.touches.sum() == levels.touches.sum()
+    assert np.all(np.diff(clusters.price) > 0)
+
+def test_nearest_clustered_level_stays_close_to_the_nearest_raw_level(index):
+    for price in np.linspace(index.levels['support'].price[0] * 1.01, index.levels['support'].price[-1], 25):
+        raw = index.nearest_below('support', price, clustered=False)['price']
+        clustered = index.nearest_below('support', price)
+        assert clustered is not None
+        assert abs(clustered['price'] - raw) <= raw * index.tolerance_pct / 100 + 0.01
+
+def test_cluster_levels_weights_price_by_touches():
+    table = LevelTable(np.array([100.0, 100.2, 110.0]), np.array([1, 3, 2]), np.zeros(3, np.int64), np.ones(3, np.int64))
+    clusters = cluster_levels(table, 0.25)
+    assert clusters.price.tolist() == [100.15, 110.0]
+    assert clusters.touches.tolist() == [4, 2]
@@ -0,0 +1,57 @@
+import time
+
+import pytest
+
+from benchmarks.synthetic import generate_ohlcv
+from charts.live_feed import build_live_delta
+from data.live import CsvTailSource, LiveSession, get_live_session, stop_idle_sessions
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / 'live.csv'
+    generate_ohlcv(300, duplicate_rate=0.0).to_csv(path, index=False)
+    return str(path)
+
+def test_unconfigured_sources_are_refused(csv_path):
+    with pytest.raises(ValueError):
+        get_live_session('csv', csv_path, allowed=[])
+    with pytest.raises(ValueError):
+        get_live_session('socket', '10.0.0.1:22', allowed=[('csv', csv_path)])
+
+def test_idle_sessions_are_stopped(csv_path):
+    session = get_live_session('csv', csv_path, allowed=[('csv', csv_path)])
+    assert get_live_session('csv', csv_path, allowed=[('csv', csv_path)]) is session
+    session.viewed_at = time.monotonic() - 3600
+    assert stop_idle_sessions(idle_seconds=60) == 1
+    session.join(5)
+    assert not session.running
+    assert get_live_session('csv', csv_path, allowed=[('csv', csv_path)]) is not session
+    stop_idle_sessions(idle_seconds=-1)
+
+def test_deltas_patch_from_their_base(csv_path):
+    session = LiveSession(CsvTailSource(csv_path))
+    while session.poll():
+        pass
+    full = build_live_delta(session, -1)
+    assert full['reset'] and len(full['candles']) == len(session.bars)
+    current = build_live_delta(session, session.seq)
+    assert (current['base'], current['seq'], current['reset'], current['candles']) == (session.seq, session.seq, False, [])
+
+def test_crashed_sessions_record_the_error_and_are_replaced(csv_path, monkeypatch):
+    allowed = [('csv', csv_path)]
+    def broken_poll(self):
+        raise KeyError('close')
+    with monkeypatch.context() as patch:
+        patch.setattr(LiveSession, 'poll', broken_poll)
+        crashed = get_live_session('csv', csv_path, allowed=allowed)
+        crashed.join(5)
+    assert not crashed.running and crashed.error == "KeyError: 'close'"
+    replacement = get_live_session('csv', csv_path, allowed=allowed)
+    assert replacement is not crashed
+
+    # A thread that died without recording why is replaced as well
+    replacement.stop()
+    replacement.join(5)
+    replacement.error = None
+    assert get_live_session('csv', csv_path, allowed=allowed) is not replacement
+    stop_idle_sessions(idle_seconds=-1)
@@ -0,0 +1,55 @@
+import shutil
+
+import pandas as pd
+
+from benchmarks.synthetic import generate_ohlcv
+from data.cache import DatasetCache
+from data.cleaning import clean_ohlcv_frame
+from data.multi_loader import load_files, merge_symbol_frames
+
+def test_process_pool_load_matches_inline_load(tmp_path):
+    files = [(f'{symbol}_1m.csv', generate_ohlcv(800, seed=seed).to_csv(index=False).encode())
+             for seed, symbol in enumerate(['AAPL', 'TSLA'])]
+    inline, _ = load_files(files, max_workers=1, cache=DatasetCache(tmp_path / 'inline'))
+    pooled, timings = load_files(files, max_workers=2, cache=DatasetCache(tmp_path / 'pooled'))
+    assert timings.attrs['workers'] == 2
+    assert pooled.symbols == inline.symbols == ['AAPL', 'TSLA']
+    for symbol in pooled.symbols:
+        assert pooled[symbol].equals(inline[symbol])
+
+def test_small_cache_budget_loads_every_file(tmp_path):
+    files = [(f'{symbol}_1m.csv', generate_ohlcv(800, seed=seed).to_csv(index=False).encode())
+             for seed, symbol in enumerate(['AAPL', 'MSFT', 'TSLA'])]
+    # Every entry is over budget, so any eviction during the load would drop a file
+    store, timings = load_files(files, max_workers=2, cache=DatasetCache(tmp_path, max_bytes=1))
+    assert store.symbols == ['AAPL', 'MSFT', 'TSLA']
+    assert timings['error'].isna().all() and (timings['rows'] > 0).all()
+
+def test_entry_missing_after_clean_is_cleaned_again(tmp_path):
+    class LosingCache(DatasetCache):
+        lost = False
+
+        def get(self, key):
+            if not self.lost:
+                self.lost = True
+                shutil.rmtree(self.root / key)
+            return super().get(key)
+
+    files = [('TSLA_1m.csv', generate_ohlcv(500).to_csv(index=False).encode())]
+    store, timings = load_files(files, max_workers=1, cache=LosingCache(tmp_path))
+    assert store.symbols == ['TSLA'] and timings['rows'].iloc[0] > 0
+
+def test_merge_drops_overlap_across_files_but_keeps_repeats_within_a_file():
+    first = clean_ohlcv_frame(generate_ohlcv(300, duplicate_rate=0.0))
+    second = first.iloc[200:].copy()
+    second['close'] += 1.0
+    # A repeated timestamp inside the first file, with different values
+    repeated = first.iloc[[50]].copy()
+    repeated['close'] += 5.0
+    first = pd.concat([first, repeated]).sort_values('time', kind='stable', ignore_index=True)
+
+    merged = merge_symbol_frames([('a', first), ('b', second)])
+    assert len(merged) == 301
+    assert (merged['time'] == first['time'].iloc[50]).sum() == 2
+    overlap = merged[merged['time'].isin(second['time'])]
+    assert overlap['close'].tolist() == second['close'].tolist()
@@ -0,0 +1,42 @@
+from types import SimpleNamespace
+
+import pytest
+
+from chatbot.embeddings import HttpEmbeddings, LocalHashEmbeddings
+from chatbot.fake_embedding_server import start_fake_server
+from chatbot.pipeline import EmbeddingPipeline, RateLimitError, is_rate_limited, make_batches
+
+class ResourceExhausted(Exception):
+    pass
+
+@pytest.mark.parametrize('error, expected', [
+    (RateLimitError(), True),
+    (SimpleNamespace(status_code=429), True),
+    (SimpleNamespace(code=429), True),
+    (SimpleNamespace(response=SimpleNamespace(status_code=429)), True),
+    (ResourceExhausted('quota'), True),
+    (ValueError('bad value 429 in row 1429'), False),
+    (SimpleNamespace(status_code=500), False),
+])
+def test_rate_limits_are_recognised_by_status_or_type_only(error, expected):
+    assert is_rate_limited(error) is expected
+
+def test_batches_respect_count_and_characters():
+    batches = make_batches(['a' * 10] * 7, batch_size=3, max_chars=25)
+    assert batches == [[0, 1], [2, 3], [4, 5], [6]]
+
+def test_pipeline_retries_429s_and_matches_direct_embeddings():
+    server, url = start_fake_server(latency=0.0, latency_per_text=0.0, rate_limit_every=3, retry_after=0.01)
+    try:
+        texts = [f'window {i} closed at {100 + i}' for i in range(230)]
+        checkpoints = []
+        pipeline = EmbeddingPipeline(HttpEmbeddings(url), batch_size=20, max_concurrency=4, requests_per_second=1000,
+                                     base_delay=0.01)
+        vectors = pipeline.embed_documents(texts, on_batch=lambda batch, _: checkpoints.extend(batch))
+    finally:
+        server.shutdown()
+    assert vectors == LocalHashEmbeddings().embed_documents(texts)
+    assert sorted(checkpoints) == sorted(texts)
+    assert server.rejected > 0
+    assert pipeline.stats['rate_limited'] == pipeline.stats['retries'] == server.rejected
+    assert (pipeline.stats['docs'], pipeline.stats['batches']) == (230, 12)
@@ -0,0 +1,25 @@
+import json
+
+from utils.profiling import begin_run, export_jsonl, stage
+
+def profiled_run():
+    run = begin_run(True)
+    with stage('load', rows=10):
+        pass
+    # Stop recording without end_run so nothing is exported to the default paths
+    begin_run(False)
+    return run
+
+def test_stage_log_is_rotated_at_the_byte_cap(tmp_path):
+    path = str(tmp_path / 'stages.jsonl')
+    runs = [profiled_run() for _ in range(20)]
+    line_bytes = len(json.dumps({'run': runs[0].id}))
+    for run in runs:
+        export_jsonl(run, path, max_bytes=line_bytes * 20)
+    current = (tmp_path / 'stages.jsonl').read_text().splitlines()
+    rotated = (tmp_path / 'stages.jsonl.1').read_text().splitlines()
+    assert (tmp_path / 'stages.jsonl').stat().st_size <= line_bytes * 20
+    assert sorted(tmp_path.iterdir()) == [tmp_path / 'stages.jsonl', tmp_path / 'stages.jsonl.1']
+    # The newest run is always in the live file and whole lines are never split across the two
+    assert json.loads(current[-1])['run'] == runs[-1].id
+    assert all(json.loads(line)['stage'] == 'load' for line in current + rotated)
@@ -0,0 +1,62 @@
+import pytest
+
+from benchmarks.synthetic import generate_ohlcv
+from chatbot.query_engine import QueryEngine, extract_filters, parse_question
+from data.cleaning import clean_ohlcv_frame
+
+@pytest.fixture(scope='module')
+def engine_and_frame():
+    df = clean_ohlcv_frame(generate_ohlcv(5000))
+    return QueryEngine(df), df
+
+@pytest.mark.parametrize('question', [
+    "Which day may have had the highest volume?",
+    "How many days did the price close above 250?",
+    "How many trades were profitable?",
+    "What was the highest price in 2016 and 2015?",
+    "How many LONG signals between 2015 and 2016?",
+    "What was the average close price last week?",
+    "What was the average volume last month?",
+    "How many LONG and SHORT signals were there?",
+])
+def test_unparsed_conditions_fall_through(question):
+    assert parse_question(question) is None
+
+def test_may_is_a_month_only_next_to_a_year_or_after_in():
+    assert extract_filters("Which day may have had the highest volume?")['month'] is None
+    assert extract_filters("The average volume in May")['month'] == 5
+    assert extract_filters("The average volume of may")['month'] == 5
+    assert extract_filters("Highest close May 2020")['month'] == 5
+    assert extract_filters("Highest close in 2020 may")['month'] == 5
+
+def test_bar_count_without_signal_counts_every_bar(engine_and_frame):
+    engine, df = engine_and_frame
+    answer = engine.answer("How many bars are in the dataset?")
+    assert answer.value == len(df)
+    assert 'signal' not in answer.text
+
+def test_signal_count_only_with_signal_or_direction(engine_and_frame):
+    engine, df = engine_and_frame
+    direction = df['direction'].astype(str)
+    assert engine.answer("How many signals are there?").value == int((direction != 'NEUTRAL').sum())
+    assert engine.answer("How many LONG bars are there?").value == int((direction == 'LONG').sum())
+
+def test_supported_questions_still_parse():
+    assert parse_question("How many LONG signal days in 2023?").direction == 'LONG'
+    assert parse_question("What was the average volume in January?").month == 1
+    assert parse_question("What is the highest resistance level?").kind == 'aggregate'
+    query = parse_question("What is the nearest support below $250?")
+    assert (query.kind, query.side, query.price) == ('nearest', 'below', 250.0)
+
+def test_signal_days_count_a_mixed_day_once():
+    import pandas as pd
+    timestamps = pd.to_datetime(['2023-03-01 09:30', '2023-03-01 09:31', '2023-03-02 09:30', '2023-03-03 09:30'])
+    df = pd.DataFrame({
+        'timestamp': timestamps, 'time': timestamps.astype('int64') // 10 ** 9,
+        'open': 250.0, 'high': 251.0, 'low': 249.0, 'close': 250.5, 'volume': 1000,
+        'direction': ['LONG', 'SHORT', 'LONG', 'NEUTRAL'],
+    })
+    engine = QueryEngine(df)
+    assert engine.answer("How many signal days in 2023?").value == 2
+    assert engine.answer("How many LONG signal days in 2023?").value == 2
+    assert engine.answer("How many SHORT signal days in 2023?").value == 1
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import generate_ohlcv
+from data.cleaning import clean_ohlcv_frame
+from utils.metrics import calculate_metrics
+from utils.range_index import RangeIndex, SparseTable
+
+@pytest.fixture(scope='module')
+def frame_and_index():
+    df = clean_ohlcv_frame(generate_ohlcv(5000))
+    return df, RangeIndex(df, 'direction')
+
+def windows(n):
+    rng = np.random.default_rng(0)
+    fixed = [(0, n), (0, 1), (n - 1, n), (0, 64), (64, 128), (63, 129), (10, 20), (1000, 4097)]
+    random = [tuple(sorted(rng.integers(0, n + 1, 2))) for _ in range(200)]
+    return [(lo, hi) for lo, hi in fixed + random if hi > lo]
+
+def test_window_metrics_match_calculate_metrics(frame_and_index):
+    df, index = frame_and_index
+    for lo, hi in windows(len(df)):
+        expected = calculate_metrics(df.iloc[lo:hi])
+        actual = index.window_metrics(lo, hi)
+        for key, value in expected.items():
+            if isinstance(value, str):
+                assert actual[key] == value
+            else:
+                assert actual[key] == pytest.approx(value, rel=1e-9), (lo, hi, key)
+
+def test_empty_window_has_no_metrics(frame_and_index):
+    _, index = frame_and_index
+    assert index.window_metrics(10, 10) is None
+
+@pytest.mark.parametrize('ufunc', [np.maximum, np.minimum, np.fmax, np.fmin])
+def test_sparse_table_matches_reduce(ufunc):
+    values = np.random.default_rng(1).normal(size=1000)
+    table = SparseTable(values, ufunc, block=16)
+    for lo in range(0, 1000, 37):
+        for hi in range(lo + 1, 1001, 53):
+            assert table.query(lo, hi) == ufunc.reduce(values[lo:hi])
+
+def test_window_highs_and_lows_skip_missing_bars_like_pandas():
+    df = clean_ohlcv_frame(generate_ohlcv(5000))
+    # A missing bar, plus a whole block of them
+    df.loc[[100, 4500], ['high', 'low']] = np.nan
+    df.loc[256:319, ['high', 'low']] = np.nan
+    index = RangeIndex(df, 'direction')
+    for lo, hi in windows(len(df)) + [(100, 101), (256, 320), (250, 330)]:
+        expected = calculate_metrics(df.iloc[lo:hi])
+        actual = index.window_metrics(lo, hi)
+        for key in ['highest_price', 'lowest_price']:
+            if np.isnan(expected[key]):
+                assert np.isnan(actual[key]), (lo, hi, key)
+            else:
+                assert actual[key] == expected[key], (lo, hi, key)
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.helpers import validate_ohlcv_frame, validate_ohlcv_row
+
+COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+def reference(df):
+    return df.apply(validate_ohlcv_row, axis=1)[COLUMNS].astype(np.float64)
+
+def assert_bitwise_equal(left, right):
+    # Same bits, so NaN placement and the sign of zero must match too
+    for col in COLUMNS:
+        assert np.array_equal(left[col].to_numpy(np.float64).view(np.int64), right[col].to_numpy(np.float64).view(np.int64)), col
+
+@pytest.fixture(scope='module')
+def random_frame():
+    rng = np.random.default_rng(0)
+    rows = 5000
+    values = {col: rng.normal(100, 5, rows) for col in COLUMNS[:4]}
+    values['volume'] = rng.normal(1000, 2000, rows)
+    df = pd.DataFrame(values)
+    for col in COLUMNS:
+        df.loc[rng.random(rows) < 0.05, col] = np.nan
+        df.loc[rng.random(rows) < 0.01, col] = -0.0
+    return df
+
+def test_matches_row_function_on_random_rows(random_frame):
+    validated, counts = validate_ohlcv_frame(random_frame)
+    assert_bitwise_equal(validated, reference(random_frame))
+    assert counts['swapped'] == int((random_frame['high'] < random_frame['low']).sum())
+    assert counts['negative_volume'] == int((random_frame['volume'] < 0).sum())
+
+@pytest.mark.parametrize('row', [
+    # Builtin min/max keep their first argument when a comparison with NaN is False
+    {'open': np.nan, 'high': 10.0, 'low': 5.0, 'close': 7.0, 'volume': 1.0},
+    {'open': 7.0, 'high': np.nan, 'low': 5.0, 'close': 12.0, 'volume': 1.0},
+    {'open': 7.0, 'high': 10.0, 'low': np.nan, 'close': 2.0, 'volume': np.nan},
+    {'open': 3.0, 'high': 5.0, 'low': 10.0, 'close': 12.0, 'volume': -5.0},
+    {'open': -0.0, 'high': 0.0, 'low': -0.0, 'close': 0.0, 'volume': -0.0},
+])
+def test_nan_and_signed_zero_follow_builtin_min_max(row):
+    df = pd.DataFrame([row])
+    validated, _ = validate_ohlcv_frame(df)
+    assert_bitwise_equal(validated, reference(df))
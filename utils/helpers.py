@@ -1,4 +1,5 @@
 import ast
+import numpy as np
 import pandas as pd
 
 def parse_level_array(level_str):
@@ -9,9 +10,72 @@ def parse_level_array(level_str):
             return ast.literal_eval(level_str) if level_str.startswith('[') else [float(x.strip()) for x in level_str.split(',')]
         elif isinstance(level_str, list):
             return level_str
-    except:
+    except (ValueError, SyntaxError, TypeError):
         return []
 
+def parse_level_column(column):
+    """Parse a whole Support/Resistance column into ragged float64 arrays.
+
+    Accepts the same bracketed-list and comma-separated cells as
+    parse_level_array. Returns ``(values, offsets, malformed)``: row ``i``
+    owns ``values[offsets[i]:offsets[i + 1]]`` and ``malformed`` flags cells
+    with an unparseable token, which contribute no levels.
+    """
+    text = pd.Series(column, copy=False).reset_index(drop=True)
+    text = text.where(text.notna(), '').astype(str).str.strip().str.strip('[]').str.strip()
+    n = len(text)
+
+    present = text[text != '']
+    owner = np.repeat(present.index.to_numpy(dtype=np.int64), present.str.count(',').to_numpy() + 1)
+    tokens = pd.Series(','.join(present.tolist()).split(',')) if len(present) else pd.Series([], dtype=str)
+    parsed = pd.to_numeric(tokens.str.strip(), errors='coerce').to_numpy(dtype=np.float64)
+
+    malformed = np.zeros(n, dtype=bool)
+    malformed[owner[np.isnan(parsed)]] = True
+    keep = ~malformed[owner]
+
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(owner[keep], minlength=n), out=offsets[1:])
+    return parsed[keep], offsets, malformed
+
+def reduce_levels(values, offsets, ufunc):
+    """Reduce each row's levels with a NumPy ufunc (e.g. np.minimum); empty rows give NaN."""
+    counts = np.diff(offsets)
+    out = np.full(len(counts), np.nan)
+    nonempty = counts > 0
+    if nonempty.any():
+        out[nonempty] = ufunc.reduceat(values, offsets[:-1][nonempty])
+    return out
+
+def split_levels(values, offsets):
+    """Expand ragged level arrays back into one Python list per row."""
+    flat = values.tolist()
+    return [flat[start:end] for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+
+def level_list_array(values, offsets, dtype=np.float64):
+    """Ragged levels as one Arrow list array, with no Python object per row; plain lists when pyarrow is missing"""
+    try:
+        import pyarrow as pa
+    except ImportError:
+        return split_levels(values, offsets)
+    lists = pa.ListArray.from_arrays(pa.array(offsets, type=pa.int32()), pa.array(values.astype(dtype, copy=False)))
+    return pd.arrays.ArrowExtensionArray(lists)
+
+def level_arrays(column):
+    """Flat float64 levels and row offsets of a levels column holding Python lists or Arrow lists"""
+    if isinstance(column.dtype, pd.ArrowDtype):
+        import pyarrow as pa
+        lists = pa.chunked_array(column.array.__arrow_array__()).combine_chunks()
+        offsets = np.asarray(lists.offsets, dtype=np.int64)
+        if not len(offsets):
+            return np.array([], dtype=np.float64), np.zeros(1, dtype=np.int64)
+        return np.asarray(lists.flatten(), dtype=np.float64), offsets - offsets[0]
+    lengths = column.map(len).to_numpy(dtype=np.int64)
+    offsets = np.zeros(len(column) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    values = np.fromiter((v for levels in column for v in levels), dtype=np.float64, count=int(offsets[-1]))
+    return values, offsets
+
 def validate_ohlcv_row(row):
     high, low, open_, close, volume = row['high'], row['low'], row['open'], row['close'], row['volume']
     if high < low: high, low = low, high
@@ -19,3 +83,89 @@ def validate_ohlcv_row(row):
     close = max(low, min(high, close))
     volume = max(0, volume)
     return pd.Series({'open': open_, 'high': high, 'low': low, 'close': close, 'volume': volume})
+
+def bar_timestamps(df):
+    """Bar times as a datetime Series: the `timestamp` column, or for compact frames without one a zero-copy
+    datetime64[s] view of the int64 `time` seconds (UTC wall time for data that was tz-aware)"""
+    if 'timestamp' in df.columns:
+        return df['timestamp']
+    return pd.Series(df['time'].to_numpy(dtype=np.int64).view('datetime64[s]'), index=df.index, name='timestamp')
+
+def to_unix_seconds(timestamps):
+    """Convert a datetime Series to int64 UNIX seconds (UTC for tz-aware data)"""
+    return timestamps.dt.as_unit('s').astype('int64')
+
+def _py_min(a, b):
+    # Builtin min(a, b) keeps `a` unless `b < a`; mirroring that comparison
+    # keeps NaN handling identical to validate_ohlcv_row.
+    return np.where(b < a, b, a)
+
+def _py_max(a, b):
+    return np.where(b > a, b, a)
+
+def _changed(before, after):
+    return ~((before == after) | (np.isnan(before) & np.isnan(after)))
+
+def validate_ohlcv_frame(df):
+    """Columnar equivalent of applying validate_ohlcv_row to every row.
+
+    Returns the validated float64 OHLCV frame and a dict counting the rows
+    each rule corrected.
+    """
+    high = df['high'].to_numpy(dtype=np.float64)
+    low = df['low'].to_numpy(dtype=np.float64)
+    open_ = df['open'].to_numpy(dtype=np.float64)
+    close = df['close'].to_numpy(dtype=np.float64)
+    volume = df['volume'].to_numpy(dtype=np.float64)
+
+    swapped = high < low
+    new_high = np.where(swapped, low, high)
+    new_low = np.where(swapped, high, low)
+    new_open = _py_max(new_low, _py_min(new_high, open_))
+    new_close = _py_max(new_low, _py_min(new_high, close))
+    new_volume = _py_max(np.zeros_like(volume), volume)
+
+    clamped = _changed(open_, new_open) | _changed(close, new_close)
+    validated = pd.DataFrame({
+        'open': new_open,
+        'high': new_high,
+        'low': new_low,
+        'close': new_close,
+        'volume': new_volume
+    }, index=df.index)
+    counts = {
+        'swapped': int(swapped.sum()),
+        'clamped': int(clamped.sum()),
+        'negative_volume': int((volume < 0).sum())
+    }
+    return validated, counts
+
+class GrowableArray:
+    """Append-only NumPy buffer with capacity doubling, so appends are O(1) amortized"""
+
+    def __init__(self, dtype, capacity=1024):
+        self._data = np.empty(capacity, dtype=dtype)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=self._data.dtype)
+        end = self._size + len(values)
+        if end > len(self._data):
+            grown = np.empty(max(end, 2 * len(self._data)), dtype=self._data.dtype)
+            grown[:self._size] = self._data[:self._size]
+            self._data = grown
+        self._data[self._size:end] = values
+        self._size = end
+
+    def append(self, value):
+        self.extend([value])
+
+    def set_last(self, value):
+        self._data[self._size - 1] = value
+
+    def view(self):
+        """The filled part; valid until the next append that grows the buffer"""
+        return self._data[:self._size]
@@ -0,0 +1,207 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from config.constants import INDICATOR_CACHE_MAX_BYTES
+from utils.helpers import GrowableArray
+
+def sma(values, window=20):
+    """Simple moving average; NaN until `window` values are available"""
+    return pd.Series(values, copy=False).rolling(window).mean().to_numpy()
+
+def ema(values, span=20):
+    """Exponential moving average seeded from the first value"""
+    return pd.Series(values, copy=False).ewm(span=span, adjust=False).mean().to_numpy()
+
+def rsi(close, period=14):
+    """Wilder's relative strength index in [0, 100]"""
+    change = np.diff(close, prepend=np.nan)
+    gains = pd.Series(np.clip(change, 0, None), copy=False)
+    losses = pd.Series(np.clip(-change, 0, None), copy=False)
+    avg_gain = gains.ewm(alpha=1 / period, adjust=False, min_periods=period).mean().to_numpy()
+    avg_loss = losses.ewm(alpha=1 / period, adjust=False, min_periods=period).mean().to_numpy()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out = 100 - 100 / (1 + avg_gain / avg_loss)
+    # No losses in the window means maximum strength rather than 0/0
+    return np.where((avg_loss == 0) & (avg_gain > 0), 100.0, out)
+
+def atr(high, low, close, period=14):
+    """Wilder's average true range"""
+    previous_close = np.concatenate(([np.nan], close[:-1]))
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - previous_close), np.abs(low - previous_close)))
+    return pd.Series(true_range, copy=False).ewm(alpha=1 / period, adjust=False, min_periods=period).mean().to_numpy()
+
+def bollinger(close, window=20, num_std=2.0):
+    """Middle, upper and lower Bollinger bands using the population standard deviation"""
+    rolling = pd.Series(close, copy=False).rolling(window)
+    middle = rolling.mean().to_numpy()
+    deviation = rolling.std(ddof=0).to_numpy() * num_std
+    return middle, middle + deviation, middle - deviation
+
+def vwap(high, low, close, volume, times):
+    """Session VWAP of the typical price, reset at each UTC calendar day"""
+    weighted = np.cumsum((high + low + close) / 3 * volume)
+    cumulative_volume = np.cumsum(volume, dtype=np.float64)
+    days = times // 86400
+    starts = np.flatnonzero(np.diff(days, prepend=days[0] - 1))
+    # Subtract the running totals carried in from previous sessions
+    lengths = np.diff(np.append(starts, len(times)))
+    offset_weighted = np.repeat(np.concatenate(([0.0], weighted[starts[1:] - 1])), lengths)
+    offset_volume = np.repeat(np.concatenate(([0.0], cumulative_volume[starts[1:] - 1])), lengths)
+    session_volume = cumulative_volume - offset_volume
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(session_volume > 0, (weighted - offset_weighted) / session_volume, np.nan)
+
+def rolling_corr(close, volume, window=20):
+    """Rolling Pearson correlation between close and volume"""
+    return pd.Series(close, copy=False).rolling(window).corr(pd.Series(volume, dtype=np.float64)).to_numpy()
+
+def _column(df, name):
+    return df[name].to_numpy(dtype=np.float64)
+
+# name -> (compute(df, **params) -> {line: values}, default params, 'overlay' on price or own 'pane')
+INDICATORS = {
+    'SMA': (lambda df, window: {f'SMA {window}': sma(_column(df, 'close'), window)}, {'window': 20}, 'overlay'),
+    'EMA': (lambda df, span: {f'EMA {span}': ema(_column(df, 'close'), span)}, {'span': 20}, 'overlay'),
+    'Bollinger': (
+        lambda df, window, num_std: dict(zip(['BB mid', 'BB upper', 'BB lower'], bollinger(_column(df, 'close'), window, num_std))),
+        {'window': 20, 'num_std': 2.0}, 'overlay'
+    ),
+    'VWAP': (
+        lambda df: {'VWAP': vwap(_column(df, 'high'), _column(df, 'low'), _column(df, 'close'), _column(df, 'volume'),
+                                 df['time'].to_numpy(dtype=np.int64))},
+        {}, 'overlay'
+    ),
+    'RSI': (lambda df, period: {f'RSI {period}': rsi(_column(df, 'close'), period)}, {'period': 14}, 'pane'),
+    'ATR': (lambda df, period: {f'ATR {period}': atr(_column(df, 'high'), _column(df, 'low'), _column(df, 'close'), period)},
+            {'period': 14}, 'pane'),
+    'Volume MA': (lambda df, window: {f'Volume MA {window}': sma(_column(df, 'volume'), window)}, {'window': 20}, 'pane'),
+    'Price/Volume Corr': (lambda df, window: {f'Corr {window}': rolling_corr(_column(df, 'close'), _column(df, 'volume'), window)},
+                          {'window': 20}, 'pane'),
+}
+
+class IndicatorCache:
+    """LRU of computed indicator arrays keyed by (dataset hash, indicator, parameters), bounded by bytes.
+
+    Results are read-only arrays held apart from the cleaned frame, so the
+    shared cached DataFrame is never mutated and reruns reuse the arrays.
+    """
+
+    def __init__(self, max_bytes=INDICATOR_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(dataset_key, name, params):
+        return (dataset_key, name, tuple(sorted(params.items())))
+
+    def compute(self, df, dataset_key, name, **params):
+        """Return {line label: values} for indicator `name` on `df`, computing it only on a miss"""
+        compute, defaults, _ = INDICATORS[name]
+        params = {**defaults, **params}
+        key = self.key(dataset_key, name, params)
+        with self._lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+
+        lines = compute(df, **params)
+        for values in lines.values():
+            values.flags.writeable = False
+        size = sum(values.nbytes for values in lines.values())
+
+        with self._lock:
+            self.misses += 1
+            if key not in self.entries:
+                self.entries[key] = lines
+                self.bytes += size
+            while self.bytes > self.max_bytes and len(self.entries) > 1:
+                _, evicted = self.entries.popitem(last=False)
+                self.bytes -= sum(values.nbytes for values in evicted.values())
+        return lines
+
+    def stats(self):
+        return {'entries': len(self.entries), 'bytes': self.bytes, 'hits': self.hits, 'misses': self.misses}
+
+_default_cache = None
+
+def get_indicator_cache():
+    """Process-wide indicator cache shared by every session"""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = IndicatorCache()
+    return _default_cache
+
+class StreamingIndicator:
+    """One indicator line updated a bar at a time, matching the batch function on the same bars.
+
+    `step(state, values, i)` returns the state after bar `i` of `values`
+    and the indicator value there. The state before the newest bar is kept,
+    so a revised newest bar (a still-forming live bar) is recomputed
+    instead of counted twice.
+    """
+
+    def __init__(self, label, source, step, initial):
+        self.label = label
+        self.source = source
+        self.step = step
+        self.sealed = self.state = initial
+        self.values = GrowableArray(np.float64)
+
+    def push(self, values, i, replace=False):
+        if not replace:
+            self.sealed = self.state
+        self.state, value = self.step(self.sealed, values, i)
+        if replace:
+            self.values.set_last(value)
+        else:
+            self.values.append(value)
+
+def _sma_step(window):
+    def step(total, values, i):
+        total += values[i] - (values[i - window] if i >= window else 0.0)
+        return total, total / window if i >= window - 1 else np.nan
+    return step
+
+def _ema_step(span):
+    alpha = 2 / (span + 1)
+
+    def step(previous, values, i):
+        value = values[i] if previous is None else alpha * values[i] + (1 - alpha) * previous
+        return value, value
+    return step
+
+def _rsi_step(period):
+    alpha = 1 / period
+
+    def step(state, values, i):
+        if i == 0:
+            return (None, None, 0), np.nan
+        avg_gain, avg_loss, count = state
+        change = values[i] - values[i - 1]
+        gain, loss = max(change, 0.0), max(-change, 0.0)
+        if count:
+            avg_gain, avg_loss = avg_gain + alpha * (gain - avg_gain), avg_loss + alpha * (loss - avg_loss)
+        else:
+            avg_gain, avg_loss = gain, loss
+        count += 1
+        if count < period:
+            return (avg_gain, avg_loss, count), np.nan
+        if avg_loss == 0:
+            return (avg_gain, avg_loss, count), 100.0 if avg_gain > 0 else np.nan
+        return (avg_gain, avg_loss, count), 100 - 100 / (1 + avg_gain / avg_loss)
+    return step
+
+# name -> (build(**params) -> [StreamingIndicator], default params); the streaming subset of INDICATORS
+STREAMING_INDICATORS = {
+    'SMA': (lambda window: [StreamingIndicator(f'SMA {window}', 'close', _sma_step(window), 0.0)], {'window': 20}),
+    'EMA': (lambda span: [StreamingIndicator(f'EMA {span}', 'close', _ema_step(span), None)], {'span': 20}),
+    'RSI': (lambda period: [StreamingIndicator(f'RSI {period}', 'close', _rsi_step(period), (None, None, 0))], {'period': 14}),
+    'Volume MA': (lambda window: [StreamingIndicator(f'Volume MA {window}', 'volume', _sma_step(window), 0.0)], {'window': 20}),
+}
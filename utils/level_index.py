@@ -0,0 +1,153 @@
+from dataclasses import dataclass
+
+import numpy as np
+from utils.helpers import level_arrays
+
+LEVEL_KINDS = ('support', 'resistance')
+
+@dataclass
+class LevelTable:
+    """Distinct price levels sorted ascending, with when and how often each was listed"""
+    price: np.ndarray
+    touches: np.ndarray
+    first_seen: np.ndarray
+    last_seen: np.ndarray
+
+    def __post_init__(self):
+        # Positions by descending touches (ties: higher price first), so top-k is a slice
+        self.by_strength = np.lexsort((-self.price, -self.touches))
+
+    def __len__(self):
+        return len(self.price)
+
+    def rows(self, positions):
+        """Plain dicts for the levels at `positions`"""
+        return [
+            {'price': p, 'touches': t, 'first_seen': f, 'last_seen': l}
+            for p, t, f, l in zip(self.price[positions].tolist(), self.touches[positions].tolist(),
+                                  self.first_seen[positions].tolist(), self.last_seen[positions].tolist())
+        ]
+
+    def below(self, price, inclusive=True):
+        """Position of the highest level at or below `price`, or None"""
+        position = np.searchsorted(self.price, price, side='right' if inclusive else 'left') - 1
+        return int(position) if position >= 0 else None
+
+    def above(self, price, inclusive=True):
+        """Position of the lowest level at or above `price`, or None"""
+        position = np.searchsorted(self.price, price, side='left' if inclusive else 'right')
+        return int(position) if position < len(self.price) else None
+
+    def between(self, low, high):
+        """Slice of the levels priced within [low, high]"""
+        return slice(int(np.searchsorted(self.price, low, side='left')), int(np.searchsorted(self.price, high, side='right')))
+
+    def strongest(self, k, low=-np.inf, high=np.inf, start=None, end=None):
+        """Positions of up to `k` most-touched levels in [low, high].
+
+        With `start`/`end` (UNIX seconds) only levels whose first-to-last-seen
+        span overlaps that window are considered; touches still count the
+        whole dataset.
+        """
+        window = self.between(low, high)
+        positions = np.arange(window.start, window.stop)
+        if start is not None:
+            positions = positions[self.last_seen[positions] >= start]
+        if end is not None:
+            positions = positions[self.first_seen[positions] <= end]
+        if len(positions) == len(self):
+            return self.by_strength[:k]
+        order = np.lexsort((-self.price[positions], -self.touches[positions]))
+        return positions[order[:k]]
+
+def _flatten(column, times):
+    values, offsets = level_arrays(column)
+    return values, np.repeat(times, np.diff(offsets))
+
+def _group(values, times):
+    """Collapse equal prices into one level each"""
+    if not len(values):
+        empty = np.array([], dtype=np.int64)
+        return LevelTable(np.array([], dtype=np.float64), empty, empty, empty)
+    order = np.lexsort((times, values))
+    values, times = values[order], times[order]
+    starts = np.flatnonzero(np.r_[True, values[1:] != values[:-1]])
+    return LevelTable(
+        price=values[starts],
+        touches=np.diff(np.r_[starts, len(values)]),
+        first_seen=np.minimum.reduceat(times, starts),
+        last_seen=np.maximum.reduceat(times, starts),
+    )
+
+def cluster_starts(price, tolerance_pct):
+    """Start positions of clusters over ascending `price`, each spanning at most `tolerance_pct` percent of its lowest price.
+
+    Clusters are anchored at their first price rather than chained gap by
+    gap, so a dense ladder of levels cannot merge into one wide band.
+    """
+    starts = []
+    start = 0
+    while start < len(price):
+        starts.append(start)
+        start = int(np.searchsorted(price, price[start] * (1 + tolerance_pct / 100), side='right'))
+    return np.array(starts, dtype=np.int64)
+
+def cluster_levels(levels, tolerance_pct):
+    """Merge levels within `tolerance_pct` percent of their cluster's lowest price.
+
+    A cluster is priced at the touch-weighted mean of its members, with
+    their summed touches and the widest first/last-seen span.
+    """
+    if not len(levels):
+        return levels
+    starts = cluster_starts(levels.price, tolerance_pct)
+    touches = np.add.reduceat(levels.touches, starts)
+    weighted = np.add.reduceat(levels.price * levels.touches, starts)
+    return LevelTable(
+        price=np.round(weighted / touches, 2),
+        touches=touches,
+        first_seen=np.minimum.reduceat(levels.first_seen, starts),
+        last_seen=np.maximum.reduceat(levels.last_seen, starts),
+    )
+
+class LevelIndex:
+    """Sorted, deduplicated support/resistance levels answering nearest, range and top-k queries by binary search"""
+
+    def __init__(self, df, tolerance_pct=0.25):
+        times = df['time'].to_numpy(dtype=np.int64)
+        self.tolerance_pct = tolerance_pct
+        self.levels = {}
+        self.clusters = {}
+        for kind in LEVEL_KINDS:
+            column = f'{kind}_levels'
+            if column in df.columns:
+                values, owners = _flatten(df[column], times)
+            else:
+                values, owners = np.array([], dtype=np.float64), np.array([], dtype=np.int64)
+            keep = ~np.isnan(values)
+            self.levels[kind] = _group(np.round(values[keep], 2), owners[keep])
+            self.clusters[kind] = cluster_levels(self.levels[kind], tolerance_pct)
+
+    def table(self, kind, clustered=True):
+        return (self.clusters if clustered else self.levels)[kind]
+
+    def nearest_below(self, kind, price, clustered=True):
+        """Closest level at or below `price` as a dict, or None"""
+        table = self.table(kind, clustered)
+        position = table.below(price)
+        return None if position is None else table.rows([position])[0]
+
+    def nearest_above(self, kind, price, clustered=True):
+        """Closest level at or above `price` as a dict, or None"""
+        table = self.table(kind, clustered)
+        position = table.above(price)
+        return None if position is None else table.rows([position])[0]
+
+    def in_range(self, kind, low, high, clustered=True):
+        table = self.table(kind, clustered)
+        return table.rows(table.between(low, high))
+
+    def strongest(self, kind, k=5, clustered=True, **bounds):
+        """Up to `k` most-touched levels, strongest first; `bounds` as for LevelTable.strongest"""
+        table = self.table(kind, clustered)
+        return table.rows(table.strongest(k, **bounds))
@@ -1,3 +1,7 @@
+import numpy as np
+from utils.profiling import instrument
+
+@instrument('metrics')
 def calculate_metrics(df):
     direction_col = next((col for col in ['direction', 'Direction', 'signal', 'Signal'] if col in df.columns), None)
 
@@ -16,3 +20,57 @@ def calculate_metrics(df):
         'lowest_price': df['low'].min(),
         'direction_col': direction_col
     }
+
+class LiveMetrics:
+    """calculate_metrics (plus the close-weighted VWAP) kept up to date one bar at a time.
+
+    Totals cover every bar except the newest, which is held apart so a
+    revised newest bar replaces it instead of being counted twice.
+    """
+
+    def __init__(self, direction_col='direction'):
+        self.direction_col = direction_col
+        self.bars = 0
+        self.first_close = None
+        self.volume = 0
+        self.close_volume = 0.0
+        self.high = -np.inf
+        self.low = np.inf
+        self.long = 0
+        self.short = 0
+        self.last = None
+
+    def push(self, high, low, close, volume, signal, replace=False):
+        """Add a bar (signal +1 LONG, -1 SHORT, 0 otherwise), or revise the newest one when `replace`"""
+        if self.last is not None and not replace:
+            last_high, last_low, last_close, last_volume, last_signal = self.last
+            self.bars += 1
+            self.volume += last_volume
+            self.close_volume += last_close * last_volume
+            self.high = max(self.high, last_high)
+            self.low = min(self.low, last_low)
+            self.long += last_signal > 0
+            self.short += last_signal < 0
+        if self.first_close is None:
+            self.first_close = close
+        self.last = (high, low, close, volume, signal)
+
+    def snapshot(self):
+        """Same keys as calculate_metrics and RangeIndex.window_metrics, or None before the first bar"""
+        if self.last is None:
+            return None
+        high, low, close, volume, signal = self.last
+        total_volume = self.volume + volume
+        long_trades, short_trades = self.long + (signal > 0), self.short + (signal < 0)
+        return {
+            'total_trades': int(long_trades + short_trades),
+            'long_trades': int(long_trades),
+            'short_trades': int(short_trades),
+            'avg_volume': total_volume / (self.bars + 1) / 1_000_000,
+            'vwap': (self.close_volume + close * volume) / total_volume if total_volume else np.nan,
+            'price_change': (close - self.first_close) / self.first_close * 100,
+            'current_price': close,
+            'highest_price': max(self.high, high),
+            'lowest_price': min(self.low, low),
+            'direction_col': self.direction_col
+        }
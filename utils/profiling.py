@@ -0,0 +1,209 @@
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import Optional
+
+from config.constants import PROFILE_JSONL_MAX_BYTES, PROFILE_JSONL_PATH, PROFILE_PROMETHEUS_PATH
+
+@dataclass
+class StageRecord:
+    stage: str
+    depth: int
+    wall_ms: float = 0.0
+    cpu_ms: float = 0.0
+    rows: Optional[int] = None
+    bytes: Optional[int] = None
+    cache: Optional[str] = None
+    started: float = field(default=0.0, repr=False)
+    cpu_started: float = field(default=0.0, repr=False)
+
+class _Run:
+    def __init__(self):
+        self.id = uuid.uuid4().hex[:12]
+        self.started = time.time()
+        self.records = []
+        self.open = []
+
+# The active rerun of this script thread; None means instrumentation is off
+_current_run = contextvars.ContextVar('profiling_run', default=None)
+
+class _NullStage:
+    """Stand-in yielded while instrumentation is off; attribute writes are dropped"""
+    enabled = False
+
+    def __setattr__(self, name, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_STAGE = _NullStage()
+
+class _Stage:
+    enabled = True
+
+    def __init__(self, run, name, rows=None):
+        self.run = run
+        self.record = StageRecord(name, len(run.open), rows=rows)
+
+    def __setattr__(self, name, value):
+        if name in ('rows', 'bytes', 'cache'):
+            setattr(self.record, name, value)
+        else:
+            object.__setattr__(self, name, value)
+
+    def __enter__(self):
+        self.run.open.append(self.record)
+        self.run.records.append(self.record)
+        self.record.cpu_started = time.thread_time()
+        self.record.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.record.wall_ms = (time.perf_counter() - self.record.started) * 1000
+        self.record.cpu_ms = (time.thread_time() - self.record.cpu_started) * 1000
+        self.run.open.pop()
+        return False
+
+def stage(name, rows=None):
+    """Context manager timing a block as `name`; set `.rows`, `.bytes` or `.cache` on the value it yields"""
+    run = _current_run.get()
+    return _NULL_STAGE if run is None else _Stage(run, name, rows)
+
+def _row_count(value):
+    shape = getattr(value, 'shape', None)
+    return shape[0] if shape else None
+
+def instrument(name=None, cached=False):
+    """Decorator recording a call as a stage, with rows taken from a DataFrame result or first argument.
+
+    With `cached=True` place it above a Streamlit cache decorator: the call
+    counts as a cache hit unless the cached body calls mark_cache('miss').
+    """
+    def decorate(fn):
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            run = _current_run.get()
+            if run is None:
+                return fn(*args, **kwargs)
+            with _Stage(run, label) as timed:
+                if cached:
+                    timed.cache = 'hit'
+                result = fn(*args, **kwargs)
+                rows = _row_count(result)
+                timed.rows = rows if rows is not None else _row_count(args[0] if args else None)
+            return result
+        return wrapper
+    return decorate
+
+def mark_cache(status):
+    """Label the innermost open stage's cache outcome, e.g. 'miss' or 'disk hit'"""
+    run = _current_run.get()
+    if run is not None and run.open:
+        run.open[-1].cache = status
+
+def begin_run(enabled):
+    """Start recording this script rerun when `enabled`; returns the run or None"""
+    run = _Run() if enabled else None
+    _current_run.set(run)
+    return run
+
+def end_run():
+    """Stop recording, export the run and return it (None when recording was off)"""
+    run = _current_run.get()
+    _current_run.set(None)
+    if run is None:
+        return None
+    _totals.add(run.records)
+    export_jsonl(run)
+    export_prometheus()
+    return run
+
+def records_as_dicts(records):
+    return [{key: value for key, value in asdict(record).items() if key not in ('started', 'cpu_started')}
+            for record in records]
+
+class _Totals:
+    """Process-wide per-stage aggregates for the Prometheus export"""
+
+    def __init__(self):
+        self.stages = {}
+        self._lock = threading.Lock()
+
+    def add(self, records):
+        with self._lock:
+            for record in records:
+                totals = self.stages.setdefault(record.stage, {
+                    'calls': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0, 'rows': 0, 'bytes': 0, 'cache': {}
+                })
+                totals['calls'] += 1
+                totals['wall_seconds'] += record.wall_ms / 1000
+                totals['cpu_seconds'] += record.cpu_ms / 1000
+                totals['rows'] += record.rows or 0
+                totals['bytes'] += record.bytes or 0
+                if record.cache:
+                    totals['cache'][record.cache] = totals['cache'].get(record.cache, 0) + 1
+
+    def prometheus_text(self):
+        metrics = [
+            ('tsla_stage_calls_total', 'Instrumented stage executions', 'calls'),
+            ('tsla_stage_wall_seconds_total', 'Wall-clock seconds spent in the stage', 'wall_seconds'),
+            ('tsla_stage_cpu_seconds_total', 'CPU seconds of the calling thread spent in the stage', 'cpu_seconds'),
+            ('tsla_stage_rows_total', 'Rows processed by the stage', 'rows'),
+            ('tsla_stage_bytes_total', 'Payload bytes produced by the stage', 'bytes'),
+        ]
+        with self._lock:
+            lines = []
+            for metric, help_text, key in metrics:
+                lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} counter']
+                lines += [f'{metric}{{stage="{stage}"}} {totals[key]}' for stage, totals in sorted(self.stages.items())]
+            lines += ['# HELP tsla_stage_cache_total Cache outcomes per stage', '# TYPE tsla_stage_cache_total counter']
+            for stage, totals in sorted(self.stages.items()):
+                lines += [f'tsla_stage_cache_total{{stage="{stage}",result="{result}"}} {count}'
+                          for result, count in sorted(totals['cache'].items())]
+        return '\n'.join(lines) + '\n'
+
+_totals = _Totals()
+_export_lock = threading.Lock()
+
+def prometheus_text():
+    return _totals.prometheus_text()
+
+def run_jsonl(run):
+    """One JSON object per stage, tagged with the rerun id and start time"""
+    return ''.join(json.dumps({'run': run.id, 'time': run.started, **record}) + '\n' for record in records_as_dicts(run.records))
+
+def export_jsonl(run, path=PROFILE_JSONL_PATH, max_bytes=PROFILE_JSONL_MAX_BYTES):
+    """Append the run, first rotating the file to `path`.1 when it has outgrown max_bytes"""
+    if not path:
+        return
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    text = run_jsonl(run)
+    with _export_lock:
+        try:
+            if os.path.getsize(path) + len(text) > max_bytes:
+                os.replace(path, f'{path}.1')
+        except FileNotFoundError:
+            pass
+        with open(path, 'a') as handle:
+            handle.write(text)
+
+def export_prometheus(path=PROFILE_PROMETHEUS_PATH):
+    """Rewrite the textfile-collector file atomically so scrapers never read a partial file"""
+    if not path:
+        return
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    staging = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(staging, 'w') as handle:
+        handle.write(prometheus_text())
+    os.replace(staging, path)
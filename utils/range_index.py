@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+
+class SparseTable:
+    """Block sparse table for O(1) range max/min with O(n) extra memory.
+
+    A classic sparse table needs n log n entries, which is gigabytes at 10M
+    bars; tabulating per-block extremes instead keeps it to (n / block) log n
+    and leaves at most two partial blocks to scan per query. Use np.fmax /
+    np.fmin to skip NaN the way pandas max()/min() do.
+    """
+
+    def __init__(self, values, ufunc, block=64):
+        self.values = values
+        self.ufunc = ufunc
+        self.block = block
+        # fmax/fmin ignore NaN padding, so an all-NaN block stays NaN as it does in pandas
+        padding = {np.maximum: -np.inf, np.minimum: np.inf}.get(ufunc, np.nan)
+        n_blocks = -(-len(values) // block)
+        padded = np.full(n_blocks * block, padding)
+        padded[:len(values)] = values
+        self.levels = [ufunc.reduce(padded.reshape(n_blocks, block), axis=1)] if n_blocks else [padded]
+        span = 1
+        while span * 2 <= n_blocks:
+            previous = self.levels[-1]
+            self.levels.append(ufunc(previous[:-span], previous[span:]))
+            span *= 2
+
+    def _blocks(self, first, last):
+        level = int(last - first + 1).bit_length() - 1
+        table = self.levels[level]
+        return self.ufunc(table[first], table[last - (1 << level) + 1])
+
+    def query(self, lo, hi):
+        """Reduce values[lo:hi]; NaN for an empty range"""
+        if hi <= lo:
+            return np.nan
+        first, last = -(-lo // self.block), hi // self.block - 1
+        if first > last:
+            return self.ufunc.reduce(self.values[lo:hi])
+        result = self._blocks(first, last)
+        if lo < first * self.block:
+            result = self.ufunc(result, self.ufunc.reduce(self.values[lo:first * self.block]))
+        if (last + 1) * self.block < hi:
+            result = self.ufunc(result, self.ufunc.reduce(self.values[(last + 1) * self.block:hi]))
+        return result
+
+class RangeIndex:
+    """Precomputed prefix sums and sparse tables answering date-window metrics in O(log n)"""
+
+    def __init__(self, df, direction_col=None):
+        self.close = df['close'].to_numpy(dtype=np.float64)
+        volume = df['volume'].to_numpy(dtype=np.float64)
+
+        def prefix(values):
+            out = np.zeros(len(values) + 1, dtype=np.float64)
+            np.cumsum(values, out=out[1:])
+            return out
+
+        self.volume = prefix(volume)
+        self.close_volume = prefix(self.close * volume)
+        if direction_col:
+            direction = df[direction_col]
+            upper = direction.astype(str).str.upper().to_numpy()
+            self.trades = prefix((direction.notna() & (direction != 'NEUTRAL')).to_numpy())
+            self.long = prefix(upper == 'LONG')
+            self.short = prefix(upper == 'SHORT')
+        else:
+            self.trades = self.long = self.short = np.zeros(len(df) + 1)
+        self.high = SparseTable(df['high'].to_numpy(dtype=np.float64), np.fmax)
+        self.low = SparseTable(df['low'].to_numpy(dtype=np.float64), np.fmin)
+        self.direction_col = direction_col
+
+    def window_metrics(self, lo, hi):
+        """Same keys as calculate_metrics, for rows [lo, hi)"""
+        rows = hi - lo
+        if rows <= 0:
+            return None
+        first_close, last_close = self.close[lo], self.close[hi - 1]
+        volume = self.volume[hi] - self.volume[lo]
+        return {
+            'total_trades': int(self.trades[hi] - self.trades[lo]),
+            'long_trades': int(self.long[hi] - self.long[lo]),
+            'short_trades': int(self.short[hi] - self.short[lo]),
+            'avg_volume': volume / rows / 1_000_000,
+            'vwap': (self.close_volume[hi] - self.close_volume[lo]) / volume if volume else np.nan,
+            'price_change': (last_close - first_close) / first_close * 100,
+            'current_price': last_close,
+            'highest_price': self.high.query(lo, hi),
+            'lowest_price': self.low.query(lo, hi),
+            'direction_col': self.direction_col
+        }
+
+def date_to_unix_seconds(day):
+    """Midnight of a calendar date as UNIX seconds, matching naive timestamps in `time`"""
+    return int(pd.Timestamp(day).value // 10 ** 9)